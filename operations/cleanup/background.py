@@ -0,0 +1,160 @@
+"""Exclusive sweep lock, run status file & detached background sweeps (`sweep --background`/`--status`).
+
+Every sweep (foreground or background) holds an exclusive flock on .archives while it runs,
+so concurrent invocations (e.g. open-bureau started from several terminals) coalesce into one
+run instead of racing on state.json & the trash manifests.
+
+Runs report their progress & results to .archives/sweep-status.json:
+
+    {
+      "current": {"pid": ..., "started_at": ..., "done": {"<backend>": {<result>}, ...}},
+      "last": {"pid": ..., "started_at": ..., "finished_at": ..., "result": {<run_cleanup() result>}}
+    }
+"""
+import fcntl
+import json
+import os
+import sys
+import traceback
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from . import state
+
+STATUS_FILENAME = "sweep-status.json"
+# descriptor holding the sweep lock, while this process holds it (see keep_sweep_lock())
+_lock_fd: int | None = None
+# stderr of background sweeps (e.g. handlers' logged errors)
+LOG_FILENAME = "sweep-background.log"
+
+
+@contextmanager
+def sweep_lock(blocking: bool = False) -> Iterator[bool]:
+    """Hold the exclusive sweep lock (an flock on .archives) for the duration of the block.
+
+    Args:
+        blocking: Wait for the lock if another sweep holds it (instead of giving up).
+
+    Yields:
+        Whether the lock was acquired (always True if blocking).
+    """
+    global _lock_fd
+    state.ARCHIVES_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(state.ARCHIVES_DIR, os.O_RDONLY)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        _lock_fd = fd
+        yield True
+    finally:
+        # closing the descriptor releases the lock (unless keep_sweep_lock() still holds a duplicate)
+        if _lock_fd == fd:
+            _lock_fd = None
+        os.close(fd)
+
+
+@contextmanager
+def keep_sweep_lock() -> Iterator[None]:
+    """Keep holding the sweep lock for the duration of the block, even past the end of the
+    sweep_lock() block it was entered within (e.g. in a timed-out handler's thread, which the
+    sweep doesn't wait for), so the next sweep can't overlap it.
+
+    The lock is held through a duplicate of sweep_lock()'s descriptor: an flock is only released
+    once every descriptor sharing it is closed. Outside a sweep_lock() block, this does nothing.
+    """
+    fd = os.dup(_lock_fd) if _lock_fd is not None else None
+    try:
+        yield
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+def is_sweep_running() -> bool:
+    """Check whether another sweep currently holds the sweep lock."""
+    with sweep_lock() as acquired:
+        return not acquired
+
+
+def read_status() -> dict[str, Any]:
+    """Load the sweep status file (empty if no sweep has recorded one)."""
+    try:
+        with open(state.ARCHIVES_DIR / STATUS_FILENAME) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _write_status(status: dict[str, Any]) -> None:
+    """Atomically replace the sweep status file."""
+    path = state.ARCHIVES_DIR / STATUS_FILENAME
+    tmp_path = path.with_name(f".{STATUS_FILENAME}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(status, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+class StatusRecorder:
+    """Records a sweep's progress & result in the status file (call while holding the sweep lock)."""
+
+    def __init__(self) -> None:
+        self.current: dict[str, Any] = {"pid": os.getpid(), "started_at": state.now_as_iso(), "done": {}}
+
+    def start(self) -> None:
+        """Mark the sweep as running."""
+        _write_status({**read_status(), "current": self.current})
+
+    def backend_done(self, name: str, result: dict[str, Any]) -> None:
+        """Record a backend's result as soon as its cleanup finishes."""
+        self.current["done"][name] = {k: v for k, v in result.items() if k != "items"}
+        _write_status({**read_status(), "current": self.current})
+
+    def finish(self, result: dict[str, Any]) -> None:
+        """Record the sweep's result as the last run."""
+        last = {
+            "pid": self.current["pid"],
+            "started_at": self.current["started_at"],
+            "finished_at": state.now_as_iso(),
+            "result": result,
+        }
+        _write_status({"current": None, "last": last})
+
+
+def start_background(run: Callable[[], int]) -> int:
+    """Fork a detached worker (in its own session, with no terminal) that calls run() then exits.
+
+    The worker's stdout is discarded and its stderr appended to .archives/sweep-background.log.
+
+    Returns:
+        The worker's pid (in the calling process; the worker never returns).
+    """
+    state.ARCHIVES_DIR.mkdir(parents=True, exist_ok=True)
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # worker: detach from the terminal & the caller's session, so it outlives both
+    code = 1
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        log = os.open(state.ARCHIVES_DIR / LOG_FILENAME, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        os.dup2(devnull, 0)
+        os.dup2(devnull, 1)
+        os.dup2(log, 2)
+        # (rebinding the streams too, in case they'd been replaced by ones not backed by fds 1 & 2)
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+        code = run()
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
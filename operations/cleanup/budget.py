@@ -0,0 +1,48 @@
+"""Time & item budgets bounding a single sweep (`--max-seconds`/`--max-items`).
+
+One budget is shared by every backend's cleanup (which run concurrently): handlers check it
+between batches, so a sweep overruns its time budget by at most one batch per backend and
+never trashes more than its item budget. Backends stopped by the budget are remembered in
+state.json, and the next sweep resumes with them (see core.run_cleanup()).
+"""
+import threading
+import time
+
+
+class SweepBudget:
+    """Wall-clock deadline and item allowance shared by a sweep's handlers."""
+
+    def __init__(self, max_seconds: float | None = None, max_items: int | None = None):
+        # (0 means no limit, like None)
+        self.max_seconds = max_seconds or None
+        self.max_items = max_items or None
+        self._deadline = time.monotonic() + max_seconds if max_seconds else None
+        self._items_left = self.max_items
+        self._lock = threading.Lock()
+
+    def out_of_time(self) -> bool:
+        """Check whether the sweep's time budget is spent."""
+        return self._deadline is not None and time.monotonic() >= self._deadline
+
+    def take(self, count: int) -> int:
+        """Claim up to `count` items of the item budget.
+
+        Returns:
+            How many items may be trashed (0 once either budget is spent).
+        """
+        if self.out_of_time():
+            return 0
+        with self._lock:
+            if self._items_left is None:
+                return count
+            granted = min(count, self._items_left)
+            self._items_left -= granted
+            return granted
+
+    def exhausted_reason(self) -> str | None:
+        """Describe which budget is spent (None if neither is)."""
+        if self.out_of_time():
+            return f"time budget of {self.max_seconds:g}s spent"
+        if self._items_left is not None and self._items_left <= 0:
+            return f"item budget of {self.max_items} spent"
+        return None
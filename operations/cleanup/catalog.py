@@ -0,0 +1,367 @@
+"""SQLite catalog of trashed batches and items (kept at the trash root, i.e. .archives/trash/.catalog.db).
+
+Each backend's manifest (see trash.py) stays the source of truth for what's in its trash
+directory, as do the item sidecars beside it for what's in each batch; the catalog mirrors
+them as indexed tables (so it can be rebuilt if deleted, or of another schema version) so that:
+
+- finding expired batches is a range query on `batches.purge_after` (instead of reading
+  every backend's manifest on every run)
+- finding one trashed memory is a point query on `items (backend, native_id)` that yields the
+  export file and byte span holding it (instead of scanning every export)
+- counting the references to each content store record (see content_store.py) is a lookup
+  on `blob_refs (hash)`, which also records each record's size (so records shared by several
+  batches are sized once)
+
+Timestamps are stored as normalized UTC ISO strings (see to_catalog_time()), so comparing
+them as text orders them chronologically.
+"""
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, NotRequired, TypedDict
+
+CATALOG_FILENAME = ".catalog.db"
+
+# bumped on schema changes: a catalog of any other version is dropped and rebuilt from the
+#   manifests & item sidecars (see _reset())
+SCHEMA_VERSION = 1
+
+# purge_after of batches that must never expire on their own (e.g. unreadable trashed_at)
+NEVER = "9999-12-31T23:59:59.999999+00:00"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    backend TEXT NOT NULL,
+    trashed_at TEXT NOT NULL,
+    purge_after TEXT NOT NULL,
+    item_count INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    files TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS batches_by_purge_after ON batches (purge_after);
+CREATE INDEX IF NOT EXISTS batches_by_backend ON batches (backend);
+
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    batch_id TEXT NOT NULL REFERENCES batches (id) ON DELETE CASCADE,
+    backend TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    native_id TEXT,
+    created_at TEXT,
+    trashed_at TEXT NOT NULL,
+    purge_after TEXT NOT NULL,
+    file TEXT NOT NULL,
+    byte_offset INTEGER,
+    byte_length INTEGER
+);
+CREATE INDEX IF NOT EXISTS items_by_purge_after ON items (purge_after);
+CREATE INDEX IF NOT EXISTS items_by_backend_id ON items (backend, native_id);
+CREATE INDEX IF NOT EXISTS items_by_trashed_at ON items (backend, trashed_at);
+CREATE INDEX IF NOT EXISTS items_by_batch ON items (batch_id);
+
+CREATE TABLE IF NOT EXISTS blob_refs (
+    batch_id TEXT NOT NULL REFERENCES batches (id) ON DELETE CASCADE,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (batch_id, hash)
+);
+CREATE INDEX IF NOT EXISTS blob_refs_by_hash ON blob_refs (hash);
+
+CREATE TABLE IF NOT EXISTS manifests (
+    backend TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+# bound parameters per query (below SQLite's lowest compiled-in limit)
+_MAX_PARAMS = 900
+
+_BATCH_COLUMNS = "id, backend, trashed_at, purge_after, item_count, size, files"
+
+# keys of the dicts returned by TrashCatalog.find_items()
+_ITEM_COLUMNS = ("item_id", "batch_id", "backend", "kind", "native_id", "created_at", "trashed_at",
+                 "purge_after", "file", "offset", "length")
+
+
+class TrashedItem(TypedDict):
+    """One trashed memory, as recorded by a handler when it writes its export."""
+    kind: str  # e.g. "observation", "entity", "point", "file"
+    native_id: str | None  # the backend's own id/name for the memory
+    created_at: str | None
+    file: str  # trash file holding the item
+    offset: int | None  # byte span of the item's record within `file` (None for whole files)
+    length: int | None
+
+
+class CatalogBatch(TypedDict):
+    """One trashed batch (i.e. one manifest entry)."""
+    id: str
+    backend: str
+    trashed_at: str
+    purge_after: str
+    item_count: int
+    size: int  # total bytes of the batch's trash files (and content store records)
+    files: list[str]
+    blobs: NotRequired[dict[str, int]]  # content store records it references: size by hash (when recording it)
+
+
+def to_catalog_time(dt: datetime) -> str:
+    """Normalize a datetime to the fixed-width UTC ISO string the catalog compares as text."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+class TrashCatalog:
+    """Indexed mirror of the trash manifests, opened as a context manager.
+
+    Changes made within the `with` block are committed together when it exits cleanly.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+
+    def __enter__(self) -> "TrashCatalog":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                _reset(conn)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.executescript(_SCHEMA)
+        except sqlite3.Error:
+            conn.close()
+            raise
+        self._conn = conn
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            if exc_type is None:
+                conn.commit()
+            else:
+                conn.rollback()
+        finally:
+            conn.close()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError("TrashCatalog must be used as a context manager")
+        return self._conn
+
+    def add_batch(self, batch: CatalogBatch) -> None:
+        """Record a trashed batch (replacing any earlier record with the same id) and its references."""
+        self.conn.execute("DELETE FROM blob_refs WHERE batch_id = ?", (batch["id"],))
+        self.conn.execute(
+            "INSERT OR REPLACE INTO batches (id, backend, trashed_at, purge_after, item_count, size, files) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (batch["id"], batch["backend"], batch["trashed_at"], batch["purge_after"],
+             batch["item_count"], batch["size"], json.dumps(batch["files"])),
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO blob_refs (batch_id, hash, size) VALUES (?, ?, ?)",
+            ((batch["id"], digest, size) for digest, size in batch.get("blobs", {}).items()),
+        )
+
+    def add_items(self, batch_id: str, items: Iterable[TrashedItem]) -> None:
+        """Record the items of an already-recorded batch (inheriting its backend & timestamps)."""
+        row = self.conn.execute(
+            "SELECT backend, trashed_at, purge_after FROM batches WHERE id = ?", (batch_id,)
+        ).fetchone()
+        if row is None:
+            return
+        backend, trashed_at, purge_after = row
+        self.conn.executemany(
+            "INSERT INTO items (batch_id, backend, kind, native_id, created_at, trashed_at, purge_after, "
+            "file, byte_offset, byte_length) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((batch_id, backend, item["kind"], item["native_id"], item["created_at"], trashed_at,
+              purge_after, item["file"], item["offset"], item["length"]) for item in items),
+        )
+
+    def expired_batches(self, now: datetime) -> list[CatalogBatch]:
+        """Return every batch whose purge_after has passed (via the purge_after index)."""
+        rows = self.conn.execute(
+            f"SELECT {_BATCH_COLUMNS} FROM batches WHERE purge_after <= ? ORDER BY purge_after",
+            (to_catalog_time(now),),
+        )
+        return [_batch_from_row(row) for row in rows]
+
+    def batches_trashed_before(self, cutoff: datetime) -> list[CatalogBatch]:
+        """Return every batch trashed before cutoff (i.e. old enough to be evicted)."""
+        rows = self.conn.execute(
+            f"SELECT {_BATCH_COLUMNS} FROM batches WHERE trashed_at < ?", (to_catalog_time(cutoff),)
+        )
+        return [_batch_from_row(row) for row in rows]
+
+    def sizes_by_backend(self) -> dict[str, int]:
+        """Get the total recorded size of each backend's trash (no file system walk), counting
+        each content store record its batches share once."""
+        rows = self.conn.execute(
+            "SELECT backend, SUM(size) FROM ("
+            # the batches' own files (their recorded size, less that of the records they reference)
+            "  SELECT b.backend, b.size - COALESCE(SUM(r.size), 0) AS size FROM batches b "
+            "  LEFT JOIN blob_refs r ON r.batch_id = b.id GROUP BY b.id "
+            "  UNION ALL "
+            "  SELECT backend, size FROM ("
+            "    SELECT DISTINCT b.backend, r.hash, r.size FROM blob_refs r JOIN batches b ON b.id = r.batch_id"
+            "  )"
+            ") GROUP BY backend"
+        )
+        return {backend: size or 0 for backend, size in rows}
+
+    def blob_refs(self) -> list[tuple[str, str, str, int]]:
+        """Get every batch's references to content store records, as (batch id, backend, hash, size)."""
+        rows = self.conn.execute(
+            "SELECT r.batch_id, b.backend, r.hash, r.size FROM blob_refs r JOIN batches b ON b.id = r.batch_id"
+        )
+        return [tuple(row) for row in rows]
+
+    def referenced_blobs(self, digests: Iterable[str]) -> set[str]:
+        """Get which of the given content store records any recorded batch still references."""
+        digests = list(digests)
+        referenced: set[str] = set()
+        for start in range(0, len(digests), _MAX_PARAMS):
+            chunk = digests[start:start + _MAX_PARAMS]
+            rows = self.conn.execute(
+                f"SELECT DISTINCT hash FROM blob_refs WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            referenced.update(row[0] for row in rows)
+        return referenced
+
+    def find_items(
+        self,
+        backend: str | None = None,
+        native_ids: Iterable[str] | None = None,
+        trashed_since: datetime | None = None,
+        trashed_until: datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """Look up trashed items (oldest first), optionally narrowed by backend, native ids and
+        a trashed_at range (inclusive), via the (backend, native_id) & (backend, trashed_at) indexes.
+        """
+        clauses: list[str] = []
+        params: list[Any] = []
+        if backend is not None:
+            clauses.append("backend = ?")
+            params.append(backend)
+        if trashed_since is not None:
+            clauses.append("trashed_at >= ?")
+            params.append(to_catalog_time(trashed_since))
+        if trashed_until is not None:
+            clauses.append("trashed_at <= ?")
+            params.append(to_catalog_time(trashed_until))
+
+        def select(where_clauses: list[str], where_params: list[Any]) -> list[tuple]:
+            where = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+            return self.conn.execute(
+                "SELECT id, batch_id, backend, kind, native_id, created_at, trashed_at, purge_after, file, "
+                f"byte_offset, byte_length FROM items {where} ORDER BY trashed_at, id",
+                where_params,
+            ).fetchall()
+
+        if native_ids is None:
+            rows = select(clauses, params)
+        else:
+            # (looked up _MAX_PARAMS ids at a time, then merged back into order)
+            ids = list(dict.fromkeys(native_ids))
+            chunk_size = _MAX_PARAMS - len(params)
+            rows = []
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                rows.extend(select([*clauses, f"native_id IN ({','.join('?' * len(chunk))})"], [*params, *chunk]))
+            rows.sort(key=lambda row: (row[6], row[0]))
+        return [dict(zip(_ITEM_COLUMNS, row)) for row in rows]
+
+    def remove_items(self, item_ids: Iterable[int]) -> None:
+        """Forget individual items (e.g. once they've been restored)."""
+        self.conn.executemany("DELETE FROM items WHERE id = ?", ((item_id,) for item_id in item_ids))
+
+    def remove_batches(self, batch_ids: Iterable[str]) -> None:
+        """Forget batches (and, via the foreign key cascade, their items)."""
+        self.conn.executemany("DELETE FROM batches WHERE id = ?", ((batch_id,) for batch_id in batch_ids))
+
+    def remove_backend(self, backend: str) -> None:
+        """Forget everything recorded for a backend (i.e. its trash directory is gone)."""
+        self.conn.execute("DELETE FROM batches WHERE backend = ?", (backend,))
+        self.conn.execute("DELETE FROM manifests WHERE backend = ?", (backend,))
+
+    def clear(self) -> None:
+        """Forget everything (i.e. the whole trash was emptied)."""
+        self.conn.execute("DELETE FROM batches")
+        self.conn.execute("DELETE FROM manifests")
+
+    def known_backends(self) -> set[str]:
+        """Get the backends the catalog has any record of."""
+        rows = self.conn.execute("SELECT backend FROM batches UNION SELECT backend FROM manifests")
+        return {row[0] for row in rows}
+
+    def synced_version(self, backend: str) -> tuple[int, int] | None:
+        """Get the (size, mtime_ns) of the backend's manifest as last mirrored by the catalog."""
+        row = self.conn.execute("SELECT size, mtime_ns FROM manifests WHERE backend = ?", (backend,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def mark_synced(self, backend: str, version: tuple[int, int] | None) -> None:
+        """Remember the (size, mtime_ns) of the backend's manifest the catalog now mirrors."""
+        if version is None:
+            self.conn.execute("DELETE FROM manifests WHERE backend = ?", (backend,))
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO manifests (backend, size, mtime_ns) VALUES (?, ?, ?)",
+            (backend, *version),
+        )
+
+    def sync_backend(self, backend: str, batches: list[CatalogBatch]) -> list[str]:
+        """Make a backend's recorded batches match its manifest (keeping items of surviving batches).
+
+        Returns:
+            The ids of the batches newly recorded (whose items are yet to be added).
+        """
+        manifest_ids = {batch["id"] for batch in batches}
+        known_ids = {row[0] for row in self.conn.execute("SELECT id FROM batches WHERE backend = ?", (backend,))}
+
+        self.remove_batches(known_ids - manifest_ids)
+        added = []
+        for batch in batches:
+            if batch["id"] not in known_ids:
+                self.add_batch(batch)
+                added.append(batch["id"])
+        return added
+
+
+def _reset(conn: sqlite3.Connection) -> None:
+    """Drop every table of a catalog of another schema version (in one transaction), leaving it
+    to be recreated empty: with no manifest recorded as mirrored, the next sync re-reads them all.
+    """
+    conn.execute("BEGIN")
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        for table in tables:
+            conn.execute(f'DROP TABLE "{table}"')
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _batch_from_row(row: tuple) -> CatalogBatch:
+    batch_id, backend, trashed_at, purge_after, item_count, size, files = row
+    return {
+        "id": batch_id,
+        "backend": backend,
+        "trashed_at": trashed_at,
+        "purge_after": purge_after,
+        "item_count": item_count,
+        "size": size,
+        "files": json.loads(files),
+    }
@@ -0,0 +1,101 @@
+"""Streaming compression for trash exports.
+
+Exports are compressed as they're written (never buffered whole in memory) with the codec
+set by `trash.compression`; readers detect the codec from each file's leading bytes, so
+files written under any setting (or before compression existed) stay readable.
+
+Writers' and readers' tell()/seek() work in *uncompressed* byte positions, so the byte
+spans recorded in the trash catalog stay valid: reading a record means decompressing
+forward to it (cheap when records are read in file order, as load_trashed_items() does).
+"""
+import gzip
+import logging
+import lzma
+from pathlib import Path
+from typing import Any, BinaryIO, cast
+
+from ..config_loader import get_trash_compression, get_trash_compression_level
+
+try:
+    from compression import zstd  # type: ignore[import-not-found]  # Python 3.14+
+except ImportError:
+    zstd = None
+
+logger = logging.getLogger(__name__)
+
+# file name suffix appended to exports written with each codec
+SUFFIXES = {"zstd": ".zst", "gzip": ".gz", "lzma": ".xz", "none": ""}
+
+# leading bytes of each codec's files
+_MAGIC = {b"\x28\xb5\x2f\xfd": "zstd", b"\x1f\x8b": "gzip", b"\xfd7zXZ\x00": "lzma"}
+
+# valid compression levels of the stdlib codecs (zstd accepts a wider, negative-inclusive range)
+_LEVEL_RANGE = {"gzip": (0, 9), "lzma": (0, 9)}
+
+
+def get_codec() -> str:
+    """Get the configured codec, falling back to gzip if zstd isn't available in this interpreter."""
+    codec = get_trash_compression().lower()
+    if codec not in SUFFIXES:
+        logger.warning("Unknown trash.compression %r, using gzip", codec)
+        return "gzip"
+    if codec == "zstd" and zstd is None:
+        return "gzip"
+    return codec
+
+
+def compressed_path(path: Path) -> Path:
+    """Append the configured codec's suffix to an export's path (e.g. .json -> .json.zst)."""
+    return path.with_name(path.name + SUFFIXES[get_codec()])
+
+
+def _codec_for_path(path: Path) -> str:
+    for codec, suffix in SUFFIXES.items():
+        if suffix and path.name.endswith(suffix):
+            return codec
+    return "none"
+
+
+def open_writer(path: Path) -> BinaryIO:
+    """Open an export for streaming, compressed writing (codec chosen by the path's suffix)."""
+    codec = _codec_for_path(path)
+    level = get_trash_compression_level()
+    if level is not None and codec in _LEVEL_RANGE:
+        low, high = _LEVEL_RANGE[codec]
+        level = min(max(level, low), high)
+
+    if codec == "gzip":
+        return cast(BinaryIO, gzip.open(path, "wb", compresslevel=6 if level is None else level))
+    if codec == "lzma":
+        return cast(BinaryIO, lzma.open(path, "wb", preset=level))
+    if codec == "zstd":
+        if zstd is None:
+            raise OSError(f"cannot write {path}: zstd is not available in this Python")
+        return cast(BinaryIO, zstd.open(path, "wb", level=level))
+    return open(path, "wb")
+
+
+def open_reader(path: Path) -> BinaryIO:
+    """Open a (possibly compressed) trash file for reading its uncompressed bytes.
+
+    Raises:
+        OSError: If the file can't be opened, or uses a codec this interpreter lacks.
+    """
+    with open(path, "rb") as f:
+        head = f.read(6)
+
+    for magic, codec in _MAGIC.items():
+        if not head.startswith(magic):
+            continue
+        opener: Any
+        if codec == "gzip":
+            opener = gzip.open
+        elif codec == "lzma":
+            opener = lzma.open
+        elif zstd is not None:
+            opener = zstd.open
+        else:
+            raise OSError(f"cannot read {path}: zstd is not available in this Python")
+        return cast(BinaryIO, opener(path, "rb"))
+
+    return open(path, "rb")
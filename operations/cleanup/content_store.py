@@ -0,0 +1,81 @@
+"""Content-addressed store for trashed records (kept at .archives/trash/.cas), used when `trash.dedup` is set.
+
+Each distinct record is stored once, as `.cas/<first 2 hex digits>/<sha256 of its bytes>`, and
+manifest entries reference the records of their batch by hash (their `blobs` list) instead of
+embedding copies; so repeated wipes, or re-trashing memories that were restored, add no new data.
+
+Records are reference counted via the manifests (mirrored in the trash catalog's `blob_refs`
+table): purging a batch only deletes the records no remaining batch references.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable
+
+from .purge import remove_path
+
+CAS_DIRNAME = ".cas"
+
+
+class ContentStore:
+    """Hash-keyed record store rooted at a directory."""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path_for(self, digest: str) -> Path:
+        """Get the path of the record with the given hash."""
+        return self.root / digest[:2] / digest
+
+    def put(self, data: bytes, fsync: bool = False) -> str:
+        """Store a record (unless an identical one already is), returning its hash.
+
+        New records are written to a temporary file and renamed into place, so a record
+        at its hash's path is always complete.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if path.exists():
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{digest}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return digest
+
+    def size(self, digests: Iterable[str]) -> int:
+        """Get the total size of the given records (skipping missing ones)."""
+        return sum(self.sizes(digests).values())
+
+    def sizes(self, digests: Iterable[str]) -> dict[str, int]:
+        """Get the size of each of the given records, by hash (0 for missing ones)."""
+        sizes = {}
+        for digest in digests:
+            try:
+                sizes[digest] = self.path_for(digest).stat().st_size
+            except OSError:
+                sizes[digest] = 0
+        return sizes
+
+    def remove(self, digests: Iterable[str]) -> tuple[int, int]:
+        """Delete records (e.g. once no batch references them).
+
+        Returns:
+            (records removed, bytes freed).
+        """
+        removed = freed = 0
+        for digest in set(digests):
+            count, size = remove_path(self.path_for(digest))
+            removed += count
+            freed += size
+        return removed, freed
+
+
+def content_store_for(trash_path: Path) -> ContentStore:
+    """Get the content store shared by every backend's trash (given one backend's trash directory)."""
+    return ContentStore(trash_path.parent / CAS_DIRNAME)
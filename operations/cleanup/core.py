@@ -1,25 +1,42 @@
 #!/usr/bin/env -S uv run
-"""Cleanup CLI entrypoint"""
+"""Cleanup CLI entrypoint
+
+Modules only some commands need (the trash & its catalog, the executor, the daemon, metrics,
+profiling, config validation, ...) are imported by the functions (and main() branches) that
+use them, so e.g. `sweep --status` doesn't pay for a sweep's.
+"""
 import argparse
+import json
 import logging
 import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
 
 from ..config_loader import (
     get_config,
     get_retention,
     get_cleanup_interval,
+    get_cleanup_full_scan_interval,
+    get_cleanup_handler_timeout,
+    get_cleanup_max_items,
+    get_cleanup_max_seconds,
+    get_cleanup_max_workers,
     get_trash_grace_period,
+    get_trash_max_size,
+    get_trash_max_size_for,
+    get_trash_min_age,
     parse_duration,
 )
-from ..validate_config import full_validate
 from .state import load_state, save_state, did_recently_run, now_as_iso, State
-from .trash import empty_expired_trash, empty_all_trash
+from .budget import SweepBudget
 from .handlers import HANDLERS
 
-# compute config-derived values once at module load
-_config = get_config()
-_min_interval = parse_duration(get_cleanup_interval())
-_interval_hours = int(_min_interval.total_seconds() / 3600)
+if TYPE_CHECKING:
+    from .handlers.base import CleanupHandler
+    from .profiling import SweepProfiler
 
 
 def run_cleanup(
@@ -27,10 +44,54 @@ def run_cleanup(
     dry_run: bool = False,
     memory_backends: list[str] | None = None,
     verbose: bool = False,
+    max_seconds: float | None = None,
+    max_items: int | None = None,
+    profiler: "SweepProfiler | None" = None,
+) -> dict:
+    """Run cleanup for all or specific storage.
+
+    Args:
+        max_seconds: Stop trashing stale items after this many seconds
+            (default `cleanup.max_seconds`; 0 for no limit).
+        max_items: Stop after trashing this many stale items (default `cleanup.max_items`; 0 for no limit).
+        profiler: Profile each handler's phases (one handler at a time), writing reports
+            under .archives/profiles/ (listed in the result's 'profiles').
+
+    Backends stopped by either budget are recorded in state.json: the next run resumes
+    with them (even within `cleanup.min_interval`).
+
+    Only one sweep runs at a time: if another holds the sweep lock, this one is skipped.
+    Non-dry runs record their progress & result in the sweep status file (see background.py).
+    """
+    from .background import sweep_lock
+
+    with sweep_lock() as acquired:
+        if not acquired:
+            return {
+                "skipped": True,
+                "reason": "Another sweep is running, skipping (see --status)",
+            }
+        return _run_cleanup(force, dry_run, memory_backends, verbose, max_seconds, max_items, profiler)
+
+
+def _run_cleanup(
+    force: bool,
+    dry_run: bool,
+    memory_backends: list[str] | None,
+    verbose: bool,
+    max_seconds: float | None,
+    max_items: int | None,
+    profiler: "SweepProfiler | None",
 ) -> dict:
-    """Run cleanup for all or specific storage."""
+    """Run cleanup while holding the sweep lock (see run_cleanup())."""
+    from ..validate_config import full_validate
+    from .background import StatusRecorder, keep_sweep_lock
+    from .executor import run_handlers
+    from .metrics import PhaseMetrics, append_metrics_log, process_peak_rss_bytes
+    from .trash import empty_expired_trash, enforce_trash_quota
+
     # Validate configuration before running cleanup
-    validation_errors = full_validate(_config)
+    validation_errors = full_validate(get_config())
     if validation_errors:
         return {
             "error": "Configuration validation failed",
@@ -40,86 +101,214 @@ def run_cleanup(
 
     state = load_state()
     errors: list[dict] = []
+    started_at = now_as_iso()
+    start = time.perf_counter()
+
+    # resume backends the previous run's budget stopped (those selected, if running specific ones)
+    interrupted = state.get("interrupted_backends") or []
+    requested = {s.replace("-", "_") for s in memory_backends} if memory_backends else None
+    resumable = [name for name in interrupted if requested is None or name.replace("-", "_") in requested]
+    resuming = bool(resumable) and not force
+    # (config is read per run, as `sweep --daemon` reloads it when changed)
+    interval_hours = int(parse_duration(get_cleanup_interval()).total_seconds() / 3600)
+    recently_ran = did_recently_run(state, N=interval_hours)
 
     # check if we ran recently (unless forced)
-    if not force and did_recently_run(state, N=_interval_hours):
+    if not force and not resuming and recently_ran:
         return {
             "skipped": True,
             "reason": f"Last run was <{get_cleanup_interval()} ago, skipping (override with --force/-f)",
             "last_run": state.get("last_cleanup_run"),
         }
 
-    results = []
-
     # filter handlers if requested to clear specific storage only
     handlers_to_run = HANDLERS
-    if memory_backends:
-        requested = {s.replace("-", "_") for s in memory_backends}
-        handlers_to_run = tuple(h for h in HANDLERS if h.name.replace("-", "_") in requested)  # type: ignore[assignment]
+    if requested is not None:
+        handlers_to_run = tuple(h for h in HANDLERS if h.name.replace("-", "_") in requested)
         if not handlers_to_run:
-            return {"error": f"Unknown storage: {', '.join(memory_backends)}", "errors": errors}
-
-    # run cleanup for each handler in the list (i.e. each memory backend selected)
-    for handler_class in handlers_to_run:
-        handler = handler_class()
-        retention = get_retention(handler.name)
-
-        if verbose:
-            print(f"Cleaning {handler.name} (retention: {retention})...")
-
-        try:
-            result = handler.cleanup(retention, dry_run=dry_run)
-            results.append(result)
-
-            if result.get("error"):
-                errors.append({
-                    "storage": handler.name,
-                    "error": result.get("error"),
-                })
+            return {"error": f"Unknown storage: {', '.join(memory_backends or [])}", "errors": errors}
+    if resuming and recently_ran:
+        # a full run isn't due yet: only finish off the interrupted backends
+        handlers_to_run = tuple(h for h in handlers_to_run if h.name in resumable)
+
+    budget = SweepBudget(
+        max_seconds if max_seconds is not None else get_cleanup_max_seconds(),
+        max_items if max_items is not None else get_cleanup_max_items(),
+    )
 
-            if verbose:
-                if result.get("skipped"):
-                    print(f"  Skipped: {result.get('reason')}")
-                elif result.get("dry_run"):
-                    print(f"  Would delete: {result.get('would_delete')} items")
-                else:
-                    print(f"  Deleted: {result.get('deleted')} items")
-        except Exception as e:
-            results.append({
-                "storage": handler.name,
-                "error": str(e),
-            })
+    # run cleanup for each handler in the list (i.e. each memory backend selected), concurrently
+    handlers = [handler_class() for handler_class in handlers_to_run]
+
+    # let handlers scan incrementally from their last watermarks (until a full scan is due)
+    watermarks = state.get("watermarks") or {}
+    full_scan_interval = parse_duration(get_cleanup_full_scan_interval())
+    for handler in handlers:
+        handler.watermark = _current_watermark(watermarks.get(handler.name), full_scan_interval)
+
+    # (cProfile & tracemalloc are process-wide, so profiled handlers run one at a time)
+    max_workers = get_cleanup_max_workers()
+    if profiler:
+        max_workers = 1
+        profiler.start()
+        for handler in handlers:
+            handler.profiler = profiler.for_handler(handler.name)
+
+    def clean(handler: "CleanupHandler") -> dict[str, Any]:
+        # (a timed-out handler isn't waited for: it keeps the next sweep out until it stops)
+        with keep_sweep_lock():
+            return handler.cleanup(get_retention(handler.name), dry_run=dry_run, budget=budget)
+
+    # report each backend's result to `sweep --status` as soon as it's in
+    status = None if dry_run else StatusRecorder()
+    if status:
+        status.start()
+
+    def report(handler: "CleanupHandler", result: dict[str, Any]) -> None:
+        if status:
+            status.backend_done(handler.name, result)
+
+    results = run_handlers(handlers, clean, max_workers, get_cleanup_handler_timeout(), report)
+
+    # report in handler order (whatever order they finished in)
+    for handler, result in zip(handlers, results):
+        if result.get("error"):
             errors.append({
                 "storage": handler.name,
-                "error": str(e),
+                "error": result.get("error"),
             })
-            if verbose:
-                print(f"  Error: {e}")
 
-    # empty expired trash (unless doing a dry run)
-    trash_result = {"trash_emptied": 0}
+        if verbose:
+            print(f"Cleaned {handler.name} (retention: {get_retention(handler.name)}):")
+            if result.get("error"):
+                print(f"  Error: {result.get('error')}")
+            elif result.get("skipped"):
+                print(f"  Skipped: {result.get('reason')}")
+            elif result.get("dry_run"):
+                print(f"  Would delete: {result.get('would_delete')} items")
+            else:
+                print(f"  Deleted: {result.get('deleted')} items"
+                      + (f" (stopped early: {result['stopped_early']})" if result.get("stopped_early") else ""))
+
+    # backends to resume next run: those stopped early, plus any interrupted ones not run this time
+    ran = {handler.name for handler in handlers}
+    stopped = {handler.name for handler, result in zip(handlers, results) if result.get("stopped_early")}
+    still_interrupted = [h.name for h in HANDLERS if h.name in stopped or (h.name in interrupted and h.name not in ran)]
+
+    # empty expired trash, then evict the oldest trash over its size caps (unless doing a dry run)
+    # (the trash is left for the next run if the time budget is already spent, or while a timed-out
+    #   backend may still be writing to it)
+    still_running = [r["storage"] for r in results if r.get("still_running")]
+    trash_result = {"trash_emptied": 0, "trash_evicted": 0, "trash_bytes_freed": 0}
+    sweep_metrics = PhaseMetrics(profiler.for_handler("sweep") if profiler else None)
     if not dry_run:
         grace_period = get_trash_grace_period()
-        deleted_count = empty_expired_trash(grace_period)
-        trash_result = {"trash_emptied": deleted_count}
+        if budget.out_of_time() or still_running:
+            expired = quota = {"evicted": 0, "removed": 0, "bytes_freed": 0}
+        else:
+            with sweep_metrics.phase("trash") as counts:
+                expired = empty_expired_trash(grace_period)
+                quota = enforce_trash_quota(get_trash_max_size(), get_trash_max_size_for(), get_trash_min_age())
+                counts["items"] = expired["removed"] + quota["removed"]
+        deleted_count = expired["removed"]
+        trash_result = {
+            "trash_emptied": deleted_count,
+            "trash_evicted": quota["removed"],
+            "trash_bytes_freed": expired["bytes_freed"] + quota["bytes_freed"],
+        }
 
         if verbose and deleted_count:
-            print(f"Emptied {deleted_count} items from trash (older than {grace_period})")
-
-        # update state
-        state_update = State({"last_cleanup_run": now_as_iso()})
-        if deleted_count:
+            print(f"Emptied {deleted_count} items from trash (older than {grace_period}, "
+                  f"{expired['bytes_freed']} bytes freed)")
+        if verbose and quota["evicted"]:
+            print(f"Evicted {quota['removed']} items from trash to stay under its size cap "
+                  f"({quota['bytes_freed']} bytes freed)")
+
+        # update state (a resumed run doesn't count as a full run)
+        state_update = State({"interrupted_backends": still_interrupted})
+        if not (resuming and recently_ran):
+            state_update["last_cleanup_run"] = now_as_iso()
+        new_watermarks = {h.name: r["watermark"] for h, r in zip(handlers, results) if r.get("watermark")}
+        if new_watermarks:
+            state_update["watermarks"] = {**watermarks, **new_watermarks}
+        new_footprints = {h.name: r["footprint"] for h, r in zip(handlers, results) if r.get("footprint")}
+        if new_footprints:
+            state_update["footprints"] = {**(state.get("footprints") or {}), **new_footprints}
+        succeeded = {h.name: now_as_iso() for h, r in zip(handlers, results) if not r.get("error") and not r.get("skipped")}
+        if succeeded:
+            state_update["last_success"] = {**(state.get("last_success") or {}), **succeeded}
+        if deleted_count or quota["evicted"]:
             state_update["last_trash_empty"] = now_as_iso()
         save_state(state_update)
 
-    return {
+    result = {
         "results": results,
         **trash_result,
         "dry_run": dry_run,
+        "stopped_early": sorted(stopped),
         "errors": errors,
+        "metrics": {
+            "seconds": round(time.perf_counter() - start, 6),
+            "process_peak_rss_bytes": process_peak_rss_bytes(),
+            **sweep_metrics.as_dict(),
+        },
+    }
+    if profiler:
+        result["profiles"] = [str(path) for path in profiler.finish()]
+    if status:
+        status.finish(result)
+    append_metrics_log(_metrics_record(started_at, result))
+    return result
+
+
+def _metrics_record(started_at: str, result: dict[str, Any]) -> dict[str, Any]:
+    """Summarise a sweep's result as a line of the metrics log (see metrics.py)."""
+    backends = {}
+    for r in result["results"]:
+        backend = {"phases": r.get("metrics", {})}
+        for key in ("deleted", "would_delete", "stopped_early", "error"):
+            if key in r:
+                backend[key] = r[key]
+        backends[r["storage"]] = backend
+    return {
+        "started_at": started_at,
+        "dry_run": result["dry_run"],
+        **result["metrics"],
+        "trash_emptied": result["trash_emptied"],
+        "trash_evicted": result["trash_evicted"],
+        "backends": backends,
     }
 
 
+def _export_metrics(path: Path | None, result: dict[str, Any]) -> None:
+    """Write a sweep's Prometheus metrics to `path`, if given (and the sweep actually cleaned up)."""
+    if path is None or result.get("skipped") or result.get("error") or result.get("dry_run"):
+        return
+    from .prometheus import export_metrics
+
+    try:
+        export_metrics(path, result)
+    except OSError as e:
+        print(f"Couldn't write metrics to {path}: {e}", file=sys.stderr)
+
+
+def _current_watermark(watermark: dict[str, Any] | None, full_scan_interval: timedelta) -> dict[str, Any] | None:
+    """Get a backend's watermark, unless a full scan is due (i.e. its last one was over full_scan_interval ago)."""
+    if not watermark:
+        return None
+    try:
+        full_scan_at = datetime.fromisoformat(watermark["full_scan_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return watermark if datetime.now(timezone.utc) - full_scan_at < full_scan_interval else None
+
+
+def _forget_watermarks(memory_backends: list[str]) -> None:
+    """Drop backends' watermarks (e.g. once wiped, as their rowids etc. may start over)."""
+    watermarks = load_state().get("watermarks") or {}
+    if any(name in watermarks for name in memory_backends):
+        save_state({"watermarks": {name: mark for name, mark in watermarks.items() if name not in memory_backends}})
+
+
 def wipe_memory_backends(
     memory_backends: list[str],
     backup: bool = True,
@@ -135,6 +324,8 @@ def wipe_memory_backends(
     Returns:
         Dict with results per storage
     """
+    from ..validate_config import full_validate
+
     config = get_config()
 
     # Validate configuration before wiping
@@ -186,11 +377,236 @@ def wipe_memory_backends(
             if verbose:
                 print(f"  Error: {e}")
 
+    _forget_watermarks([r["storage"] for r in results if not r.get("error")])
+
+    return {"results": results}
+
+
+def compact_memory_backends(
+    memory_backends: list[str],
+    verbose: bool = False,
+) -> dict:
+    """Compact the specified memory backend(s) in place (e.g. merge duplicate records).
+
+    Args:
+        memory_backends: List of memory backends to compact (e.g., ["memory-mcp"])
+        verbose: If True, print progress
+
+    Returns:
+        Dict with results per storage
+    """
+    results = []
+
+    # map storage names to handlers
+    handler_map = {h.name.replace("-", "_"): h for h in HANDLERS}
+
+    for storage in memory_backends:
+        handler_class = handler_map.get(storage.replace("-", "_"))
+
+        if not handler_class:
+            results.append({
+                "storage": storage,
+                "error": f"Unknown storage: {storage}",
+            })
+            continue
+
+        handler = handler_class()
+
+        if verbose:
+            print(f"Compacting {handler.name}...")
+
+        try:
+            result = handler.compact()
+            results.append(result)
+
+            if verbose and result.get("compacted"):
+                print(f"  Lines: {result['lines_before']} -> {result['lines_after']}")
+                print(f"  Size: {result['bytes_before']} -> {result['bytes_after']} bytes")
+        except Exception as e:
+            results.append({
+                "storage": handler.name,
+                "error": str(e),
+            })
+            if verbose:
+                print(f"  Error: {e}")
+
+    return {"results": results}
+
+
+def storage_stats(memory_backends: list[str] | None = None) -> dict:
+    """Report each memory backend's item count, age distribution (by week) & bytes on disk.
+
+    Handlers read their storage's cheapest source of statistics (see CleanupHandler._stats()),
+    concurrently, without taking the sweep lock (nothing is modified).
+
+    Args:
+        memory_backends: Memory backends to report on (default: all)
+
+    Returns:
+        Dict with results per storage and the 'seconds' taken
+    """
+    from .executor import run_handlers
+
+    start = time.perf_counter()
+    handler_map = {h.name.replace("-", "_"): h for h in HANDLERS}
+    requested = memory_backends or [h.name for h in HANDLERS]
+
+    unknown = [s for s in requested if s.replace("-", "_") not in handler_map]
+    handlers = [handler_map[s.replace("-", "_")]() for s in requested if s not in unknown]
+    results = run_handlers(handlers, lambda handler: handler.stats(), max_workers=get_cleanup_max_workers())
+    results += [{"storage": s, "error": f"Unknown storage: {s}"} for s in unknown]
+
+    return {"results": results, "seconds": time.perf_counter() - start}
+
+
+def _matches_text(item: dict[str, Any], text: str) -> bool:
+    """Check if a loaded trash item's id or content contains text (case-insensitively)."""
+    if item["data"] is not None:
+        content = json.dumps(item["data"], ensure_ascii=False, default=str)
+    elif item["raw"] is not None:
+        content = item["raw"].decode(errors="replace")
+    else:
+        content = Path(item["file"]).read_text(errors="replace")  # whole-file items (Serena)
+    return text.lower() in f"{item['native_id']}\n{content}".lower()
+
+
+def restore_memory_backends(
+    memory_backends: list[str],
+    native_ids: list[str] | None = None,
+    trashed_since: datetime | None = None,
+    trashed_until: datetime | None = None,
+    match: str | None = None,
+    dry_run: bool = False,
+    verbose: bool = False,
+) -> dict:
+    """Restore trashed items to the specified memory backend(s).
+
+    Items are located via the trash catalog (by id/name and trashed_at range), read
+    straight from their byte span in the trash files, optionally filtered by text,
+    then bulk re-inserted by each backend's handler. Restored items are removed from
+    the catalog so they can't be restored twice.
+
+    Args:
+        memory_backends: List of memory backends to restore to (e.g., ["claude-mem", "qdrant"])
+        native_ids: Only restore items with these ids/names
+        trashed_since: Only restore items trashed at or after this time
+        trashed_until: Only restore items trashed at or before this time
+        match: Only restore items whose id or content contains this text (case-insensitive)
+        dry_run: If True, only report what would be restored
+        verbose: If True, print progress
+
+    Returns:
+        Dict with results per storage
+    """
+    from .trash import find_trashed_items, forget_trashed_items, load_trashed_items
+
+    results: list[dict[str, Any]] = []
+
+    # map storage names to handlers
+    handler_map = {h.name.replace("-", "_"): h for h in HANDLERS}
+
+    for storage in memory_backends:
+        handler_class = handler_map.get(storage.replace("-", "_"))
+
+        if not handler_class:
+            results.append({
+                "storage": storage,
+                "error": f"Unknown storage: {storage}",
+            })
+            continue
+
+        handler = handler_class()
+
+        if verbose:
+            print(f"Restoring {handler.name}...")
+
+        try:
+            items = load_trashed_items(find_trashed_items(handler.name, native_ids, trashed_since, trashed_until))
+            if match:
+                items = [item for item in items if _matches_text(item, match)]
+
+            if dry_run:
+                results.append({
+                    "storage": handler.name,
+                    "would_restore": len(items),
+                    "dry_run": True,
+                    "items": [  # show first 10 items that *would have been* restored
+                        {key: item[key] for key in ("kind", "native_id", "created_at", "trashed_at")}
+                        for item in items[:10]
+                    ],
+                })
+                continue
+
+            if not items:
+                results.append({"storage": handler.name, "restored": 0, "message": "no matching items in trash"})
+                continue
+
+            result = handler.restore(items)
+            if not result.get("error"):
+                skipped = set(result.get("skipped", []))
+                forget_trashed_items(item for item in items if item["item_id"] not in skipped)
+                if result.get("restored"):
+                    # restored items may sit below the watermark (e.g. rows keeping their rowid)
+                    _forget_watermarks([handler.name])
+            results.append(result)
+
+            if verbose and not result.get("error"):
+                print(f"  Restored: {result['restored']} items")
+                if result.get("skipped"):
+                    print(f"  Skipped: {len(result['skipped'])} items (left in trash)")
+        except Exception as e:
+            results.append({
+                "storage": handler.name,
+                "error": str(e),
+            })
+            if verbose:
+                print(f"  Error: {e}")
+
     return {"results": results}
 
 
 # Entrypoint for cleanup CLI: called via `uv run sweep [args]`
+@contextmanager
+def _waiting_for_sweep(quiet: bool) -> Iterator[None]:
+    """Hold the sweep lock (e.g. while changing storage or the trash), first waiting for any running sweep."""
+    from .background import sweep_lock
+
+    with sweep_lock() as acquired:
+        if acquired:
+            yield
+            return
+    if not quiet:
+        print("Waiting for the running sweep to finish...", file=sys.stderr)
+    with sweep_lock(blocking=True):
+        yield
+
+
+def _print_status(status: dict[str, Any], running: bool) -> None:
+    """Print a summary of the running & last sweeps (from the sweep status file)."""
+    current, last = status.get("current"), status.get("last")
+    if current:
+        done = ", ".join(current.get("done", {})) or "none yet"
+        if running:
+            print(f"Sweep running (pid {current['pid']}, started {current['started_at']}); backends done: {done}")
+        else:
+            print(f"Sweep started {current['started_at']} (pid {current['pid']}) didn't finish; backends done: {done}")
+    elif running:
+        print("Sweep running")
+
+    if last:
+        result = last.get("result", {})
+        deleted = sum(r.get("deleted", 0) for r in result.get("results", []))
+        print(f"Last sweep finished {last['finished_at']}: {deleted} items trashed, "
+              f"{result.get('trash_emptied', 0)} purged from trash, {len(result.get('errors', []))} errors")
+        for err in result.get("errors", []):
+            print(f"  [{err.get('storage')}] {err.get('error')}")
+    elif not current and not running:
+        print("No sweep has run yet")
+
+
 def main():
+    from .profiling import MODES as PROFILE_MODES, SweepProfiler
+
     # Configure logging to stderr 
     # (so --quiet suppresses stdout but not errors)
     logging.basicConfig(
@@ -213,6 +629,18 @@ def main():
             raise argparse.ArgumentTypeError(f"Invalid storage letter(s): {', '.join(invalid)} (use any of q/c/s/m)")
         return [STORAGE_MAP[ch] for ch in letters]
 
+    def parse_time_selector(value: str) -> datetime:
+        # either a duration ago (e.g. "7d") or an ISO date/time (assumed UTC if naive)
+        try:
+            return datetime.now(timezone.utc) - parse_duration(value)
+        except (ValueError, OverflowError):
+            pass
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Invalid time: {value} (use a duration like '7d' or an ISO date/time)")
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
     parser = argparse.ArgumentParser(
         description="Bureau cleanup: remove old memories based on retention settings"
     )
@@ -232,6 +660,18 @@ def main():
         metavar="LETTERS",
         help="Clean specific storage services by letter: q=Qdrant, c=claude-mem, s=Serena, m=memory-mcp (e.g., -s smq)"
     )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        metavar="N",
+        help="Stop trashing stale items after N seconds, resuming on the next run (default: cleanup.max_seconds; 0 = no limit)"
+    )
+    parser.add_argument(
+        "--max-items",
+        type=int,
+        metavar="N",
+        help="Stop after trashing N stale items, resuming on the next run (default: cleanup.max_items; 0 = no limit)"
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -253,6 +693,43 @@ def main():
         metavar="STORAGE",
         help="Completely erase data from storage(s): claude-mem, serena, qdrant, memory-mcp"
     )
+    parser.add_argument(
+        "--compact",
+        nargs="+",
+        metavar="STORAGE",
+        help="Compact storage(s) in place, merging duplicate records: memory-mcp"
+    )
+    parser.add_argument(
+        "--restore",
+        nargs="+",
+        metavar="STORAGE",
+        help="Restore trashed items to storage(s): claude-mem, serena, qdrant, memory-mcp "
+             "(narrow down with --id/--since/--until/--match; preview with --dry-run)"
+    )
+    parser.add_argument(
+        "--id",
+        action="append",
+        dest="ids",
+        metavar="ID",
+        help="With --restore: only restore the item with this id/name (repeatable)"
+    )
+    parser.add_argument(
+        "--since",
+        type=parse_time_selector,
+        metavar="WHEN",
+        help="With --restore: only restore items trashed at/after WHEN (e.g. 2d, 2024-01-15)"
+    )
+    parser.add_argument(
+        "--until",
+        type=parse_time_selector,
+        metavar="WHEN",
+        help="With --restore: only restore items trashed at/before WHEN (e.g. 1d, 2024-01-16T12:00)"
+    )
+    parser.add_argument(
+        "--match",
+        metavar="TEXT",
+        help="With --restore: only restore items whose id or content contains TEXT (case-insensitive)"
+    )
     parser.add_argument(
         "--no-backup",
         action="store_true",
@@ -263,11 +740,58 @@ def main():
         action="store_true",
         help="Validate configuration and exit"
     )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="all",
+        choices=PROFILE_MODES,
+        help="Profile each backend's cleanup phases with cProfile (cpu), tracemalloc (mem) or both "
+             "(all, the default), writing reports to .archives/profiles/"
+    )
+    parser.add_argument(
+        "--profile-collapsed",
+        action="store_true",
+        help="With --profile: also sample call stacks into collapsed-stack files for flame graph tools"
+    )
+    parser.add_argument(
+        "--metrics-out",
+        type=Path,
+        metavar="PATH",
+        help="After each sweep (including with --background/--daemon), atomically write Prometheus "
+             "metrics to PATH (e.g. for node_exporter's textfile collector)"
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="Run the sweep in a detached background process and return immediately "
+             "(check on it with --status)"
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay resident, sweeping every cleanup.min_interval (with jitter) at low priority, "
+             "or early on storage pressure/SIGUSR1"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Show each storage's item count, age distribution (by week) and bytes on disk, "
+             "then exit (narrow down with -s)"
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Show the progress of any running sweep and the result of the last one"
+    )
 
     args = parser.parse_args()
+    if args.profile_collapsed and not args.profile:
+        parser.error("--profile-collapsed requires --profile")
 
     # if CLI arg set, validate config and exit
     if args.validate:
+        from ..validate_config import full_validate
+
         config = get_config()
         errors = full_validate(config)
         if errors:
@@ -278,20 +802,50 @@ def main():
         print("Configuration is valid.")
         return 0
 
+    # if CLI arg set, report on the running/last sweep and exit
+    if args.status:
+        from .background import is_sweep_running, read_status
+
+        status = read_status()
+        if args.verbose:
+            print(json.dumps({**status, "running": is_sweep_running()}, indent=2, default=str))
+        else:
+            _print_status(status, is_sweep_running())
+        return 0
+
+    # if CLI arg set, report on the storage backends' contents and exit
+    if args.stats:
+        from .stats import format_stats
+
+        result = storage_stats(args.storage)
+        errors = [r for r in result['results'] if r.get('error')]
+        if not args.quiet:
+            for e in errors:
+                print(f"Error ({e['storage']}): {e['error']}", file=sys.stderr)
+            if args.verbose:
+                print(json.dumps(result, indent=2, default=str))
+            else:
+                print(format_stats(result))
+        return 1 if errors else 0
+
     # if CLI arg set, empty existing trash contents immediately (bypass grace period)
     if args.empty_trash:
-        result = empty_all_trash()
+        from .trash import empty_all_trash
+
+        with _waiting_for_sweep(args.quiet):
+            result = empty_all_trash()
         if not args.quiet:
-            print(f"Emptied {result['emptied']} items from trash")
+            print(f"Emptied {result['emptied']} items from trash ({result['bytes_freed']} bytes freed)")
         return 0
 
     # if CLI arg set, wipe all data from specified storage(s)
     if args.wipe:
-        result = wipe_memory_backends(
-            memory_backends=args.wipe,
-            backup=not args.no_backup,
-            verbose=args.verbose and not args.quiet
-        )
+        with _waiting_for_sweep(args.quiet):
+            result = wipe_memory_backends(
+                memory_backends=args.wipe,
+                backup=not args.no_backup,
+                verbose=args.verbose and not args.quiet
+            )
 
         if not args.quiet:
             total_wiped = sum(r.get('wiped', 0) for r in result['results'])
@@ -302,13 +856,114 @@ def main():
                     print(f"Error ({e['storage']}): {e['error']}", file=sys.stderr)
                 return 1
             elif args.verbose:
-                import json
                 print(json.dumps(result, indent=2, default=str))
             else:
                 print(f"Wiped {total_wiped} items from {len(args.wipe)} storage(s)")
 
         return 0
 
+    # if CLI arg set, compact specified storage(s)
+    if args.compact:
+        with _waiting_for_sweep(args.quiet):
+            result = compact_memory_backends(
+                memory_backends=args.compact,
+                verbose=args.verbose and not args.quiet
+            )
+        errors = [r for r in result['results'] if r.get('error')]
+
+        if not args.quiet:
+            for e in errors:
+                print(f"Error ({e['storage']}): {e['error']}", file=sys.stderr)
+            if args.verbose:
+                print(json.dumps(result, indent=2, default=str))
+            else:
+                for r in result['results']:
+                    if r.get("compacted"):
+                        print(
+                            f"Compacted {r['storage']}: {r['lines_before']} -> {r['lines_after']} lines, "
+                            f"{r['bytes_before']} -> {r['bytes_after']} bytes ({r['bytes_saved']} saved)"
+                        )
+
+        return 1 if errors else 0
+
+    # if CLI arg set, restore trashed items to specified storage(s)
+    if args.restore:
+        with _waiting_for_sweep(args.quiet):
+            result = restore_memory_backends(
+                memory_backends=args.restore,
+                native_ids=args.ids,
+                trashed_since=args.since,
+                trashed_until=args.until,
+                match=args.match,
+                dry_run=args.dry_run,
+                verbose=args.verbose and not args.quiet
+            )
+        errors = [r for r in result['results'] if r.get('error')]
+
+        if not args.quiet:
+            for e in errors:
+                print(f"Error ({e['storage']}): {e['error']}", file=sys.stderr)
+            if args.verbose:
+                print(json.dumps(result, indent=2, default=str))
+            elif args.dry_run:
+                total = sum(r.get('would_restore', 0) for r in result['results'])
+                print(f"Would restore {total} items to {len(args.restore)} storage(s)")
+            else:
+                total = sum(r.get('restored', 0) for r in result['results'])
+                skipped = sum(len(r.get('skipped', [])) for r in result['results'])
+                print(f"Restored {total} items to {len(args.restore)} storage(s)"
+                      + (f" ({skipped} skipped, left in trash)" if skipped else ""))
+
+        return 1 if errors else 0
+
+    # if CLI arg set, hand the sweep to a detached worker (which gives way to any running sweep)
+    if args.background:
+        from .background import is_sweep_running, start_background
+
+        if is_sweep_running():
+            if not args.quiet:
+                print("A sweep is already running (see --status)")
+            return 0
+
+        def sweep_in_background() -> int:
+            result = run_cleanup(
+                force=args.force,
+                dry_run=args.dry_run,
+                memory_backends=args.storage,
+                max_seconds=args.max_seconds,
+                max_items=args.max_items,
+            )
+            _export_metrics(args.metrics_out, result)
+            return 1 if result.get("error") or result.get("errors") else 0
+
+        pid = start_background(sweep_in_background)
+        if not args.quiet:
+            print(f"Started background sweep (pid {pid}); check on it with --status")
+        return 0
+
+    # if CLI arg set, stay resident & sweep on a schedule (until SIGTERM/SIGINT)
+    if args.daemon:
+        from . import daemon
+
+        if not args.quiet:
+            logging.getLogger(daemon.__name__).setLevel(logging.INFO)
+
+        def sweep_for_daemon(force: bool) -> dict:
+            result = run_cleanup(
+                force=force,
+                memory_backends=args.storage,
+                max_seconds=args.max_seconds,
+                max_items=args.max_items,
+            )
+            _export_metrics(args.metrics_out, result)
+            return result
+
+        sweep_daemon = daemon.SweepDaemon(sweep_for_daemon, storages=args.storage)
+        sweep_daemon.install_signal_handlers()
+        daemon.lower_priority()
+        sweep_daemon.run_forever()
+        return 0
+
     # core cleanup orchestrator: 
     # - executes per-storage-backend handlers
     # - collects results
@@ -318,7 +973,11 @@ def main():
         dry_run=args.dry_run,
         memory_backends=args.storage,
         verbose=args.verbose and not args.quiet,
+        max_seconds=args.max_seconds,
+        max_items=args.max_items,
+        profiler=SweepProfiler(args.profile, collapsed=args.profile_collapsed) if args.profile else None,
     )
+    _export_metrics(args.metrics_out, result)
 
     # top-level error (e.g., unknown storage)
     if result.get("error"):
@@ -331,8 +990,9 @@ def main():
             print(result.get("reason"))
             return 0
         if args.verbose:
-            import json
             print(json.dumps(result, indent=2, default=str))
+        elif result.get("profiles"):
+            print(f"Wrote {len(result['profiles'])} profiles to {Path(result['profiles'][0]).parent}")
         if result.get("errors"):
             for err in result["errors"]:
                 print(f"[{err.get('storage')}] {err.get('error')}", file=sys.stderr)
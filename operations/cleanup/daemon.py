@@ -0,0 +1,204 @@
+"""Resident sweep scheduler (`sweep --daemon`).
+
+Rather than relying on open-bureau being run, the daemon sweeps every `cleanup.min_interval`
+(give or take JITTER, so several machines/daemons don't sweep in lockstep), at low CPU & I/O
+priority. It also sweeps early:
+
+- when storage crosses `cleanup.pressure_size` (checked every POLL_SECONDS)
+- on SIGUSR1
+- to resume backends a budget stopped before they were done (see core.run_cleanup())
+
+Config is reloaded whenever a config file changes (or on SIGHUP), without restarting.
+"""
+import logging
+import os
+import random
+import shutil
+import signal
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from ..config_loader import (
+    clear_config_cache,
+    find_repo_root,
+    get_cleanup_interval,
+    get_cleanup_pressure_size,
+    get_storage,
+    parse_duration,
+)
+from .state import load_state
+
+logger = logging.getLogger(__name__)
+
+# seconds between checks for config changes & storage pressure
+POLL_SECONDS = 60
+# each interval is randomly lengthened/shortened by up to this fraction
+JITTER = 0.1
+# niceness the daemon runs at
+NICENESS = 10
+
+CONFIG_FILENAMES = ("charter.yml", "directives.yml", "local.yml")
+
+
+def lower_priority() -> None:
+    """Run at low CPU priority (and, on Linux, idle I/O priority) so sweeps don't compete with agents."""
+    try:
+        os.nice(NICENESS)
+    except OSError as e:
+        logger.warning("Couldn't lower CPU priority: %s", e)
+
+    # ioprio_set() has no Python binding: use util-linux's ionice (best effort)
+    if sys.platform.startswith("linux") and (ionice := shutil.which("ionice")):
+        import subprocess
+
+        result = subprocess.run([ionice, "-c", "3", "-p", str(os.getpid())], capture_output=True, text=True)
+        if result.returncode:
+            logger.warning("Couldn't lower I/O priority: %s", result.stderr.strip())
+
+
+def storage_footprint() -> int:
+    """Get the combined size in bytes of the file-backed memory stores (claude-mem's DB & memory-mcp's JSONL)."""
+    total = 0
+    for path in (get_storage("claude_mem"), get_storage("memory_mcp")):
+        for file in (path, path.with_name(path.name + "-wal")):
+            try:
+                total += file.stat().st_size
+            except OSError:
+                continue
+    return total
+
+
+def _config_mtimes() -> dict[Path, float]:
+    """Get the modification times of the config files that exist."""
+    mtimes = {}
+    repo_root = find_repo_root()
+    for filename in CONFIG_FILENAMES:
+        try:
+            mtimes[repo_root / filename] = (repo_root / filename).stat().st_mtime
+        except OSError:
+            continue
+    return mtimes
+
+
+class SweepDaemon:
+    """Schedules sweeps until stopped.
+
+    Args:
+        sweep: Runs a sweep (forced, unless it's only resuming interrupted backends).
+        storages: The backends the sweeps are restricted to (`-s`), if any.
+    """
+
+    def __init__(self, sweep: Callable[[bool], dict[str, Any]], poll_seconds: float = POLL_SECONDS,
+                 storages: list[str] | None = None):
+        self.sweep = sweep
+        self.poll_seconds = poll_seconds
+        self.storages = {s.replace("-", "_") for s in storages} if storages else None
+        self.runs = 0
+        self._event = threading.Event()
+        self._stopping = False
+        self._woken = False
+        self._reload = False
+        self._over_pressure = False
+        self._jitter = random.uniform(-JITTER, JITTER)
+        self._config_mtimes = _config_mtimes()
+
+    def wake(self) -> None:
+        """Sweep as soon as possible."""
+        self._woken = True
+        self._event.set()
+
+    def reload(self) -> None:
+        """Reload config before the next check."""
+        self._reload = True
+        self._event.set()
+
+    def stop(self) -> None:
+        """Stop once any sweep in progress is done."""
+        self._stopping = True
+        self._event.set()
+
+    def install_signal_handlers(self) -> None:
+        """Sweep on SIGUSR1, reload config on SIGHUP & stop on SIGTERM/SIGINT (call from the main thread)."""
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.wake())
+        signal.signal(signal.SIGHUP, lambda signum, frame: self.reload())
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+
+    def next_due(self) -> datetime:
+        """Get when the next scheduled sweep is due (one jittered interval after the last)."""
+        now = datetime.now(timezone.utc)
+        last_run = load_state().get("last_cleanup_run")
+        if not last_run:
+            return now
+        try:
+            return datetime.fromisoformat(last_run) + parse_duration(get_cleanup_interval()) * (1 + self._jitter)
+        except (ValueError, TypeError, OverflowError):
+            return now
+
+    def _reload_config_if_changed(self) -> None:
+        mtimes = _config_mtimes()
+        if self._reload or mtimes != self._config_mtimes:
+            clear_config_cache()
+            self._config_mtimes = mtimes
+            self._reload = False
+            logger.info("Reloaded config")
+
+    def _pressure_crossed(self) -> bool:
+        """Check whether storage has grown past `cleanup.pressure_size` since the last check."""
+        threshold = get_cleanup_pressure_size()
+        if threshold is None:
+            return False
+        over = storage_footprint() >= threshold
+        crossed = over and not self._over_pressure
+        self._over_pressure = over
+        return crossed
+
+    def _due_reason(self) -> str | None:
+        """Get why a sweep should run now (None if it shouldn't)."""
+        if self._woken:
+            return "signal"
+        if self._pressure_crossed():
+            return "storage pressure"
+        # (only backends the sweeps would run: others are left for a sweep that selects them)
+        interrupted = load_state().get("interrupted_backends") or []
+        if any(self.storages is None or name.replace("-", "_") in self.storages for name in interrupted):
+            return "resume"
+        if datetime.now(timezone.utc) >= self.next_due():
+            return "schedule"
+        return None
+
+    def _run(self, reason: str) -> None:
+        self._woken = False
+        logger.info("Sweeping (%s)", reason)
+        try:
+            result = self.sweep(reason != "resume")
+        except Exception:
+            logger.exception("Sweep failed")
+            return
+        finally:
+            self.runs += 1
+            # each interval gets its own jitter
+            self._jitter = random.uniform(-JITTER, JITTER)
+        for err in result.get("errors", []):
+            logger.error("[%s] %s", err.get("storage"), err.get("error"))
+
+    def run_forever(self) -> None:
+        """Check for due sweeps every poll_seconds (or sooner, when one falls due/is requested) until stopped."""
+        while not self._stopping:
+            self._reload_config_if_changed()
+
+            ran = False
+            if reason := self._due_reason():
+                self._run(reason)
+                ran = True
+
+            # after a sweep, always wait a poll (e.g. should another sweep have held the lock)
+            timeout = self.poll_seconds
+            if not ran:
+                until_due = (self.next_due() - datetime.now(timezone.utc)).total_seconds()
+                timeout = max(0.0, min(timeout, until_due))
+            self._event.wait(timeout)
+            self._event.clear()
@@ -0,0 +1,110 @@
+"""Concurrent execution of memory backends' handlers.
+
+Each backend is bound by a different resource (Qdrant's HTTP API, the claude-mem SQLite file,
+the workspace file system, the Memory MCP JSONL file), so running their handlers in a thread
+pool makes a sweep take about as long as its slowest backend rather than the sum of all of them.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Sequence
+
+from .handlers.base import CleanupHandler
+
+logger = logging.getLogger(__name__)
+
+# how often to check on handlers still queued for a worker (i.e. whose timeout hasn't started)
+_POLL_SECONDS = 0.1
+
+
+def run_handlers(
+    handlers: Sequence[CleanupHandler],
+    run: Callable[[CleanupHandler], dict[str, Any]],
+    max_workers: int = 4,
+    timeout: float | None = None,
+    on_done: Callable[[CleanupHandler, dict[str, Any]], None] | None = None,
+) -> list[dict[str, Any]]:
+    """Call run(handler) for each handler in a bounded thread pool.
+
+    A handler still running `timeout` seconds after it started is timed out: it's reported as
+    an error straight away (to on_done) and cancelled (see CleanupHandler.cancel()), and the
+    other handlers carry on. Exceptions escaping run() are reported as errors too.
+
+    A running thread can't be killed, and a stuck handler may never reach its next cancellation
+    check, so this doesn't wait for timed-out handlers to stop: their results are marked
+    'still_running' (if they hadn't stopped by the time the others were done), so the caller
+    can leave alone what they may still be writing to (e.g. the trash).
+
+    Args:
+        on_done: Called (from the calling thread) with each handler & its result as soon as
+            it's known, e.g. to report progress.
+
+    Returns:
+        Each handler's result dict, in the order of `handlers` (whatever order they finish in).
+    """
+    results: list[dict[str, Any] | None] = [None] * len(handlers)
+    started: dict[int, float] = {}
+
+    def call(i: int) -> dict[str, Any]:
+        started[i] = time.monotonic()
+        return run(handlers[i])
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(handlers) or 1)),
+                              thread_name_prefix="sweep")
+    futures: dict[Future, int] = {pool.submit(call, i): i for i in range(len(handlers))}
+    pending = set(futures)
+    try:
+        while pending:
+            wait_for: float | None = None
+            if timeout is not None:
+                now = time.monotonic()
+                for future in list(pending):
+                    i = futures[future]
+                    if i not in started:
+                        wait_for = _POLL_SECONDS if wait_for is None else min(wait_for, _POLL_SECONDS)
+                        continue
+                    remaining = started[i] + timeout - now
+                    if remaining > 0 or future.done():
+                        wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                        continue
+
+                    # timed out: report it now, and ask it to stop (it isn't waited for)
+                    handlers[i].cancel()
+                    pending.discard(future)
+                    result = {"storage": handlers[i].name, "error": f"timed out after {timeout:g}s"}
+                    results[i] = result
+                    logger.error("%s cleanup timed out after %gs", handlers[i].name, timeout)
+                    if on_done:
+                        on_done(handlers[i], result)
+                if not pending:
+                    break
+
+            done, _ = wait(pending, timeout=max(wait_for, 0) if wait_for is not None else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures[future]
+                pending.discard(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"storage": handlers[i].name, "error": str(e)}
+                results[i] = result
+                if on_done:
+                    on_done(handlers[i], result)
+    except BaseException:
+        # (e.g. KeyboardInterrupt: stop every handler at its next cancellation check)
+        for handler in handlers:
+            handler.cancel()
+        raise
+    finally:
+        # don't start any handler still queued, nor wait for the running ones (i.e. timed-out
+        #   handlers, unless interrupted): they're cancelled, so stop once they get the chance
+        still_running = [i for future, i in futures.items() if future.running()]
+        for i in still_running:
+            if (timed_out := results[i]) is not None:
+                timed_out["still_running"] = True
+        if still_running:
+            logger.warning("Not waiting for %s to stop", ", ".join(handlers[i].name for i in still_running))
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return [result for result in results if result is not None]
@@ -1,18 +1,76 @@
-"""Cleanup handlers specific to each memory backend."""
-from .base import CleanupHandler, CleanupError
-from .qdrant import QdrantHandler
-from .claude_mem import ClaudeMemHandler
-from .serena import SerenaHandler
-from .memory_mcp import MemoryMcpHandler
-
-
-# register memory backends' handler classes
-HANDLERS = (
-    ClaudeMemHandler,
-    SerenaHandler,
-    QdrantHandler,
-    MemoryMcpHandler,
-)
+"""Cleanup handlers specific to each memory backend.
+
+Handler modules are imported on first use (e.g. when HANDLERS is first iterated), as is the
+base class (CleanupHandler, CleanupError), so importing the package doesn't pay for every
+backend's dependencies, nor the base class's.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Iterator, Sequence, overload
+
+if TYPE_CHECKING:
+    from .base import CleanupHandler, CleanupError
+    from .qdrant import QdrantHandler
+    from .claude_mem import ClaudeMemHandler
+    from .serena import SerenaHandler
+    from .memory_mcp import MemoryMcpHandler
+
+
+# register memory backends' handler classes (by module), in the order sweeps run them
+_HANDLER_MODULES = {
+    "ClaudeMemHandler": ".claude_mem",
+    "SerenaHandler": ".serena",
+    "QdrantHandler": ".qdrant",
+    "MemoryMcpHandler": ".memory_mcp",
+}
+
+
+# names imported from the base module on first access
+_BASE_NAMES = ("CleanupHandler", "CleanupError")
+
+
+def _load_handler(class_name: str) -> "type[CleanupHandler]":
+    return getattr(import_module(_HANDLER_MODULES[class_name], __name__), class_name)
+
+
+class _HandlerRegistry(Sequence["type[CleanupHandler]"]):
+    """The registered handler classes, importing their modules the first time it's used."""
+
+    def __init__(self) -> None:
+        self._classes: "tuple[type[CleanupHandler], ...] | None" = None
+
+    def _load(self) -> "tuple[type[CleanupHandler], ...]":
+        if self._classes is None:
+            self._classes = tuple(_load_handler(class_name) for class_name in _HANDLER_MODULES)
+        return self._classes
+
+    @overload
+    def __getitem__(self, index: int) -> "type[CleanupHandler]": ...
+    @overload
+    def __getitem__(self, index: slice) -> "Sequence[type[CleanupHandler]]": ...
+
+    def __getitem__(self, index: int | slice) -> "type[CleanupHandler] | Sequence[type[CleanupHandler]]":
+        return self._load()[index]
+
+    def __iter__(self) -> "Iterator[type[CleanupHandler]]":
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(_HANDLER_MODULES)
+
+    def __repr__(self) -> str:
+        return repr(self._load())
+
+
+HANDLERS: "Sequence[type[CleanupHandler]]" = _HandlerRegistry()
+
+
+def __getattr__(name: str) -> Any:
+    """Import the base class & error, or a handler class (e.g. QdrantHandler), when first accessed."""
+    if name in _BASE_NAMES:
+        return getattr(import_module(".base", __name__), name)
+    if name not in _HANDLER_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _load_handler(name)
 
 
 __all__ = [
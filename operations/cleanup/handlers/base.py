@@ -1,10 +1,15 @@
 """Abstract base class for storage cleanup handlers."""
 import logging
+import threading
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterator
 
-from ...config_loader import parse_duration, get_retention
+from ..budget import SweepBudget
+from ..metrics import PhaseMetrics
+from ..profiling import HandlerProfiler
+from ..stats import AgeHistogram
+from ...config_loader import get_cleanup_batch_size, get_retention, parse_duration
 
 logger = logging.getLogger(__name__)
 
@@ -22,18 +27,94 @@ class CleanupError(Exception):
 
 
 class CleanupHandler(ABC):
-    """Abstract base class for storage backend-specific cleanup handlers."""
+    """Abstract base class for storage backend-specific cleanup handlers.
+
+    Stale items are found in bounded batches (see iter_stale_batches()), each exported
+    to the trash and deleted from storage before the next is fetched. Subclasses provide
+    either iter_stale_batches() (to stream them) or get_stale_items() (to return them all
+    at once, which the default iter_stale_batches() then splits up).
+
+    Handlers may also scan incrementally: given the watermark left by their last complete
+    cleanup (its cutoff, plus whatever _scan_position() recorded), only items that crossed
+    the cutoff since, or were added since, can be newly stale.
+    """
 
     name: str  # e.g. "qdrant", "claude-mem"
 
-    def _return_error_dict(self, e: CleanupError, action: str) -> dict[str, str]: 
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+        # watermark left by the last complete cleanup (None for a full scan), set by the orchestrator
+        self.watermark: dict[str, Any] | None = None
+        # measurements of the last cleanup()'s phases, and what profiles them (with `sweep --profile`)
+        self.metrics = PhaseMetrics()
+        self.profiler: HandlerProfiler | None = None
+
+    def cancel(self) -> None:
+        """Ask a running cleanup (e.g. one that timed out) to stop before it trashes another batch.
+
+        Cancellation is cooperative: it takes effect between batches, so a cleanup is never
+        interrupted between exporting a batch to the trash and deleting it from storage.
+        """
+        self._cancelled.set()
+
+    def _scan_position(self) -> dict[str, Any] | None:
+        """Handler-specific position the last iter_stale_batches() scan reached (e.g. the highest
+        rowid it checked), to record in the next watermark.
+
+        Returns:
+            None if the handler doesn't scan incrementally (the default).
+        """
+        return None
+
+    def _footprint(self, dry_run: bool) -> dict[str, int] | None:
+        """Items ("items") and on-disk bytes ("bytes") the storage holds once a complete cleanup
+        is done, from what its scan saw or cheap metadata (never another scan of the items).
+
+        Either key may be left out if it can't be had cheaply.
+
+        Returns:
+            None if the handler doesn't report a footprint (the default).
+
+        Raises:
+            CleanupError: On any recoverable error.
+        """
+        return None
+
+    def _after_cleanup(self) -> None:
+        """Hook run once a cleanup has deleted every batch (e.g. to reclaim the freed space).
+
+        Raises:
+            CleanupError: On any recoverable error.
+        """
+        pass
+
+    def _return_error_dict(self, e: CleanupError, action: str) -> dict[str, Any]: 
         logger.error("%s %s failed: %s", self.name, action, e)
         return {"storage": self.name, "error": str(e)}
 
-    @abstractmethod
     def get_stale_items(self, cutoff: datetime) -> list[dict[str, Any]]:
-        """Return items older than cutoff with id/path and metadata."""
-        pass
+        """Return items older than cutoff with id/path and metadata.
+
+        By default, this collects every batch from iter_stale_batches().
+        """
+        if type(self).iter_stale_batches is CleanupHandler.iter_stale_batches:
+            raise NotImplementedError(f"{type(self).__name__} must implement get_stale_items() or iter_stale_batches()")
+        return [item for batch in self.iter_stale_batches(cutoff) for item in batch]
+
+    def iter_stale_batches(self, cutoff: datetime, batch_size: int | None = None) -> Iterator[list[dict[str, Any]]]:
+        """Yield items older than cutoff in batches of at most batch_size items (default `cleanup.batch_size`).
+
+        Each batch is trashed and deleted from storage before the next one is requested, so
+        streaming implementations must tolerate the items they've already yielded disappearing.
+
+        By default, this splits up the full list returned by get_stale_items().
+        """
+        if type(self).get_stale_items is CleanupHandler.get_stale_items:
+            raise NotImplementedError(f"{type(self).__name__} must implement get_stale_items() or iter_stale_batches()")
+        batch_size = batch_size or get_cleanup_batch_size()
+        items = self.get_stale_items(cutoff)
+        for start in range(0, len(items), batch_size):
+            yield items[start:start + batch_size]
 
     @abstractmethod
     def export_items_to_trash(self, items: list[dict[str, Any]], retention: str) -> str:
@@ -76,6 +157,97 @@ class CleanupHandler(ABC):
         except CleanupError as e:
             return self._return_error_dict(e, "wipe")
 
+    @abstractmethod
+    def _restore(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Internal, handler-specific restore implementation to be provided by subclasses.
+
+        Args:
+            items: Trashed items loaded via trash.load_trashed_items(), i.e. catalog rows
+                plus each one's "raw" record bytes and decoded "data".
+
+        Returns:
+            Dict with 'storage', 'restored' count, and 'skipped' (item ids that
+            couldn't be restored, which are left in the trash).
+
+        Raises:
+            CleanupError: On any recoverable error.
+        """
+        pass
+
+    def restore(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        """Re-insert trashed items into storage, with error handling.
+
+        Returns:
+            Dict with 'storage', 'restored' count and 'skipped' item ids.
+            On error, returns dict with 'storage' and 'error'.
+        """
+        try:
+            return self._restore(items)
+        except CleanupError as e:
+            return self._return_error_dict(e, "restore")
+
+    def _compact(self) -> dict[str, Any]:
+        """
+        Internal, handler-specific compaction (e.g. merging duplicate records) to be
+        provided by subclasses whose storage supports it.
+
+        Returns:
+            Dict with 'storage' and compaction stats.
+
+        Raises:
+            CleanupError: On any recoverable error, or if compaction isn't supported.
+        """
+        raise CleanupError(f"compaction is not supported for {self.name}")
+
+    def compact(self) -> dict[str, Any]:
+        """Compact storage in place, with error handling.
+
+        Returns:
+            Dict with 'storage' and compaction stats.
+            On error, returns dict with 'storage' and 'error'.
+        """
+        try:
+            return self._compact()
+        except CleanupError as e:
+            return self._return_error_dict(e, "compact")
+
+    def _stats(self) -> dict[str, Any]:
+        """
+        Internal, handler-specific statistics to be provided by subclasses, gathered from the
+        cheapest source the storage offers (e.g. its metadata or an index) rather than a scan.
+
+        Returns:
+            Dict with 'storage', 'items', 'age_histogram' (see stats.AgeHistogram.as_dict()),
+            'undated' and, if it can be had cheaply, on-disk 'bytes'.
+
+        Raises:
+            CleanupError: On any recoverable error, or if statistics aren't supported.
+        """
+        raise CleanupError(f"stats are not supported for {self.name}")
+
+    def stats(self) -> dict[str, Any]:
+        """Report the storage's item count, age distribution & size, with error handling.
+
+        Returns:
+            Dict with 'storage', 'items', 'age_histogram', 'undated' and 'bytes'.
+            On error, returns dict with 'storage' and 'error'.
+        """
+        try:
+            return self._stats()
+        except CleanupError as e:
+            return self._return_error_dict(e, "stats")
+
+    def _stats_result(self, histogram: AgeHistogram, **extra: int) -> dict[str, Any]:
+        """Build a _stats() result from the histogram of every item's age."""
+        return {
+            "storage": self.name,
+            "items": histogram.total(),
+            "age_histogram": histogram.as_dict(),
+            "undated": histogram.undated,
+            **extra,
+        }
+
     def get_cutoff(self, retention: str) -> datetime:
         """Calculate cutoff datetime from retention period."""
         delta = parse_duration(retention)
@@ -85,54 +257,142 @@ class CleanupHandler(ABC):
             return datetime.min.replace(tzinfo=timezone.utc)
         return datetime.now(timezone.utc) - delta
 
-    def cleanup(self, retention: str | None = None, dry_run: bool = False) -> dict[str, Any]:
+    def cleanup(
+        self,
+        retention: str | None = None,
+        dry_run: bool = False,
+        budget: SweepBudget | None = None,
+    ) -> dict[str, Any]:
         """Runs cleanup for the given storage backend and returns stats.
 
+        Args:
+            budget: Time/item budget shared with the sweep's other handlers, checked between
+                batches (ignored in dry runs).
+
         Returns:
-            Dict with 'storage' and cleanup results.
-            On error, returns dict with 'storage' and 'error'.
+            Dict with 'storage' and cleanup results ('stopped_early' says why, if the budget
+            ran out before every stale item was trashed), plus per-phase 'metrics' (see metrics.py)
+            and, once complete, the storage's 'footprint' (see _footprint()).
+            On error, returns dict with 'storage' and 'error' (plus the 'metrics' of the phases run).
         """
+        self.metrics = PhaseMetrics(self.profiler)
         try:
-            if retention is None:
-                # retrieve retention period for the given storage backend
-                retention = get_retention(self.name)
+            result = self._cleanup(retention, dry_run, budget)
+        except CleanupError as e:
+            result = self._return_error_dict(e, "cleanup")
+        else:
+            if not result.get("skipped") and not result.get("stopped_early"):
+                # (the cleanup itself succeeded, so a footprint that can't be had is just left out)
+                try:
+                    if (footprint := self._footprint(dry_run)) is not None:
+                        result["footprint"] = footprint
+                except CleanupError as e:
+                    logger.warning("%s footprint unavailable: %s", self.name, e)
+        if self.metrics.phases:
+            result["metrics"] = self.metrics.as_dict()
+        return result
+
+    def _cleanup(self, retention: str | None, dry_run: bool, budget: SweepBudget | None) -> dict[str, Any]:
+        """Run cleanup(), measuring each phase in self.metrics.
+
+        Raises:
+            CleanupError: On any recoverable error.
+        """
+        if retention is None:
+            # retrieve retention period for the given storage backend
+            retention = get_retention(self.name)
 
-            if retention.lower() == "always":
-                # memories are set to always be kept for the given storage backend
-                return {
-                    "storage": self.name,
-                    "skipped": True,
-                    "reason": "retention set to 'always'"
-                }
+        if retention.lower() == "always":
+            # memories are set to always be kept for the given storage backend
+            return {
+                "storage": self.name,
+                "skipped": True,
+                "reason": "retention set to 'always'"
+            }
+
+        if budget is not None and not dry_run and budget.out_of_time():
+            return {"storage": self.name, "deleted": 0, "stopped_early": budget.exhausted_reason()}
 
-            cutoff = self.get_cutoff(retention)
-            items = self.get_stale_items(cutoff)
+        cutoff = self.get_cutoff(retention)
+        found = deleted = batches = 0
+        preview: list[dict[str, Any]] = []
+        trash_path = None
+        stopped_early = None
 
+        for items in self.metrics.iter_phase("scan", self.iter_stale_batches(cutoff)):
             if not items:
-                return {
-                    "storage": self.name,
-                    "deleted": 0,
-                    "message": "no expired items"
-                }
+                continue
+
+            if budget is not None and not dry_run:
+                # only trash as many items as the budget has left
+                items = items[:budget.take(len(items))]
+                if not items:
+                    stopped_early = budget.exhausted_reason()
+                    break
+            found += len(items)
 
             if dry_run:
-                return {
-                    "storage": self.name,
-                    "would_delete": len(items),
-                    "dry_run": True,
-                    "items": items[:10],  # show first 10 items that *would have been* deleted
-                }
-
-            # write *new* files for the deleted items to the trash
+                # show first 10 items that *would have been* deleted
+                preview.extend(items[:10 - len(preview)])
+                continue
+
+            if self._cancelled.is_set():
+                raise CleanupError(f"cancelled after trashing {deleted} items")
+
+            # write *new* files for the batch's items to the trash
             # (to be kept for the specified grace period)
-            trash_path = self.export_items_to_trash(items, retention)
+            with self.metrics.phase("export", len(items)):
+                trash_path = self.export_items_to_trash(items, retention)
 
-            count = self.delete_items_from_storage(items)
+            with self.metrics.phase("delete", len(items)):
+                deleted += self.delete_items_from_storage(items)
+            batches += 1
 
+            if budget is not None and (stopped_early := budget.exhausted_reason()):
+                break
+
+        if deleted:
+            with self.metrics.phase("finalize"):
+                self._after_cleanup()
+
+        if stopped_early:
             return {
                 "storage": self.name,
-                "deleted": count,
+                "deleted": deleted,
                 "trash_path": trash_path,
+                "batches": batches,
+                "stopped_early": stopped_early,
             }
-        except CleanupError as e:
-            return self._return_error_dict(e, "cleanup")
+
+        # every item stale as of the cutoff is gone: record how far the scan got
+        watermark = None
+        if not dry_run and (position := self._scan_position()) is not None:
+            watermark = {
+                "cutoff": cutoff.isoformat(),
+                "full_scan_at": (self.watermark or {}).get("full_scan_at") or datetime.now(timezone.utc).isoformat(),
+                **position,
+            }
+
+        if not found:
+            result: dict[str, Any] = {
+                "storage": self.name,
+                "deleted": 0,
+                "message": "no expired items"
+            }
+            return {**result, "watermark": watermark} if watermark else result
+
+        if dry_run:
+            return {
+                "storage": self.name,
+                "would_delete": found,
+                "dry_run": True,
+                "items": preview,
+            }
+
+        result = {
+            "storage": self.name,
+            "deleted": deleted,
+            "trash_path": trash_path,  # the last batch's
+            "batches": batches,
+        }
+        return {**result, "watermark": watermark} if watermark else result
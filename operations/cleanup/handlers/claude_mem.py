@@ -2,11 +2,30 @@
 import json
 import sqlite3
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterator
 
 from .base import CleanupHandler, CleanupError
-from ..trash import get_trash_dir, generate_trash_filename, write_manifest
-from ...config_loader import get_storage, get_trash_grace_period
+from ..catalog import TrashedItem
+from ..compression import compressed_path
+from ..stats import AgeHistogram
+from ..trash import (
+    export_blobs,
+    get_trash_dir,
+    generate_trash_filename,
+    record_trashed_items,
+    write_export,
+    write_manifest,
+)
+from ...config_loader import get_cleanup_batch_size, get_storage, get_trash_grace_period
+
+
+# ids per DELETE statement (SQLite's default limit on bound parameters was 999 before 3.32)
+MAX_SQL_PARAMS = 900
+
+
+def _format_cutoff(cutoff: datetime) -> str:
+    """Format a staleness cutoff with Z suffix to match stored ISO format produced by toISOString() in claude-mem."""
+    return cutoff.strftime("%Y-%m-%dT%H:%M:%S.") + f"{cutoff.microsecond // 1000:03d}Z"
 
 
 class ClaudeMemHandler(CleanupHandler):
@@ -15,30 +34,48 @@ class ClaudeMemHandler(CleanupHandler):
     name = "claude-mem"
     entity_types = ["session", "observation"]
 
+    def __init__(self) -> None:
+        super().__init__()
+        # highest rowid of each table the last scan checked (see _scan_position())
+        self._max_rowids: dict[str, int] = {}
+
     def _table_name_for_entity_type(self, entity_type : str):
         # note "session_summaries" is the table name used by claude-mem v4+ to store session summaries
         #   (previously "sessions")
         return "session_summaries" if entity_type == "session" else "observations"
 
+    def _entity_type_for_table(self, table_name: str) -> str:
+        # tables other than those of the known entity types are exported under their own name
+        for entity_type in self.entity_types:
+            if self._table_name_for_entity_type(entity_type) == table_name:
+                return entity_type
+        return table_name
+
     def _get_db_connection(self) -> sqlite3.Connection | None:
         """Get SQLite connection if database exists."""
         db_path = get_storage("claude_mem")
         return sqlite3.connect(db_path) if db_path.exists() else None
 
-    def get_stale_items(self, cutoff: datetime) -> list[dict[str, Any]]:
-        """Retrieve stale sessions and observations (relative to provided cutoff).
+    def iter_stale_batches(self, cutoff: datetime, batch_size: int | None = None) -> Iterator[list[dict[str, Any]]]:
+        """Yield stale sessions, then stale observations (relative to provided cutoff), batch_size at a time.
+
+        Each batch is a fresh query resuming after the last rowid seen (so no cursor is held open
+        while the batch is trashed & deleted, and rows deleted meanwhile don't shift the next batch).
+
+        Given a watermark, rows older than its cutoff are only checked if they were inserted
+        since (i.e. past its max rowid, e.g. restored rows): any others were already trashed.
 
         Raises:
             CleanupError: On database errors (locked, corrupt, etc.).
         """
+        batch_size = batch_size or get_cleanup_batch_size()
+        self._max_rowids = {}
         conn = self._get_db_connection()
         if not conn:
-            return []
+            return
 
-        stale_items = []
-
-        # format staleness cutoff with Z suffix to match stored ISO format produced by toISOString() in claude-mem
-        cutoff_str = cutoff.strftime("%Y-%m-%dT%H:%M:%S.") + f"{cutoff.microsecond // 1000:03d}Z"
+        cutoff_str = _format_cutoff(cutoff)
+        watermark = self.watermark or {}
 
         try:
             cursor = conn.cursor()
@@ -54,65 +91,104 @@ class ClaudeMemHandler(CleanupHandler):
                 if table_name not in tables:
                     continue
 
-                # filter stale records
-                cursor.execute(
-                    f"SELECT * FROM {table_name} WHERE created_at < ?",
-                    (cutoff_str,)
-                )
-
-                # extract list of column names from table
-                columns = [desc[0] for desc in cursor.description]
-
-                for row in cursor.fetchall():
-                    stale_items.append({
-                        "type": entity_type,
-                        "table": table_name,
-                        "data": dict(zip(columns, row)),  # creates tuples of (column name, value)
-                    })
+                # rows inserted once the scan has started are left for the next one
+                cursor.execute(f"SELECT MAX(rowid) FROM {table_name}")
+                max_rowid = cursor.fetchone()[0] or 0
+                self._max_rowids[table_name] = max_rowid
+
+                # only rows newly past the cutoff, or inserted since, can be newly stale
+                #   (unless rowids went backwards, e.g. after a wipe: then every row is checked)
+                checked_rowid = watermark.get("max_rowid", {}).get(table_name)
+                if "cutoff" in watermark and checked_rowid is not None and checked_rowid <= max_rowid:
+                    floor_str = _format_cutoff(datetime.fromisoformat(watermark["cutoff"]))
+                else:
+                    floor_str, checked_rowid = "", 0
+
+                last_rowid = 0
+                while True:
+                    # filter stale records (the next batch of them)
+                    cursor.execute(
+                        f"SELECT rowid, * FROM {table_name} "
+                        f"WHERE created_at < ? AND (created_at >= ? OR rowid > ?) AND rowid > ? AND rowid <= ? "
+                        f"ORDER BY rowid LIMIT ?",
+                        (cutoff_str, floor_str, checked_rowid, last_rowid, max_rowid, batch_size)
+                    )
+
+                    # extract list of column names from table
+                    columns = [desc[0] for desc in cursor.description[1:]]
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+
+                    last_rowid = rows[-1][0]
+                    yield [
+                        {
+                            "type": entity_type,
+                            "table": table_name,
+                            "data": dict(zip(columns, row[1:])),  # creates tuples of (column name, value)
+                        }
+                        for row in rows
+                    ]
 
         except sqlite3.Error as e:
             raise CleanupError(f"SQLite query failed: {e}") from e
         finally:
             conn.close()
 
-        return stale_items
+    def _scan_position(self) -> dict[str, Any] | None:
+        """Record the highest rowid of each table the last scan checked."""
+        return {"max_rowid": dict(self._max_rowids)}
 
     def export_items_to_trash(self, items: list[dict[str, Any]], retention: str) -> str:
-        """Export items to a new JSON file in trash directory."""
+        """Export items to a new JSON file in trash directory, recording each one in the trash catalog."""
         trash_dir = get_trash_dir(self.name)
 
-        # triage items to export by entity type, preserving only their "data" field
-        items_by_entity_type = {}
-        for entity_type in self.entity_types:
-            items_by_entity_type[entity_type] = [item["data"] for item in items if item["type"] == entity_type]
-
-        trash_file_json = {
+        # triage items to export by entity type (into "sessions", "observations", then any other
+        #   tables backed up by a wipe), preserving only their "data" field
+        sections: dict[str, list[dict[str, Any]]] = {"sessions": [], "observations": []}
+        section_types: dict[str, str] = {"sessions": "session", "observations": "observation"}
+        for item in items:
+            entity_type = item["type"]
+            section = f"{entity_type}s" if entity_type in self.entity_types else item["table"]
+            sections.setdefault(section, []).append(item["data"])
+            section_types[section] = entity_type
+
+        header = {
             "exported_at": datetime.now(timezone.utc).isoformat(),
-            "sessions": items_by_entity_type["session"],
-            "observations": items_by_entity_type["observation"],
-            "counts": {
-                "sessions": len(items_by_entity_type["session"]),
-                "observations": len(items_by_entity_type["observation"]),
-            },
+            "counts": {section: len(records) for section, records in sections.items()},
         }
 
         # write deleted items' data to new file in the trash folder for claude-mem
         filename = generate_trash_filename(len(items), "json")
-        trash_path = trash_dir / filename
-        with open(trash_path, "w") as f:
-            json.dump(trash_file_json, f, indent=2, default=str)
-
-        write_manifest(trash_dir, 
-                       self.name, 
-                       len(items), 
-                       retention,
-                       get_trash_grace_period(),
-                       files=[trash_path])
+        trash_path = compressed_path(trash_dir / filename)
+        spans = write_export(trash_path, header, sections)
+
+        batch_id = write_manifest(trash_dir,
+                                  self.name,
+                                  len(items),
+                                  retention,
+                                  get_trash_grace_period(),
+                                  files=[trash_path],
+                                  blobs=export_blobs(spans))
+
+        trashed: list[TrashedItem] = [
+            {
+                "kind": section_types[section],
+                "native_id": str(data["id"]) if data.get("id") is not None else None,
+                "created_at": data.get("created_at"),
+                "file": span.file,
+                "offset": span.offset,
+                "length": span.length,
+            }
+            for section, records in sections.items()
+            for data, span in zip(records, spans[section])
+        ]
+        record_trashed_items(trash_dir, batch_id, trashed)
 
         return str(trash_path)
 
     def delete_items_from_storage(self, items: list[dict[str, Any]]) -> int:
-        """Delete items from SQLite, then vacuum the database (to make the freed space available to the OS).
+        """Delete items from SQLite (the database is vacuumed once all batches are deleted, see _after_cleanup()).
 
         Raises:
             CleanupError: On database errors (locked, corrupt, etc.).
@@ -136,16 +212,16 @@ class ClaudeMemHandler(CleanupHandler):
                 if not ids:
                     continue
 
-                placeholders = ",".join("?" * len(ids))
                 table_name = self._table_name_for_entity_type(entity_type)
-                cursor.execute(f"DELETE FROM {table_name} WHERE id IN ({placeholders})", ids)
-                deleted += cursor.rowcount
+                # (in chunks, to stay under SQLite's limit on bound parameters)
+                for start in range(0, len(ids), MAX_SQL_PARAMS):
+                    chunk = ids[start:start + MAX_SQL_PARAMS]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(f"DELETE FROM {table_name} WHERE id IN ({placeholders})", chunk)
+                    deleted += cursor.rowcount
 
             conn.commit()
 
-            # vacuum to immediately hand back freed space to OS
-            cursor.execute("VACUUM")
-
         except sqlite3.Error as e:
             raise CleanupError(f"SQLite delete failed: {e}") from e
         finally:
@@ -153,6 +229,153 @@ class ClaudeMemHandler(CleanupHandler):
 
         return deleted
 
+    def _after_cleanup(self) -> None:
+        """Vacuum the database (to make the space freed by every batch's deletes available to the OS).
+
+        Raises:
+            CleanupError: On database errors (locked, corrupt, etc.).
+        """
+        conn = self._get_db_connection()
+        if not conn:
+            return
+
+        try:
+            # vacuum to immediately hand back freed space to OS
+            conn.execute("VACUUM")
+        except sqlite3.Error as e:
+            raise CleanupError(f"SQLite vacuum failed: {e}") from e
+        finally:
+            conn.close()
+
+    def _footprint(self, dry_run: bool) -> dict[str, int] | None:
+        """Count the rows left in the entity tables (COUNT(*) walks the smallest b-tree, not the
+        rows' data), and size up the database file plus its write-ahead log.
+
+        Raises:
+            CleanupError: On database errors (locked, corrupt, etc.).
+        """
+        db_path = get_storage("claude_mem")
+        conn = self._get_db_connection()
+        if not conn:
+            return {"items": 0, "bytes": 0}
+
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            items = sum(
+                conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+                for table_name in map(self._table_name_for_entity_type, self.entity_types)
+                if table_name in tables
+            )
+        except sqlite3.Error as e:
+            raise CleanupError(f"SQLite count failed: {e}") from e
+        finally:
+            conn.close()
+
+        size = 0
+        for file in (db_path, db_path.with_name(db_path.name + "-wal")):
+            try:
+                size += file.stat().st_size
+            except FileNotFoundError:
+                continue
+        return {"items": items, "bytes": size}
+
+    def _stats(self) -> dict[str, Any]:
+        """Count the entity tables' rows per day of creation (grouping on created_at's date
+        prefix, so no timestamp is parsed in Python), and size up the database from its page
+        counts (plus its write-ahead log), the free pages being space a vacuum would reclaim.
+
+        Raises:
+            CleanupError: On database errors (locked, corrupt, etc.).
+        """
+        db_path = get_storage("claude_mem")
+        histogram = AgeHistogram()
+        conn = self._get_db_connection()
+        if not conn:
+            return self._stats_result(histogram, bytes=0, free_bytes=0)
+
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            size = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+            for table_name in map(self._table_name_for_entity_type, self.entity_types):
+                if table_name not in tables:
+                    continue
+                for day, count in conn.execute(
+                    f"SELECT substr(created_at, 1, 10), COUNT(*) FROM {table_name} GROUP BY 1"
+                ):
+                    try:
+                        created_at = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                    except (TypeError, ValueError):
+                        created_at = None
+                    histogram.add(created_at, count)
+        except sqlite3.Error as e:
+            raise CleanupError(f"SQLite stats query failed: {e}") from e
+        finally:
+            conn.close()
+
+        try:
+            size += db_path.with_name(db_path.name + "-wal").stat().st_size
+        except FileNotFoundError:
+            pass
+        return self._stats_result(histogram, bytes=size, free_bytes=free)
+
+    def _restore(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        """Re-insert trashed rows into their tables, one `INSERT ... SELECT` per table.
+
+        Each table's rows are passed to SQLite as a single JSON array and expanded with
+        json_each(), so restoring thousands of rows is one statement rather than one per row.
+        Rows whose id is already present are left as-is.
+
+        Raises:
+            CleanupError: On database errors (locked, corrupt, etc.).
+        """
+        conn = self._get_db_connection()
+        if not conn:
+            raise CleanupError("database does not exist")
+
+        # group rows by table (kinds other than the known entity types are table names, see export)
+        by_table: dict[str, list[dict[str, Any]]] = {}
+        skipped = []
+        for item in items:
+            if not isinstance(item["data"], dict):
+                skipped.append(item["item_id"])
+                continue
+            kind = item["kind"]
+            table = self._table_name_for_entity_type(kind) if kind in self.entity_types else kind
+            by_table.setdefault(table, []).append(item)
+
+        restored = 0
+        try:
+            cursor = conn.cursor()
+            for table, table_items in by_table.items():
+                cursor.execute("SELECT name FROM pragma_table_info(?)", (table,))
+                columns = [row[0] for row in cursor.fetchall()]
+                if not columns:
+                    skipped.extend(item["item_id"] for item in table_items)  # table no longer exists
+                    continue
+
+                records = [item["data"] for item in table_items]
+                columns = [c for c in columns if any(c in record for record in records)]
+                column_list = ", ".join(f'"{c}"' for c in columns)
+                extracts = ", ".join(f"json_extract(value, '$.\"{c}\"')" for c in columns)
+
+                before = conn.total_changes
+                cursor.execute(
+                    f'INSERT OR IGNORE INTO "{table}" ({column_list}) SELECT {extracts} FROM json_each(?)',
+                    (json.dumps(records, default=str),)
+                )
+                restored += conn.total_changes - before
+
+            conn.commit()
+        except sqlite3.Error as e:
+            raise CleanupError(f"SQLite restore failed: {e}") from e
+        finally:
+            conn.close()
+
+        return {"storage": self.name, "restored": restored, "skipped": skipped}
+
     def _wipe(self, backup: bool) -> dict[str, Any]:
         """Completely erase all data from claude-mem database.
 
@@ -187,7 +410,7 @@ class ClaudeMemHandler(CleanupHandler):
                     columns = [desc[0] for desc in cursor.description]
                     for row in cursor.fetchall():
                         items_to_back_up.append({
-                            "type": table,
+                            "type": self._entity_type_for_table(table),
                             "table": table,
                             "data": dict(zip(columns, row)),
                         })
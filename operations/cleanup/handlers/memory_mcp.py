@@ -1,118 +1,355 @@
 """Memory MCP JSONL cleanup handler."""
+import fcntl
 import json
+import os
+import re
+import sqlite3
+import tempfile
+from contextlib import nullcontext
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Callable, Iterator, TypeVar
 
 from .base import CleanupHandler, CleanupError
-from ..trash import get_trash_dir, generate_trash_filename, write_manifest
-from ...config_loader import get_storage, get_trash_grace_period
+from .. import state
+from ..catalog import TrashedItem
+from ..compression import compressed_path, open_writer
+from ..content_store import content_store_for
+from ..jsonl_index import JsonlOffsetIndex
+from ..stats import AgeHistogram
+from ..trash import get_trash_dir, generate_trash_filename, record_trashed_items, write_manifest
+from ...config_loader import (
+    get_storage,
+    get_trash_grace_period,
+    is_memory_mcp_index_enabled,
+    is_trash_dedup_enabled,
+)
+
+T = TypeVar("T")
+
+# read size used when carrying over lines appended during a rewrite
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# sidecar index file name (kept in .archives next to the cleanup state)
+INDEX_FILENAME = "memory-mcp.idx"
+
+# string-valued "created_at" member of a raw JSONL line
+_CREATED_AT_PATTERN = re.compile(rb'"created_at"\s*:\s*"([^"\\]*)"')
+
+# returned by _fast_created_key() for lines without a created_at
+NO_TIMESTAMP = b""
+
+# UTC/naive ISO timestamps that can be normalized without datetime parsing
+_FAST_ISO_PATTERN = re.compile(rb"(\d{4}-\d{2}-\d{2})(?:T(\d{2}:\d{2}:\d{2})(?:\.(\d{1,6}))?(?:Z|\+00:00)?)?")
 
 
 class MemoryMcpHandler(CleanupHandler):
-    """Cleanup handler for Memory MCP's JSONL file."""
+    """Cleanup handler for Memory MCP's JSONL file.
+
+    Expired lines are moved out of the JSONL file in a single streaming pass
+    (see _rewrite_file()): export_items_to_trash() only reserves the trash file,
+    which delete_items_from_storage() then fills with the raw bytes of each line
+    it drops (or, with `trash.dedup` set, puts each line in the content store).
+
+    Only entities expire by age: relations are dropped (and trashed) solely by
+    cascading from an expired endpoint, so a stale relation between live entities
+    is never a stale item.
+    """
 
     name = "memory-mcp"
 
+    def __init__(self) -> None:
+        super().__init__()
+        # retention of the batch whose lines the next rewrite trashes, and the trash file reserved
+        #   for them by export_items_to_trash() (None with trash.dedup: they go in the content store)
+        self._pending_retention: str | None = None
+        self._pending_trash: Path | None = None
+        # lines the last scan read (only timestamped ones, via the index) and those since dropped
+        #   (see _footprint())
+        self._lines_seen = 0
+        self._lines_dropped = 0
+
     def _get_file_path(self) -> Path:
         """Get the Memory MCP JSONL file path."""
         return get_storage("memory_mcp")
 
-    def _read_entities(self) -> list[dict[str, Any]]:
-        """Read all entities from JSONL file.
+    def _iter_entities(self) -> Iterator[dict[str, Any]]:
+        """Lazily yield all entities from the JSONL file, skipping malformed lines.
 
         Raises:
             CleanupError: On file I/O errors.
         """
         file_path = self._get_file_path()
         if not file_path.exists():
-            return []
+            return
 
         try:
-            entities = []
-            with open(file_path) as f:
+            with open(file_path, "rb") as f:
                 for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            entities.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            continue  # skip malformed lines
-            return entities
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # skip malformed lines
         except OSError as e:
             raise CleanupError(f"Failed to read JSONL file: {e}") from e
 
-    def _write_entities(self, entities: list[dict[str, Any]]) -> None:
-        """Write entities back to JSONL file, rewriting it from scratch.
+    def _replace_file(self, write_prefix: Callable[[BinaryIO, int, Callable[[bytes], None]], T]) -> T:
+        """Atomically replace the JSONL file with a transformed copy, returning write_prefix()'s result.
+
+        write_prefix(src, scan_end, write) writes the new version of the file's first scan_end bytes
+        (i.e. those present when the pass starts) line by line via write(); it must read whole lines
+        from src and must never consume past a line that has no newline yet, since it may still be
+        mid-write.
+
+        - The temp file lives next to the original and atomically replaces it once fsync'd
+        - The MCP server may keep appending meanwhile, so anything after the prefix is carried
+          over verbatim: first without any lock while catching up, then under an advisory lock
+          held just long enough to copy the last few bytes and rename
+        - With `cleanup.memory_mcp_index` set, the sidecar index is rebuilt from the lines as
+          they're written (at offsets known then) and saved once the new file is in place, so
+          the next refresh only extends it over lines carried over; otherwise any index (which
+          the rewrite invalidates) is removed
 
         Raises:
-            CleanupError: On file I/O errors.
+            CleanupError: On file I/O errors (the original file is left untouched).
         """
         file_path = self._get_file_path()
+        index = JsonlOffsetIndex(file_path, self._get_index_path(), _line_created_at) \
+            if is_memory_mcp_index_enabled() else None
 
+        tmp_fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
         try:
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # open file in write mode; existing file will be erased
-            with open(file_path, "w") as f:
-                for entity in entities:
-                    f.write(json.dumps(entity) + "\n")
+            with open(file_path, "rb") as src, os.fdopen(tmp_fd, "wb") as dst:
+                written = 0
+                indexing = index is not None
+
+                def write(line: bytes) -> None:
+                    nonlocal written, indexing
+                    if index is not None and indexing:
+                        # (up to any line still mid-write, which the next refresh picks up)
+                        if line.endswith(b"\n"):
+                            index.add_line(written, line)
+                        else:
+                            indexing = False
+                    dst.write(line)
+                    written += len(line)
+
+                result = write_prefix(src, os.fstat(src.fileno()).st_size, write)
+
+                # catch up on lines appended during the pass without blocking the MCP...
+                _copy_remaining(src, dst)
+
+                # ...then lock only to copy whatever was appended since, and swap the files
+                fcntl.flock(src.fileno(), fcntl.LOCK_EX)
+                try:
+                    _copy_remaining(src, dst)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+
+                    # keep the original file's permissions, then swap the new file in atomically
+                    os.chmod(tmp_name, os.fstat(src.fileno()).st_mode & 0o7777)
+                    os.replace(tmp_name, file_path)
+                finally:
+                    fcntl.flock(src.fileno(), fcntl.LOCK_UN)
+
+            _fsync_dir(file_path.parent)
+            self._save_rebuilt_index(index)
         except OSError as e:
-            raise CleanupError(f"Failed to write JSONL file: {e}") from e
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise CleanupError(f"Failed to rewrite JSONL file: {e}") from e
+
+        return result
+
+    def _rewrite_file(self, should_drop: Callable[[bytes], bool], retention: str | None = None,
+                      trash_path: Path | None = None) -> int:
+        """Drop lines from the JSONL file in one streaming pass, returning the count dropped.
+
+        - Surviving lines are copied byte-for-byte (i.e. never re-serialized)
+        - With a retention, dropped lines are trashed: streamed (compressed) to the reserved
+          trash_path, or without one put in the content store (trash.dedup), fsync'd *before*
+          the original is replaced so a crash at any point never loses an entity
+        - The manifest entry for the trashed lines (counting exactly the lines dropped) and
+          each line's byte span in the trash catalog are written once the original is replaced
+          (a crash in between leaves the trashed lines unreferenced, but never deleted); a
+          reserved trash file no line was dropped into is removed
+        - Blank lines are dropped silently
+
+        Only lines present when the pass starts are filtered (see _replace_file()), and memory
+        use is constant regardless of file size.
+
+        Raises:
+            CleanupError: On file I/O errors (the original file is left untouched).
+        """
+        if not self._get_file_path().exists():
+            return 0
+
+        store = content_store_for(get_trash_dir(self.name)) if retention is not None and not trash_path else None
+        trashed: list[TrashedItem] = []
+        blobs: list[str] = []
+
+        def filter_prefix(src: BinaryIO, scan_end: int, write: Callable[[bytes], None]) -> int:
+            dropped = 0
+            trash_ctx = open_writer(trash_path) if trash_path else nullcontext()
+            with trash_ctx as trash_file:
+                for line in _iter_prefix_lines(src, scan_end):
+                    if not line.strip():
+                        continue
+
+                    # a line without its newline may still be mid-write: always keep it as-is
+                    if not line.endswith(b"\n") or not should_drop(line):
+                        write(line)
+                        continue
+
+                    dropped += 1
+                    if store is not None:
+                        blob = store.put(line, fsync=True)
+                        trashed.append(_trashed_item(line, str(store.path_for(blob)), 0))
+                        blobs.append(blob)
+                    elif trash_file is not None:
+                        trashed.append(_trashed_item(line, str(trash_path), trash_file.tell()))
+                        trash_file.write(line)
+
+            if trash_path:
+                _fsync_file(trash_path)  # once closed, i.e. with the compressed stream finalized
+            return dropped
+
+        dropped = self._replace_file(filter_prefix)
+        if retention is None:
+            return dropped
+        if not trashed:
+            if trash_path:
+                trash_path.unlink(missing_ok=True)
+            return dropped
+
+        trash_dir = get_trash_dir(self.name)
+        if trash_path:
+            batch_id = write_manifest(trash_dir, self.name, len(trashed), retention,
+                                      get_trash_grace_period(), files=[trash_path])
+        else:
+            batch_id = write_manifest(trash_dir, self.name, len(trashed), retention,
+                                      get_trash_grace_period(), blobs=list(dict.fromkeys(blobs)))
+        record_trashed_items(trash_dir, batch_id, trashed)
+        return dropped
 
     def get_stale_items(self, cutoff: datetime) -> list[dict[str, Any]]:
-        """Find entities with created_at older than cutoff."""
-        items = []
-        for entity in self._read_entities():
-            created_at = entity.get("created_at")
-            if not created_at:
-                continue  # skip entities without timestamp
+        """Find entities with created_at older than cutoff (relations only expire with an endpoint).
 
-            try:
-                created_str = str(created_at)
-                
-                # timestamp will be ISO with optional Z; normalize Z to +00:00 for fromisoformat
-                if created_str.endswith("Z"):
-                    created_str = created_str[:-1] + "+00:00"
-
-                created_dt = datetime.fromisoformat(created_str)
-            except (ValueError, TypeError):
-                try:
-                    created_dt = datetime.strptime(str(created_at), "%Y-%m-%d")
-                except (ValueError, TypeError):
-                    continue
+        Lines are first run through a byte-level prefilter (see _may_be_stale()), so only
+        candidate lines pay for a full json.loads() and timestamp parse.
 
-            # ensure created_dt is timezone-aware (use UTC since this is the timezone agents
-            #   are directed to use for all memories in Bureau's context files)
-            if created_dt.tzinfo is None:
-                created_dt = created_dt.replace(tzinfo=timezone.utc)
+        Raises:
+            CleanupError: On file I/O errors.
+        """
+        self._lines_seen = self._lines_dropped = 0
+        file_path = self._get_file_path()
+        if not file_path.exists():
+            return []
 
-            if created_dt < cutoff:
-                items.append(entity)
+        if is_memory_mcp_index_enabled():
+            return self._get_stale_items_via_index(file_path, cutoff)
+
+        cutoff_key = _cutoff_key(cutoff)
+        items = []
+        try:
+            with open(file_path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        self._lines_seen += 1
+                    if not _may_be_stale(line, cutoff_key):
+                        continue
+                    entity = _decode_if_stale(line, cutoff)
+                    if entity is not None:
+                        items.append(entity)
+        except OSError as e:
+            raise CleanupError(f"Failed to read JSONL file: {e}") from e
 
         return items
 
-    def export_items_to_trash(self, items: list[dict[str, Any]], retention: str) -> str:
-        """Export entities to JSONL in trash directory."""
-        trash_dir = get_trash_dir(self.name)
-        filename = generate_trash_filename(len(items), "jsonl")
-        trash_path = trash_dir / filename
+    def iter_stale_batches(self, cutoff: datetime, batch_size: int | None = None) -> Iterator[list[dict[str, Any]]]:
+        """Yield every stale entity in a single batch (whatever batch_size).
+
+        Dropping a batch rewrites the whole JSONL file, so splitting the expired entities
+        into several batches would multiply the rewrites rather than bound memory use.
+        """
+        items = self.get_stale_items(cutoff)
+        if items:
+            yield items
+
+    def _get_index_path(self) -> Path:
+        """Get the path of the sidecar offset index."""
+        return state.ARCHIVES_DIR / INDEX_FILENAME
+
+    def _get_stale_items_via_index(self, file_path: Path, cutoff: datetime) -> list[dict[str, Any]]:
+        """Find stale entities by seeking only to the lines the sidecar index marks as expired.
+
+        The index is first brought up to date (extended incrementally if the MCP has only
+        appended since the last run, rebuilt otherwise).
+
+        Raises:
+            CleanupError: On file I/O errors.
+        """
+        index = JsonlOffsetIndex(file_path, self._get_index_path(), _line_created_at)
+        try:
+            index.refresh()
+            self._lines_seen = len(index)
+            items = []
+            for line in index.read_lines(index.iter_older_than(cutoff)):
+                entity = _decode_if_stale(line, cutoff)
+                if entity is not None:
+                    items.append(entity)
+            return items
+        except OSError as e:
+            raise CleanupError(f"Failed to read JSONL file via offset index: {e}") from e
 
-        with open(trash_path, "w") as f:
-            for entity in items:
-                f.write(json.dumps(entity) + "\n")
+    def _save_rebuilt_index(self, index: JsonlOffsetIndex | None) -> None:
+        """Save the index a rewrite rebuilt; without one (or if it can't be saved), remove the
+        sidecar index, as the rewrite has invalidated its offsets."""
+        if index is not None:
+            try:
+                index.save()
+                return
+            except OSError:
+                pass
+        try:
+            self._get_index_path().unlink()
+        except FileNotFoundError:
+            pass
+
+    def _reserve_trash_file(self, item_count: int) -> Path:
+        """Create an empty trash file for the next rewrite to fill (its manifest entry is only
+        written once the rewrite knows how many lines it dropped)."""
+        trash_path = compressed_path(get_trash_dir(self.name) / generate_trash_filename(item_count, "jsonl"))
+        trash_path.touch()
+        return trash_path
 
-        write_manifest(trash_dir, 
-                       self.name, 
-                       len(items), 
-                       retention,
-                       get_trash_grace_period(),
-                       files=[trash_path])
+    def export_items_to_trash(self, items: list[dict[str, Any]], retention: str) -> str:
+        """Reserve a JSONL file in the trash directory for the expired entities.
 
-        return str(trash_path)
+        The file is filled with the expired lines' raw bytes by the streaming rewrite
+        in delete_items_from_storage() (which, with `trash.dedup` set, puts them in the
+        content store instead, so no file is reserved).
+        """
+        self._pending_retention = retention
+        if is_trash_dedup_enabled():
+            self._pending_trash = None
+            return str(content_store_for(get_trash_dir(self.name)).root)
+        self._pending_trash = self._reserve_trash_file(len(items))
+        return str(self._pending_trash)
 
     def delete_items_from_storage(self, items: list[dict[str, Any]]) -> int:
-        """Rewrite JSONL without expired entities."""
+        """Rewrite JSONL without expired entities, moving them to any reserved trash file.
+
+        Relations whose `from`/`to` endpoint names an expired entity are cascaded (i.e. dropped
+        and trashed alongside it) in the same pass, so no dangling edges are left in the graph.
+
+        Returns:
+            Count of lines removed, including cascaded relations.
+        """
         if not items:
             return 0
 
@@ -126,46 +363,439 @@ class MemoryMcpHandler(CleanupHandler):
             elif "id" in item:
                 expired_ids.add(item["id"])
 
-        # filter out expired entities from overall set
-        all_entities = self._read_entities()
-        remaining = []
-        deleted_count = 0
+        def is_expired(line: bytes) -> bool:
+            try:
+                entity = json.loads(line)
+            except json.JSONDecodeError:
+                return False  # keep malformed lines untouched
+            if not isinstance(entity, dict):
+                return False
+
+            # relations reference entities by name only (never by id)
+            if _is_relation(entity):
+                endpoints = (entity.get("from"), entity.get("to"))
+                return any(isinstance(name, str) and name in expired_names for name in endpoints)
 
-        for entity in all_entities:
             # match by the same field type: name → expired_names, id → expired_ids
-            should_delete = False
             if "name" in entity:
-                should_delete = entity["name"] in expired_names
-            elif "id" in entity:
-                should_delete = entity["id"] in expired_ids
+                return entity["name"] in expired_names
+            if "id" in entity:
+                return entity["id"] in expired_ids
+            return False
+
+        retention, self._pending_retention = self._pending_retention, None
+        trash_path, self._pending_trash = self._pending_trash, None
+        dropped = self._rewrite_file(is_expired, retention, trash_path)
+        self._lines_dropped += dropped
+        return dropped
+
+    def _footprint(self, dry_run: bool) -> dict[str, int] | None:
+        """Count the lines the scan read, less those dropped, and size up the JSONL file."""
+        try:
+            size = self._get_file_path().stat().st_size
+        except FileNotFoundError:
+            size = 0
+        return {"items": self._lines_seen - self._lines_dropped, "bytes": size}
 
-            if should_delete:
-                deleted_count += 1
+    def _stats(self) -> dict[str, Any]:
+        """Histogram the lines' ages from the sidecar index (brought up to date first, which only
+        reads what was appended since the last run), and size up the JSONL file.
+
+        Without `cleanup.memory_mcp_index` set, every line's created_at is read instead (via
+        the scan's fast path where possible), which also finds undated lines (the index only
+        holds timestamped ones).
+
+        Raises:
+            CleanupError: On file I/O errors.
+        """
+        file_path = self._get_file_path()
+        histogram = AgeHistogram()
+        try:
+            size = file_path.stat().st_size
+        except FileNotFoundError:
+            return self._stats_result(histogram, bytes=0)
+
+        try:
+            if is_memory_mcp_index_enabled():
+                index = JsonlOffsetIndex(file_path, self._get_index_path(), _line_created_at)
+                index.refresh()
+                for created_at in index.iter_created_at():
+                    histogram.add(created_at)
             else:
-                remaining.append(entity)
+                with open(file_path, "rb") as f:
+                    for line in f:
+                        if line.strip():
+                            histogram.add(_line_created_at(line))
+        except OSError as e:
+            raise CleanupError(f"Failed to read JSONL file: {e}") from e
+
+        return self._stats_result(histogram, bytes=size)
+
+    def _compact(self) -> dict[str, Any]:
+        """Merge duplicate entity records & drop exact-duplicate relations in the JSONL file.
 
-        # write back remaining entities
-        self._write_entities(remaining)
+        Agents often re-create an entity or keep appending observations to it, so the file
+        accumulates several lines per entity name. Each name is merged into a single line
+        (at the position of its first occurrence) with de-duplicated observations.
 
-        return deleted_count
+        Records are streamed through a temporary on-disk SQLite table (keyed by entity name
+        or canonical relation) next to the JSONL file, so memory use stays bounded however
+        large the file is.
+
+        Raises:
+            CleanupError: On file I/O or SQLite errors.
+        """
+        file_path = self._get_file_path()
+        if not file_path.exists():
+            return {"storage": self.name, "compacted": False, "message": "file does not exist"}
+
+        bytes_before = file_path.stat().st_size
+        db_fd, db_name = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".compact.db")
+        os.close(db_fd)
+        conn = sqlite3.connect(db_name)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("CREATE TABLE records (seq INTEGER PRIMARY KEY, key TEXT UNIQUE, line BLOB NOT NULL)")
+
+            def compact_prefix(src: BinaryIO, scan_end: int, write: Callable[[bytes], None]) -> dict[str, int]:
+                stats = {"lines_before": 0, "merged_entities": 0, "dropped_relations": 0}
+                for line in _iter_prefix_lines(src, scan_end):
+                    if not line.strip():
+                        continue
+                    stats["lines_before"] += 1
+
+                    # a line without its newline may still be mid-write: keep it (last) as-is
+                    key, record = _compaction_key(line) if line.endswith(b"\n") else (None, None)
+                    existing = conn.execute("SELECT seq, line FROM records WHERE key = ?", (key,)).fetchone() \
+                        if key is not None else None
+
+                    if existing is None:
+                        conn.execute("INSERT INTO records (key, line) VALUES (?, ?)", (key, line))
+                    elif record is not None:
+                        merged = _merge_entities(json.loads(existing[1]), record)
+                        conn.execute("UPDATE records SET line = ? WHERE seq = ?",
+                                     ((json.dumps(merged) + "\n").encode(), existing[0]))
+                        stats["merged_entities"] += 1
+                    else:
+                        stats["dropped_relations"] += 1
+
+                for (line,) in conn.execute("SELECT line FROM records ORDER BY seq"):
+                    write(line)
+
+                stats["lines_after"] = stats["lines_before"] - stats["merged_entities"] - stats["dropped_relations"]
+                return stats
+
+            stats = self._replace_file(compact_prefix)
+        except sqlite3.Error as e:
+            raise CleanupError(f"Compaction failed: {e}") from e
+        finally:
+            conn.close()
+            os.unlink(db_name)
+
+        bytes_after = file_path.stat().st_size
+        return {
+            "storage": self.name,
+            "compacted": True,
+            **stats,
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "bytes_saved": bytes_before - bytes_after,
+        }
+
+    def _restore(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        """Append trashed lines (byte-for-byte) back to the JSONL file, entities before relations.
+
+        The append is made under the same advisory lock _replace_file() takes to swap files; if
+        a concurrent rewrite replaced the file between opening and locking it (i.e. the locked
+        inode is no longer the one at the path), the file is reopened and the append retried.
+
+        Raises:
+            CleanupError: On file I/O errors.
+        """
+        skipped = [item["item_id"] for item in items if not item["raw"]]
+        lines = [item["raw"] if item["raw"].endswith(b"\n") else item["raw"] + b"\n"
+                 for item in sorted(items, key=lambda item: item["kind"] == "relation") if item["raw"]]
+        if not lines:
+            return {"storage": self.name, "restored": 0, "skipped": skipped}
+
+        file_path = self._get_file_path()
+        try:
+            while True:
+                with open(file_path, "ab+") as f:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                    try:
+                        if os.fstat(f.fileno()).st_ino != os.stat(file_path).st_ino:
+                            continue  # replaced while we waited for the lock: append to the new file
+
+                        # never glue the first restored line onto an unterminated last line
+                        size = os.fstat(f.fileno()).st_size
+                        if size:
+                            f.seek(size - 1)
+                            if f.read(1) != b"\n":
+                                f.write(b"\n")
+
+                        f.write(b"".join(lines))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    finally:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                break
+        except OSError as e:
+            raise CleanupError(f"Failed to append restored lines: {e}") from e
+
+        return {"storage": self.name, "restored": len(lines), "skipped": skipped}
 
     def _wipe(self, backup: bool) -> dict[str, Any]:
         """Completely erase all entities from Memory MCP."""
-        entities = self._read_entities()
+        entity_count = sum(1 for _ in self._iter_entities())
 
-        if not entities:
+        if not entity_count:
             return {"storage": self.name, "wiped": 0, "message": "no entities found"}
 
-        # backup entities if requested
-        backup_path = None
-        if backup:
-            backup_path = self.export_items_to_trash(entities, "wipe")
+        # back up entities if requested (the rewrite below moves every line into the trash file,
+        #   or the content store)
+        dedup = backup and is_trash_dedup_enabled()
+        backup_trash = self._reserve_trash_file(entity_count) if backup and not dedup else None
 
-        # clear the file (prefer this method over .unlink() and .touch() to avoid race conditions
-        #   with the MCP if it's running)
-        self._write_entities([])
+        # empty the file via the same atomic rewrite (rather than .unlink() and .touch()) so the
+        #   MCP never observes a missing file if it's running
+        self._rewrite_file(lambda line: True, "wipe" if backup else None, backup_trash)
 
-        result: dict[str, Any] = {"storage": self.name, "wiped": len(entities)}
-        if backup_path:
-            result["backup_path"] = backup_path
+        result: dict[str, Any] = {"storage": self.name, "wiped": entity_count}
+        if backup_trash:
+            result["backup_path"] = str(backup_trash)
+        elif dedup:
+            result["backup_path"] = str(content_store_for(get_trash_dir(self.name)).root)
         return result
+
+
+def _trashed_item(line: bytes, file: str, offset: int) -> TrashedItem:
+    """Describe a JSONL line moved to the trash for the trash catalog."""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        record = None
+    if not isinstance(record, dict):
+        record = {}
+
+    native_id: Any
+    if _is_relation(record):
+        kind, native_id = "relation", f"{record.get('from')}->{record.get('to')}"
+    else:
+        kind, native_id = "entity", record.get("name", record.get("id"))
+    created_at = record.get("created_at")
+
+    return {
+        "kind": kind,
+        "native_id": str(native_id) if native_id is not None else None,
+        "created_at": created_at if isinstance(created_at, str) else None,
+        "file": file,
+        "offset": offset,
+        "length": len(line),
+    }
+
+
+def _merge_entities(kept: dict[str, Any], duplicate: dict[str, Any]) -> dict[str, Any]:
+    """Merge a duplicate entity record into the one already kept for the same name.
+
+    - Fields of the first-seen record win; fields only present in the duplicate are added
+    - Observations are unioned, keeping first-seen order
+    - The most recent created_at is kept, so a merged entity never expires earlier than its
+      newest record would have
+    """
+    merged = {**duplicate, **kept}
+
+    observations = list(kept.get("observations") or [])
+    seen = {json.dumps(o, sort_keys=True) for o in observations}
+    for observation in duplicate.get("observations") or []:
+        key = json.dumps(observation, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            observations.append(observation)
+    if observations:
+        merged["observations"] = observations
+
+    kept_dt = _parse_created_at(kept.get("created_at"))
+    duplicate_dt = _parse_created_at(duplicate.get("created_at"))
+    if duplicate_dt is not None and (kept_dt is None or duplicate_dt > kept_dt):
+        merged["created_at"] = duplicate["created_at"]
+
+    return merged
+
+
+def _compaction_key(line: bytes) -> tuple[str | None, dict[str, Any] | None]:
+    """Get the de-duplication key for a raw JSONL line (plus the decoded record, for entities).
+
+    Returns:
+        - ("e:<name>", record) for named entities, merged with any others of the same name
+        - ("r:<canonical JSON>", None) for relations, where only exact duplicates are dropped
+        - (None, None) for anything else (id-only entities, malformed lines, ...), kept as-is
+    """
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None, None
+    if not isinstance(record, dict):
+        return None, None
+
+    if _is_relation(record):
+        return "r:" + json.dumps(record, sort_keys=True), None
+    if isinstance(record.get("name"), str):
+        return "e:" + record["name"], record
+    return None, None
+
+
+def _is_relation(record: dict[str, Any]) -> bool:
+    """Check whether a JSONL record is a relation (edge) rather than an entity."""
+    if "type" in record:
+        return record["type"] == "relation"
+    return "from" in record and "to" in record and "name" not in record and "id" not in record
+
+
+def _cutoff_key(cutoff: datetime) -> bytes:
+    """Normalize a cutoff to the UTC `YYYY-MM-DDTHH:MM:SS.ffffff` form compared against by _may_be_stale()."""
+    utc_cutoff = cutoff.astimezone(timezone.utc).replace(tzinfo=None)
+    return utc_cutoff.isoformat(timespec="microseconds").encode()
+
+
+def _fast_created_key(line: bytes) -> bytes | None:
+    """Extract a raw JSONL line's created_at as a normalized UTC key, without decoding the line.
+
+    The value is normalized to a fixed-width `YYYY-MM-DDTHH:MM:SS.ffffff` string, which sorts
+    lexicographically in chronological order.
+
+    Returns:
+        - the normalized key
+        - NO_TIMESTAMP if the line certainly has no created_at
+        - None if the fast path can't classify the line (unicode escapes, repeated/nested or
+          non-string keys, non-UTC offsets, etc.), i.e. the line needs a full decode
+    """
+    if b"\\u" in line:
+        return None  # escapes could spell out the key or value: decode to be sure
+
+    matches = _CREATED_AT_PATTERN.findall(line)
+    if not matches:
+        # no string-valued created_at: either no timestamp at all, or a non-string
+        #   value that needs the full parse's fallbacks
+        return None if b'"created_at"' in line else NO_TIMESTAMP
+    if len(matches) > 1:
+        return None  # can't tell a top-level key from a nested one
+
+    timestamp = _FAST_ISO_PATTERN.fullmatch(matches[0])
+    if timestamp is None:
+        return None
+
+    date, time, fraction = timestamp.groups()
+    return date + b"T" + (time or b"00:00:00") + b"." + (fraction or b"").ljust(6, b"0")
+
+
+def _may_be_stale(line: bytes, cutoff_key: bytes) -> bool:
+    """Cheaply rule out raw JSONL lines that cannot hold an entity created before the cutoff.
+
+    Returns False only when the line is *certainly* not stale; lines the fast path cannot
+    classify return True so the caller falls back to a full decode.
+    """
+    line_key = _fast_created_key(line)
+    if line_key is None:
+        return True
+    return line_key != NO_TIMESTAMP and line_key < cutoff_key
+
+
+def _decode_if_stale(line: bytes, cutoff: datetime) -> dict[str, Any] | None:
+    """Fully decode a candidate line, returning the entity only if it was created before cutoff
+    (never a relation: those only expire along with an endpoint)."""
+    try:
+        entity = json.loads(line)
+    except json.JSONDecodeError:
+        return None  # skip malformed lines
+    if not isinstance(entity, dict) or _is_relation(entity):
+        return None
+
+    created_dt = _parse_created_at(entity.get("created_at"))
+    if created_dt is not None and created_dt < cutoff:
+        return entity
+    return None
+
+
+def _line_created_at(line: bytes) -> datetime | None:
+    """Get a raw JSONL line's created_at, using the fast path where possible."""
+    line_key = _fast_created_key(line)
+    if line_key == NO_TIMESTAMP:
+        return None
+    if line_key is not None:
+        try:
+            return datetime.fromisoformat(line_key.decode()).replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None  # e.g. an out-of-range month, which the full parse rejects too
+
+    try:
+        entity = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return _parse_created_at(entity.get("created_at")) if isinstance(entity, dict) else None
+
+
+def _parse_created_at(created_at: Any) -> datetime | None:
+    """Parse an entity's created_at value into a timezone-aware datetime (None if absent/unparseable)."""
+    if not created_at:
+        return None  # skip entities without timestamp
+
+    try:
+        created_str = str(created_at)
+
+        # timestamp will be ISO with optional Z; normalize Z to +00:00 for fromisoformat
+        if created_str.endswith("Z"):
+            created_str = created_str[:-1] + "+00:00"
+
+        created_dt = datetime.fromisoformat(created_str)
+    except (ValueError, TypeError):
+        try:
+            created_dt = datetime.strptime(str(created_at), "%Y-%m-%d")
+        except (ValueError, TypeError):
+            return None
+
+    # ensure created_dt is timezone-aware (use UTC since this is the timezone agents
+    #   are directed to use for all memories in Bureau's context files)
+    if created_dt.tzinfo is None:
+        created_dt = created_dt.replace(tzinfo=timezone.utc)
+
+    return created_dt
+
+
+def _iter_prefix_lines(src: BinaryIO, scan_end: int) -> Iterator[bytes]:
+    """Yield src's lines until reaching byte offset scan_end (the last one may extend past it)."""
+    while src.tell() < scan_end:
+        line = src.readline()
+        if not line:
+            break
+        yield line
+
+
+def _copy_remaining(src: BinaryIO, dst: BinaryIO) -> None:
+    """Copy everything from src's current position to its (current) end into dst."""
+    while chunk := src.read(COPY_CHUNK_SIZE):
+        dst.write(chunk)
+
+
+def _fsync_file(file_path: Path) -> None:
+    """fsync a file by path (e.g. after a compressing writer has closed it)."""
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(dir_path: Path) -> None:
+    """Flush a directory entry (e.g. after a rename) to disk, where the platform supports it."""
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
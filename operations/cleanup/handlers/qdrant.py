@@ -1,13 +1,37 @@
 """Qdrant vector database cleanup handler."""
 import json
+import os
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterator
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
 
 from .base import CleanupHandler, CleanupError
-from ..trash import get_trash_dir, generate_trash_filename, write_manifest
-from ...config_loader import get_qdrant_url, get_qdrant_collection, get_trash_grace_period
+from ..catalog import TrashedItem
+from ..compression import compressed_path
+from ..stats import HISTOGRAM_WEEKS, AgeHistogram
+from ..trash import (
+    export_blobs,
+    get_trash_dir,
+    generate_trash_filename,
+    record_trashed_items,
+    write_export,
+    write_manifest,
+)
+from ...config_loader import (
+    get_cleanup_batch_size,
+    get_qdrant_collection,
+    get_qdrant_url,
+    get_storage,
+    get_trash_grace_period,
+)
+
+
+# points per upsert request when restoring
+RESTORE_BATCH_SIZE = 256
+
+# points per retrieve request when fetching stale points' vectors to export
+RETRIEVE_BATCH_SIZE = 256
 
 
 class QdrantHandler(CleanupHandler):
@@ -15,6 +39,14 @@ class QdrantHandler(CleanupHandler):
 
     name = "qdrant"
 
+    def __init__(self) -> None:
+        super().__init__()
+        # points the last scan scrolled through, and how many of them were stale (see _footprint())
+        self._points_seen = 0
+        self._stale_seen = 0
+        # whether the last scan scrolled through every point (i.e. wasn't given a watermark)
+        self._full_scan = True
+
     def _http_request(self, method: str, endpoint: str, data: dict | None = None) -> dict:
         """Make HTTP request to (locally-running) Qdrant server.
 
@@ -59,10 +91,22 @@ class QdrantHandler(CleanupHandler):
             # otherwise re-raise
             raise
 
-    def get_stale_items(self, cutoff: datetime) -> list[dict[str, Any]]:
-        """Query points with metadata.created_at older than cutoff."""
+    def iter_stale_batches(self, cutoff: datetime, batch_size: int | None = None) -> Iterator[list[dict[str, Any]]]:
+        """Query points with metadata.created_at older than cutoff, yielding them batch_size at a time.
+
+        Scrolling resumes from the next page's offset (a point id), which points deleted
+        while a batch is trashed don't affect. Vectors aren't scrolled through: only the stale
+        points' are fetched, when they're exported (see export_items_to_trash()).
+
+        Given a watermark, only points created between its cutoff and this one are scrolled
+        through (with a range filter, as in _count_points()): any older ones were already trashed.
+        """
+        batch_size = batch_size or get_cleanup_batch_size()
+        self._points_seen = self._stale_seen = 0
+        watermark = self.watermark or {}
+        self._full_scan = "cutoff" not in watermark
         if not self._collection_exists():
-            return []
+            return
 
         items = []
         offset: int | None = 0
@@ -72,8 +116,12 @@ class QdrantHandler(CleanupHandler):
             scroll_params: dict[str, Any] = {
                 "limit": 100,
                 "with_payload": True,
+                "with_vector": False,
                 "offset": offset,
             }
+            if not self._full_scan:
+                created_range = {"gte": watermark["cutoff"], "lt": cutoff.isoformat()}
+                scroll_params["filter"] = {"must": [{"key": "metadata.created_at", "range": created_range}]}
 
             result = self._http_request(
                 "POST",
@@ -90,6 +138,7 @@ class QdrantHandler(CleanupHandler):
                 # reached the end of the collection
                 break
 
+            self._points_seen += len(points)
             for point in points:
                 payload = point.get("payload") or {}
                 metadata = payload.get("metadata") or {}
@@ -117,6 +166,7 @@ class QdrantHandler(CleanupHandler):
                         point_date = point_date.replace(tzinfo=timezone.utc)
 
                     if point_date < cutoff:
+                        self._stale_seen += 1
                         items.append({
                             "id": point["id"],
                             "created_at": created_at,
@@ -125,30 +175,146 @@ class QdrantHandler(CleanupHandler):
                 except (ValueError, TypeError):
                     continue
 
+            while len(items) >= batch_size:
+                yield items[:batch_size]
+                items = items[batch_size:]
+
             offset = result_data.get("next_page_offset")
             if not offset:
                 break
 
-        return items
+        if items:
+            yield items
+
+    def _scan_position(self) -> dict[str, Any] | None:
+        """Record a watermark with no position: the next scan picks up from its cutoff alone."""
+        return {}
+
+    def _footprint(self, dry_run: bool) -> dict[str, int] | None:
+        """Count the points the scan scrolled through, less the stale ones it trashed (or, after an
+        incremental scan, count the collection's points), and size up the collection's directory
+        in the storage volume (if it's mounted where configured)."""
+        if self._full_scan:
+            footprint = {"items": self._points_seen - (0 if dry_run else self._stale_seen)}
+        else:
+            footprint = {"items": self._count_points() if self._collection_exists() else 0}
+        if (size := self._collection_size()) is not None:
+            footprint["bytes"] = size
+        return footprint
+
+    def _collection_size(self) -> int | None:
+        """Size up the collection's directory in the storage volume (None if it isn't mounted where configured)."""
+        collection_dir = get_storage("qdrant") / "collections" / get_qdrant_collection()
+        if not collection_dir.is_dir():
+            return None
+        size = 0
+        for dirpath, _, filenames in os.walk(collection_dir):
+            for filename in filenames:
+                try:
+                    size += os.lstat(os.path.join(dirpath, filename)).st_size
+                except OSError:
+                    continue
+        return size
+
+    def _count_points(self, created_range: dict[str, str] | None = None) -> int:
+        """Count the collection's points exactly (only those whose metadata.created_at falls
+        within `created_range`, a Qdrant datetime range, if given)."""
+        body: dict[str, Any] = {"exact": True}
+        if created_range:
+            body["filter"] = {"must": [{"key": "metadata.created_at", "range": created_range}]}
+        result = self._http_request("POST", f"/collections/{get_qdrant_collection()}/points/count", body)
+        return int((result.get("result") or {}).get("count", 0))
+
+    def _stats(self) -> dict[str, Any]:
+        """Count the collection's points, then those created in each week of age with count
+        requests (no points are fetched), stopping once every dated point is accounted for.
+
+        Points whose created_at Qdrant can't parse as a datetime are counted as undated.
+
+        Raises:
+            CleanupError: On HTTP errors, connection failures, or invalid responses.
+        """
+        histogram = AgeHistogram()
+        if not self._collection_exists():
+            return self._stats_result(histogram)
+
+        remaining = self._count_points()
+        for week in range(HISTOGRAM_WEEKS + 1):
+            if not remaining:
+                break
+            start, end = histogram.week_bounds(week)
+            created_range = {}
+            if start is not None:
+                created_range["gt"] = start.isoformat()
+            if end is not None:
+                created_range["lte"] = end.isoformat()
+            count = self._count_points(created_range)
+            histogram.add_to_week(week, count)
+            remaining -= count
+        histogram.add(None, max(0, remaining))
+
+        size = self._collection_size()
+        return self._stats_result(histogram) if size is None else self._stats_result(histogram, bytes=size)
+
+    def _retrieve_points(self, point_ids: list[Any]) -> dict[Any, dict[str, Any]]:
+        """Fetch points (with their payloads & vectors) by id, RETRIEVE_BATCH_SIZE per request.
+
+        Returns:
+            The points found, by id (points deleted since they were scrolled through are left out).
+        """
+        points: dict[Any, dict[str, Any]] = {}
+        for start in range(0, len(point_ids), RETRIEVE_BATCH_SIZE):
+            result = self._http_request(
+                "POST",
+                f"/collections/{get_qdrant_collection()}/points",
+                {"ids": point_ids[start:start + RETRIEVE_BATCH_SIZE], "with_payload": True, "with_vector": True},
+            )
+            for point in result.get("result") or []:
+                points[point.get("id")] = point
+        return points
 
     def export_items_to_trash(self, items: list[dict[str, Any]], retention: str) -> str:
-        """Export points to JSON in trash directory."""
+        """Export points to JSON in trash directory, recording each one in the trash catalog.
+
+        Points scrolled through without their vector (i.e. stale ones, see iter_stale_batches())
+        have it fetched first, so they can be restored; a wipe's points already carry theirs.
+        """
         trash_dir = get_trash_dir(self.name)
         filename = generate_trash_filename(len(items), "json")
-        trash_path = trash_dir / filename
-
-        export_data = {
+        trash_path = compressed_path(trash_dir / filename)
+
+        retrieved = self._retrieve_points([item["id"] for item in items if "vector" not in item])
+        records = []
+        for item in items:
+            # (points that already have their vector, or were deleted since the scroll, go as found)
+            point = retrieved.get(item["id"])
+            if point is not None and point.get("vector") is not None:
+                item = {**item, "payload": point.get("payload") or item["payload"], "vector": point["vector"]}
+            records.append(item)
+
+        header = {
             "exported_at": datetime.now(timezone.utc).isoformat(),
             "collection": get_qdrant_collection(),
-            "points": items,
         }
-
-        with open(trash_path, "w") as f:
-            json.dump(export_data, f, indent=2)
-
-        write_manifest(trash_dir, self.name, len(items), retention,
-                       get_trash_grace_period(),
-                       files=[trash_path])
+        spans = write_export(trash_path, header, {"points": records})
+
+        batch_id = write_manifest(trash_dir, self.name, len(items), retention,
+                                  get_trash_grace_period(),
+                                  files=[trash_path],
+                                  blobs=export_blobs(spans))
+
+        trashed: list[TrashedItem] = [
+            {
+                "kind": "point",
+                "native_id": str(item["id"]),
+                "created_at": item.get("created_at"),
+                "file": span.file,
+                "offset": span.offset,
+                "length": span.length,
+            }
+            for item, span in zip(items, spans["points"])
+        ]
+        record_trashed_items(trash_dir, batch_id, trashed)
 
         return str(trash_path)
 
@@ -169,6 +335,41 @@ class QdrantHandler(CleanupHandler):
             return len(point_ids)
         return 0
 
+    def _restore(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        """Upsert trashed points back into the collection, in batches of RESTORE_BATCH_SIZE.
+
+        Points exported without their vector (i.e. trashed before vectors were exported)
+        can't be re-inserted and are skipped.
+
+        Raises:
+            CleanupError: On HTTP errors, or if the collection doesn't exist.
+        """
+        if not self._collection_exists():
+            raise CleanupError(f"collection {get_qdrant_collection()} does not exist")
+
+        points = []
+        skipped = []
+        for item in items:
+            data = item["data"]
+            if not isinstance(data, dict) or data.get("vector") is None:
+                skipped.append(item["item_id"])
+                continue
+            points.append({"id": data["id"], "vector": data["vector"], "payload": data.get("payload") or {}})
+
+        restored = 0
+        for start in range(0, len(points), RESTORE_BATCH_SIZE):
+            batch = points[start:start + RESTORE_BATCH_SIZE]
+            result = self._http_request(
+                "PUT",
+                f"/collections/{get_qdrant_collection()}/points?wait=true",
+                {"points": batch}
+            )
+            if result.get("status") != "ok":
+                raise CleanupError(f"Qdrant upsert failed after restoring {restored} points: {result}")
+            restored += len(batch)
+
+        return {"storage": self.name, "restored": restored, "skipped": skipped}
+
     def _get_all_points(self) -> list[dict[str, Any]]:
         """Retrieve all points from the collection."""
         if not self._collection_exists():
@@ -181,6 +382,7 @@ class QdrantHandler(CleanupHandler):
             scroll_data: dict[str, Any] = {
                 "limit": 100,
                 "with_payload": True,
+                "with_vector": True,
             }
             if offset:
                 scroll_data["offset"] = offset
@@ -204,6 +406,7 @@ class QdrantHandler(CleanupHandler):
                 items.append({
                     "id": point["id"],
                     "payload": payload,
+                    "vector": point.get("vector"),
                 })
 
             offset = result_data.get("next_page_offset")
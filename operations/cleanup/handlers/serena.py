@@ -1,11 +1,26 @@
 """Serena memories cleanup handler."""
+import json
+import os
+import shutil
+import tarfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 from .base import CleanupHandler, CleanupError
-from ..trash import get_trash_dir, move_to_trash, write_manifest
-from ...config_loader import get_path, get_trash_grace_period
+from .. import state
+from ..catalog import TrashedItem
+from ..stats import AgeHistogram
+from ..trash import generate_trash_filename, get_trash_dir, move_to_trash, record_trashed_items, write_manifest
+from ...config_loader import (
+    get_cleanup_batch_size,
+    get_path,
+    get_trash_grace_period,
+    is_serena_trash_packing_enabled,
+)
+
+# index of the .serena/memories directories found by the last search (kept in .archives)
+DIR_INDEX_FILENAME = "serena-dirs.json"
 
 
 class SerenaHandler(CleanupHandler):
@@ -13,6 +28,12 @@ class SerenaHandler(CleanupHandler):
 
     name = "serena"
 
+    def __init__(self) -> None:
+        super().__init__()
+        # memory files the last scan listed, fresh & stale (see _footprint())
+        self._listed = {"items": 0, "bytes": 0}
+        self._listed_stale = {"items": 0, "bytes": 0}
+
     def _get_memories_root(self) -> Path:
         """Get root directory for scanning Serena memory files."""
         return get_path("serena_memories_root")
@@ -54,14 +75,47 @@ class SerenaHandler(CleanupHandler):
             if memories_dir.exists() and memories_dir.is_dir():
                 serena_dirs.append(memories_dir)
 
+        self._save_dir_index(memories_root, serena_dirs)
         return serena_dirs
 
-    def get_stale_items(self, cutoff: datetime) -> list[dict[str, Any]]:
-        """Find memory files older than cutoff based on mtime.
+    def _get_dir_index_path(self) -> Path:
+        """Get the path of the index of .serena/memories directories the last search found."""
+        return state.ARCHIVES_DIR / DIR_INDEX_FILENAME
+
+    def _save_dir_index(self, memories_root: Path, serena_dirs: list[Path]) -> None:
+        """Record the directories a search found (for --stats, see _cached_serena_dirs())."""
+        index_path = self._get_dir_index_path()
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps({"root": str(memories_root), "dirs": [str(d) for d in serena_dirs]}))
+            os.replace(tmp_path, index_path)
+        except OSError:
+            pass  # (the index only spares --stats a search)
+
+    def _cached_serena_dirs(self) -> list[Path]:
+        """Get the .serena/memories directories the last search found (e.g. in the last sweep),
+        searching anew if there's no index for the current memories root.
+
+        Projects created since the last search are missed until the next one.
+        """
+        try:
+            index = json.loads(self._get_dir_index_path().read_text())
+            if index["root"] == str(self._get_memories_root()):
+                return [Path(d) for d in index["dirs"] if os.path.isdir(d)]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return self._find_serena_dirs()
+
+    def iter_stale_batches(self, cutoff: datetime, batch_size: int | None = None) -> Iterator[list[dict[str, Any]]]:
+        """Find memory files older than cutoff based on mtime, yielding them batch_size at a time.
 
         Raises:
             CleanupError: On file system errors.
         """
+        batch_size = batch_size or get_cleanup_batch_size()
+        self._listed = {"items": 0, "bytes": 0}
+        self._listed_stale = {"items": 0, "bytes": 0}
         try:
             items = []
             cutoff_timestamp = cutoff.timestamp()
@@ -71,47 +125,196 @@ class SerenaHandler(CleanupHandler):
                 #   will always be at <project>/.serena/memories
                 project_name = memories_dir.parent.parent.name
 
-                for memory_file in memories_dir.glob("*.md"):
-                    mtime = memory_file.stat().st_mtime
-                    if mtime < cutoff_timestamp:
+                # (listed up front, as files are moved out of the directory as each batch is trashed)
+                for memory_file in list(memories_dir.glob("*.md")):
+                    st = memory_file.stat()
+                    self._listed["items"] += 1
+                    self._listed["bytes"] += st.st_size
+                    if st.st_mtime < cutoff_timestamp:
+                        self._listed_stale["items"] += 1
+                        self._listed_stale["bytes"] += st.st_size
                         items.append({
                             "path": memory_file,
                             "project": project_name,
-                            "mtime": datetime.fromtimestamp(mtime, tz=timezone.utc),
-                            "size": memory_file.stat().st_size,
+                            "mtime": datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+                            "size": st.st_size,
                         })
+                        if len(items) == batch_size:
+                            yield items
+                            items = []
 
-            return items
+            if items:
+                yield items
         except OSError as e:
             raise CleanupError(f"Failed to scan Serena memories: {e}") from e
 
     def export_items_to_trash(self, items: list[dict[str, Any]], retention: str) -> str:
-        """Move files to trash, preserving project structure.
+        """Move files to trash, preserving project structure (or, with `trash.pack_serena` set,
+        pack the batch into one tar archive, see _pack_to_trash()).
 
         Raises:
             CleanupError: On file system errors.
         """
+        if is_serena_trash_packing_enabled():
+            return self._pack_to_trash(items, retention)
         try:
             trash_dir = get_trash_dir(self.name)
             moved_files: list[Path] = []
+            trashed: list[TrashedItem] = []
 
             for item in items:
                 dest = move_to_trash(item["path"], self.name, project_name=item["project"])
                 moved_files.append(dest)
+                # the catalog remembers each file's original path (e.g. to restore it later)
+                trashed.append({
+                    "kind": "file",
+                    "native_id": str(item["path"]),
+                    "created_at": item["mtime"].isoformat(),
+                    "file": str(dest),
+                    "offset": None,
+                    "length": None,
+                })
 
-            write_manifest(trash_dir, self.name, len(items), retention,
-                           get_trash_grace_period(),
-                           files=moved_files)
+            batch_id = write_manifest(trash_dir, self.name, len(items), retention,
+                                      get_trash_grace_period(),
+                                      files=moved_files)
+            record_trashed_items(trash_dir, batch_id, trashed)
 
             return str(trash_dir)
         except OSError as e:
             raise CleanupError(f"Failed to move files to trash: {e}") from e
 
+    def _pack_to_trash(self, items: list[dict[str, Any]], retention: str) -> str:
+        """Pack memory files into a single (uncompressed) tar archive in the trash, then delete them.
+
+        Each batch gets its own archive (and manifest entry), i.e. a run has one archive per
+        `cleanup.batch_size` stale files, rather than one in all: a batch's originals are only
+        deleted once its archive is durable & catalogued, so appending the next batch would mean
+        rewriting an archive (and manifest entry) that already holds trashed files.
+
+        Members are named <project>/<file name> (suffixed on collisions within the batch), and
+        each one's data offset & size are recorded as its byte span in the trash catalog, so the
+        catalog indexes the archive: purging it is one unlink, and restoring a file reads just
+        its member's bytes.
+
+        Raises:
+            CleanupError: On file system errors.
+        """
+        try:
+            trash_dir = get_trash_dir(self.name)
+            archive_path = trash_dir / generate_trash_filename(len(items), "tar")
+
+            member_names: list[str] = []
+            taken: set[str] = set()
+            with open(archive_path, "wb") as f:
+                with tarfile.open(fileobj=f, mode="w") as tar:
+                    for i, item in enumerate(items):
+                        name = f"{item['project']}/{item['path'].name}"
+                        if name in taken:
+                            name = f"{item['project']}-{i}/{item['path'].name}"
+                        tar.add(str(item["path"]), arcname=name, recursive=False)
+                        member_names.append(name)
+                        taken.add(name)
+                # durable before the originals are deleted
+                f.flush()
+                os.fsync(f.fileno())
+
+            # read back where each member's data landed (header sizes vary, e.g. with long names)
+            with tarfile.open(archive_path) as tar:
+                spans = {member.name: (member.offset_data, member.size) for member in tar}
+
+            trashed: list[TrashedItem] = [
+                {
+                    "kind": "file",
+                    "native_id": str(item["path"]),
+                    "created_at": item["mtime"].isoformat(),
+                    "file": str(archive_path),
+                    "offset": spans[name][0],
+                    "length": spans[name][1],
+                }
+                for item, name in zip(items, member_names)
+            ]
+
+            batch_id = write_manifest(trash_dir, self.name, len(items), retention,
+                                      get_trash_grace_period(),
+                                      files=[archive_path])
+            record_trashed_items(trash_dir, batch_id, trashed)
+
+            # the files are safely archived: remove the originals
+            for item in items:
+                Path(item["path"]).unlink(missing_ok=True)
+
+            return str(archive_path)
+        except (OSError, tarfile.TarError) as e:
+            raise CleanupError(f"Failed to pack files into trash archive: {e}") from e
+
     def delete_items_from_storage(self, items: list[dict[str, Any]]) -> int:
         """Files already moved by export_items_to_trash, just return count."""
         # Files are moved (not copied) by export_items_to_trash
         return len(items)
 
+    def _footprint(self, dry_run: bool) -> dict[str, int] | None:
+        """Count the memory files the scan listed, less the stale ones it trashed."""
+        if dry_run:
+            return dict(self._listed)
+        return {key: self._listed[key] - self._listed_stale[key] for key in self._listed}
+
+    def _stats(self) -> dict[str, Any]:
+        """Histogram the memory files' ages (by mtime, as the scan judges them) and size them up,
+        listing only the directories in the index the last search left (see _cached_serena_dirs()),
+        rather than searching the whole memories root.
+
+        Raises:
+            CleanupError: On file system errors.
+        """
+        histogram = AgeHistogram()
+        size = 0
+        try:
+            for memories_dir in self._cached_serena_dirs():
+                with os.scandir(memories_dir) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".md") and entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            histogram.add(datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+                            size += st.st_size
+        except OSError as e:
+            raise CleanupError(f"Failed to list Serena memories: {e}") from e
+        return self._stats_result(histogram, bytes=size)
+
+    def _restore(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        """Move trashed memory files back to their original paths (or, for files packed into a
+        trash archive, write their member's bytes back, keeping their original mtime).
+
+        Files whose original path is taken again (e.g. the memory was re-created) are skipped
+        rather than overwritten.
+
+        Raises:
+            CleanupError: On file system errors.
+        """
+        restored = 0
+        skipped = []
+        try:
+            for item in items:
+                source, dest = Path(item["file"]), Path(item["native_id"] or "")
+                packed = item["offset"] is not None
+                if (not item["native_id"] or dest.exists()
+                        or (item["raw"] is None if packed else not source.is_file())):
+                    skipped.append(item["item_id"])
+                    continue
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                if packed:
+                    dest.write_bytes(item["raw"])
+                    if item["created_at"]:
+                        mtime = datetime.fromisoformat(item["created_at"]).timestamp()
+                        os.utime(dest, (mtime, mtime))
+                else:
+                    shutil.move(str(source), str(dest))
+                restored += 1
+        except OSError as e:
+            raise CleanupError(f"Failed to restore files from trash: {e}") from e
+
+        return {"storage": self.name, "restored": restored, "skipped": skipped}
+
     def _wipe(self, backup: bool) -> dict[str, Any]:
         """Completely erase all Serena memory files.
 
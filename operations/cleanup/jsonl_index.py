@@ -0,0 +1,190 @@
+"""Byte-offset sidecar index for large JSONL files (i.e. Memory MCP's knowledge graph).
+
+The index maps each timestamped line's byte offset & length to its created_at, so
+stale lines can be found by scanning a compact array of fixed-width records and
+then seeking straight to them in the (mmap'd) JSONL file, instead of reading and
+classifying every line.
+
+Index file layout:
+
+    header:  magic, version, indexed_size, mtime_ns, head SHA-256, tail SHA-256
+    records: (line offset, line length, created_at in µs since the Unix epoch), repeated
+
+The header pins the index to the exact bytes it was built from:
+
+- size + mtime unchanged and head/tail checksums match → index is current
+- file grew but head/tail checksums of the indexed prefix still match → the writer
+  only appended, so the index is extended from `indexed_size` onward
+- anything else (rewrite, truncation, edits) → the index is rebuilt from scratch
+
+A writer that rewrites the file can instead index the new version's lines as it writes
+them (see add_line()), then save() the index once the new file is in place.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Iterator
+
+INDEX_MAGIC = b"BIDX"
+INDEX_VERSION = 1
+
+# number of bytes hashed at each end of the indexed prefix to detect rewrites
+CHECKSUM_SPAN = 4096
+
+_HEADER = struct.Struct("<4sHQq32s32s")
+_RECORD = struct.Struct("<QIq")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# returns a line's created_at (None for lines without a usable timestamp)
+TimestampReader = Callable[[bytes], datetime | None]
+
+
+def to_epoch_us(dt: datetime) -> int:
+    """Convert a timezone-aware datetime to microseconds since the Unix epoch."""
+    return (dt - _EPOCH) // _MICROSECOND
+
+
+class JsonlOffsetIndex:
+    """Sidecar index of (offset, length, created_at) for the timestamped lines of a JSONL file."""
+
+    def __init__(self, jsonl_path: Path, index_path: Path, read_timestamp: TimestampReader):
+        self.jsonl_path = jsonl_path
+        self.index_path = index_path
+        self._read_timestamp = read_timestamp
+        self._records = bytearray()
+        self._indexed_size = 0
+
+    def refresh(self) -> str:
+        """Bring the index in line with the JSONL file, persisting any changes.
+
+        Returns:
+            What was done: "current", "extended", or "rebuilt".
+
+        Raises:
+            OSError: On file I/O errors.
+        """
+        header = self._load()
+        file_size = self.jsonl_path.stat().st_size
+
+        if header is not None:
+            _, _, indexed_size, mtime_ns, head_sha, tail_sha = header
+            if file_size >= indexed_size and (head_sha, tail_sha) == self._checksums(indexed_size):
+                if file_size == indexed_size and mtime_ns == self.jsonl_path.stat().st_mtime_ns:
+                    return "current"
+                self._extend(indexed_size)
+                self._save()
+                return "extended"
+
+        self._records = bytearray()
+        self._extend(0)
+        self._save()
+        return "rebuilt"
+
+    def iter_older_than(self, cutoff: datetime) -> Iterator[tuple[int, int]]:
+        """Yield (offset, length) of every indexed line with created_at before cutoff."""
+        cutoff_us = to_epoch_us(cutoff)
+        for offset, length, created_us in _RECORD.iter_unpack(self._records):
+            if created_us < cutoff_us:
+                yield offset, length
+
+    def iter_created_at(self) -> Iterator[datetime]:
+        """Yield the created_at of every indexed line."""
+        for _, _, created_us in _RECORD.iter_unpack(self._records):
+            yield _EPOCH + created_us * _MICROSECOND
+
+    def read_lines(self, spans: Iterator[tuple[int, int]]) -> Iterator[bytes]:
+        """Yield the raw JSONL lines at the given (offset, length) spans via mmap."""
+        if self.jsonl_path.stat().st_size == 0:
+            return  # empty files can't be mmap'd
+
+        with open(self.jsonl_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset, length in spans:
+                yield mapped[offset:offset + length]
+
+    def add_line(self, offset: int, line: bytes) -> None:
+        """Index a complete line at byte offset `offset` (right after the lines indexed so far),
+        e.g. as a rewrite writes it."""
+        created_at = self._read_timestamp(line) if line.strip() else None
+        if created_at is not None:
+            self._records += _RECORD.pack(offset, len(line), to_epoch_us(created_at))
+        self._indexed_size = offset + len(line)
+
+    def save(self) -> None:
+        """Persist the index, pinned to the file's current first `indexed_size` bytes.
+
+        Raises:
+            OSError: On file I/O errors.
+        """
+        self._save()
+
+    def __len__(self) -> int:
+        return len(self._records) // _RECORD.size
+
+    def _load(self) -> tuple | None:
+        """Load the index file into memory, returning its header (None if absent, corrupt or outdated)."""
+        try:
+            data = self.index_path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        if len(data) < _HEADER.size:
+            return None
+        header = _HEADER.unpack_from(data)
+        if header[0] != INDEX_MAGIC or header[1] != INDEX_VERSION:
+            return None
+
+        records = data[_HEADER.size:]
+        records = records[:len(records) - len(records) % _RECORD.size]
+        self._records = bytearray(records)
+        self._indexed_size = header[2]
+        return header
+
+    def _extend(self, start: int) -> None:
+        """Index every complete line from byte offset `start` to the end of the file."""
+        self._indexed_size = start
+        with open(self.jsonl_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer is mid-line: pick it up on the next refresh
+                self.add_line(self._indexed_size, line)
+
+    def _checksums(self, size: int) -> tuple[bytes, bytes]:
+        """SHA-256 of the first and last CHECKSUM_SPAN bytes of the file's first `size` bytes."""
+        with open(self.jsonl_path, "rb") as f:
+            head = f.read(min(size, CHECKSUM_SPAN))
+            f.seek(max(0, size - CHECKSUM_SPAN))
+            tail = f.read(min(size, CHECKSUM_SPAN))
+        return hashlib.sha256(head).digest(), hashlib.sha256(tail).digest()
+
+    def _save(self) -> None:
+        """Atomically write the index file (header + records)."""
+        head_sha, tail_sha = self._checksums(self._indexed_size)
+        header = _HEADER.pack(
+            INDEX_MAGIC,
+            INDEX_VERSION,
+            self._indexed_size,
+            self.jsonl_path.stat().st_mtime_ns,
+            head_sha,
+            tail_sha,
+        )
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_fd, tmp_name = tempfile.mkstemp(dir=self.index_path.parent, prefix=f".{self.index_path.name}.")
+        try:
+            with os.fdopen(tmp_fd, "wb") as f:
+                f.write(header)
+                f.write(self._records)
+            os.replace(tmp_name, self.index_path)
+        except OSError:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
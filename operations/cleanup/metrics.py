@@ -0,0 +1,164 @@
+"""Per-phase cleanup instrumentation & the sweep metrics log.
+
+Each handler's cleanup records, per phase:
+
+- scan: finding stale items (iter_stale_batches())
+- export: writing them to the trash
+- delete: deleting them from storage
+- finalize: the post-cleanup hook (e.g. claude-mem's VACUUM)
+
+the wall time spent in it, items handled (& items/sec), bytes read & written, and the
+process's peak RSS so far once it was done. Results carry them under "metrics" (so they're part
+of `sweep --verbose`'s JSON), and every sweep appends a record to .archives/sweep-metrics.jsonl
+for charting trends across runs (dry runs marked as such; only the last METRICS_LOG_MAX_RECORDS
+are kept).
+
+Bytes read/written come from the calling thread's I/O counters (/proc/thread-self/io's rchar &
+wchar, i.e. all reads & writes, including sockets and page cache hits), so they're attributed to
+the right handler even when backends are cleaned concurrently; they're None where that file
+doesn't exist (e.g. macOS). Peak RSS (process_peak_rss_bytes) is the whole process's
+high-water mark since it started, not the phase's own: it can't be attributed to a phase, as
+backends share the process (and are cleaned concurrently), so it only shows whether a phase
+pushed memory use to a new high.
+"""
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Iterable, Iterator, TypeVar
+
+from . import state
+from .profiling import HandlerProfiler
+
+METRICS_LOG_FILENAME = "sweep-metrics.jsonl"
+# records kept in the metrics log (the oldest are dropped as new ones are appended)
+METRICS_LOG_MAX_RECORDS = 1000
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _thread_io() -> tuple[int, int] | None:
+    """Get the calling thread's (bytes read, bytes written) so far (None if unsupported)."""
+    try:
+        with open("/proc/thread-self/io") as f:
+            counters = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def process_peak_rss_bytes() -> int:
+    """Get the process's peak resident set size (since it started) in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # (reported in bytes on macOS, KiB elsewhere)
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PhaseMetrics:
+    """Accumulates wall time, items, I/O & the process's peak RSS for the phases of one handler's cleanup.
+
+    A phase may be entered repeatedly (e.g. once per batch): its measurements add up.
+
+    Args:
+        profiler: Also profiles each phase (with `sweep --profile`).
+    """
+
+    def __init__(self, profiler: HandlerProfiler | None = None) -> None:
+        self.phases: dict[str, dict[str, Any]] = {}
+        self.profiler = profiler
+
+    @contextmanager
+    def phase(self, name: str, items: int = 0) -> Iterator[dict[str, int]]:
+        """Measure the block as (another stretch of) phase `name`, which handled `items` items.
+
+        Yields:
+            A dict whose "items" the block may update, if it only learns how many it handled as it goes.
+        """
+        counts = {"items": items}
+        io_before = _thread_io()
+        start = time.perf_counter()
+        try:
+            with self.profiler.profile(name) if self.profiler else nullcontext():
+                yield counts
+        finally:
+            self._add(name, time.perf_counter() - start, counts["items"], io_before)
+
+    def iter_phase(self, name: str, batches: Iterable[list[T]]) -> Iterator[list[T]]:
+        """Yield each batch, measuring the time taken to produce it as phase `name`."""
+        iterator = iter(batches)
+        while True:
+            with self.phase(name) as counts:
+                batch = next(iterator, None)
+                counts["items"] = len(batch) if batch is not None else 0
+            if batch is None:
+                return
+            yield batch
+
+    def _add(self, name: str, seconds: float, items: int, io_before: tuple[int, int] | None) -> None:
+        phase = self.phases.setdefault(name, {
+            "seconds": 0.0, "items": 0, "bytes_read": 0, "bytes_written": 0, "process_peak_rss_bytes": 0,
+        })
+        phase["seconds"] += seconds
+        phase["items"] += items
+        io_after = _thread_io()
+        if io_before is None or io_after is None:
+            phase["bytes_read"] = phase["bytes_written"] = None
+        elif phase["bytes_read"] is not None:
+            phase["bytes_read"] += io_after[0] - io_before[0]
+            phase["bytes_written"] += io_after[1] - io_before[1]
+        phase["process_peak_rss_bytes"] = process_peak_rss_bytes()
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Get each phase's measurements, plus its throughput ("items_per_sec")."""
+        return {
+            name: {
+                **phase,
+                "seconds": round(phase["seconds"], 6),
+                "items_per_sec": round(phase["items"] / phase["seconds"], 1) if phase["seconds"] else None,
+            }
+            for name, phase in self.phases.items()
+        }
+
+
+def append_metrics_log(record: dict[str, Any], max_records: int = METRICS_LOG_MAX_RECORDS) -> None:
+    """Append a sweep's metrics to .archives/sweep-metrics.jsonl (one JSON object per line),
+    keeping only the last max_records.
+
+    The log is only for charting trends, so failing to write it (e.g. on a full disk) is logged
+    as a warning instead of failing the sweep it records.
+    """
+    path = state.ARCHIVES_DIR / METRICS_LOG_FILENAME
+    try:
+        state.ARCHIVES_DIR.mkdir(parents=True, exist_ok=True)
+        with open(path, "a+") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.seek(0)
+            lines = f.readlines()
+        if len(lines) > max_records:
+            # (rewritten atomically, so a crash midway leaves the log as it was)
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                f.writelines(lines[-max_records:])
+            os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Couldn't write the metrics log %s: %s", path, e)
+
+
+def read_metrics_log() -> list[dict[str, Any]]:
+    """Load every sweep's metrics from the log, oldest first (skipping any corrupt lines)."""
+    records = []
+    try:
+        with open(state.ARCHIVES_DIR / METRICS_LOG_FILENAME) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except OSError:
+        pass
+    return records
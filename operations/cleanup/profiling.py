@@ -0,0 +1,211 @@
+"""Built-in sweep profiling (`sweep --profile[=cpu|mem|all]`).
+
+Every measured phase of a handler's cleanup (see metrics.py) is profiled, and the results are
+written to .archives/profiles/<run>/ once the sweep is done:
+
+- <handler>.pstats: cProfile stats across all the handler's phases (load with pstats, snakeviz, ...)
+- <handler>.alloc.txt: per phase, the peak memory traced by tracemalloc and the top
+  TOP_ALLOCATIONS source lines by memory allocated (net of what was freed)
+- <handler>.collapsed: with --profile-collapsed, call stacks sampled every SAMPLE_INTERVAL
+  seconds, rooted at the phase, in the collapsed format flamegraph.pl/speedscope/inferno read
+
+Sweep-wide phases (emptying the trash) are profiled as "sweep".
+
+cProfile & tracemalloc are process-wide (as of Python 3.12, only one cProfile profiler may be
+active at a time), so handlers are cleaned up one at a time while profiling.
+"""
+import cProfile
+import logging
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Iterator
+
+from . import state
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIRNAME = "profiles"
+# allocation sites listed per phase
+TOP_ALLOCATIONS = 25
+# stack frames tracemalloc records per allocation
+TRACEMALLOC_FRAMES = 10
+# seconds between stack samples for collapsed stacks
+SAMPLE_INTERVAL = 0.001
+
+MODES = ("cpu", "mem", "all")
+
+
+def _frame_label(frame: FrameType) -> str:
+    """Name a frame for a collapsed stack (which can't contain ';')."""
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}:{frame.f_lineno}".replace(";", ",")
+
+
+class _StackSampler:
+    """Samples a thread's call stack every SAMPLE_INTERVAL seconds (from a helper thread)."""
+
+    def __init__(self, thread_id: int, root: str, stacks: Counter[str]):
+        self.thread_id = thread_id
+        self.root = root
+        self.stacks = stacks
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> "_StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frame: FrameType | None = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join([self.root, *reversed(frames)])] += 1
+
+
+class HandlerProfiler:
+    """Profiles one handler's phases (see PhaseMetrics), accumulating across repeated phases."""
+
+    def __init__(self, name: str, cpu: bool, mem: bool, collapsed: bool):
+        self.name = name
+        self.cpu = cpu
+        self.mem = mem
+        self.collapsed = collapsed
+        self._profile = cProfile.Profile() if cpu else None
+        self._profiled = False
+        # per phase: the peak traced bytes, and each allocation site's net bytes & allocations
+        self._peaks: dict[str, int] = {}
+        self._allocations: dict[str, Counter[str]] = {}
+        self._allocation_counts: dict[str, Counter[str]] = {}
+        self._stacks: Counter[str] = Counter()
+
+    @contextmanager
+    def profile(self, phase: str) -> Iterator[None]:
+        """Profile the block as (another stretch of) `phase`."""
+        before = None
+        if self.mem and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+
+        try:
+            with ExitStack() as stack:
+                if self.collapsed:
+                    stack.enter_context(_StackSampler(threading.get_ident(), phase, self._stacks))
+                if self._enable_cpu():
+                    stack.callback(self._profile.disable)  # type: ignore[union-attr]
+                yield
+        finally:
+            if before is not None:
+                self._record_allocations(phase, before)
+
+    def _enable_cpu(self) -> bool:
+        if not self._profile:
+            return False
+        try:
+            self._profile.enable()
+        except ValueError as e:
+            # (e.g. another profiler/debugger is already active)
+            logger.warning("Couldn't profile %s: %s", self.name, e)
+            return False
+        self._profiled = True
+        return True
+
+    def _record_allocations(self, phase: str, before: tracemalloc.Snapshot) -> None:
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peaks[phase] = max(self._peaks.get(phase, 0), peak)
+        after = tracemalloc.take_snapshot()
+        sizes = self._allocations.setdefault(phase, Counter())
+        counts = self._allocation_counts.setdefault(phase, Counter())
+        for diff in after.compare_to(before, "lineno"):
+            # (leaving out the profiling's own allocations)
+            if diff.traceback[0].filename in (tracemalloc.__file__, __file__):
+                continue
+            site = str(diff.traceback)
+            sizes[site] += diff.size_diff
+            counts[site] += diff.count_diff
+
+    def write(self, directory: Path) -> list[Path]:
+        """Write the handler's reports to `directory`.
+
+        Returns:
+            The paths written.
+        """
+        written = []
+        if self._profile and self._profiled:
+            path = directory / f"{self.name}.pstats"
+            self._profile.dump_stats(path)
+            written.append(path)
+
+        if self._peaks:
+            path = directory / f"{self.name}.alloc.txt"
+            lines = []
+            for phase, peak in self._peaks.items():
+                lines.append(f"== {phase}: peak traced memory {peak} bytes")
+                lines.append(f"   top {TOP_ALLOCATIONS} allocation sites (net bytes, net allocations):")
+                for site, size in self._allocations[phase].most_common(TOP_ALLOCATIONS):
+                    lines.append(f"   {size:>12} {self._allocation_counts[phase][site]:>8}  {site}")
+                lines.append("")
+            path.write_text("\n".join(lines))
+            written.append(path)
+
+        if self._stacks:
+            path = directory / f"{self.name}.collapsed"
+            path.write_text("".join(f"{stack} {count}\n" for stack, count in self._stacks.items()))
+            written.append(path)
+        return written
+
+
+class SweepProfiler:
+    """Profiles a sweep's handlers, writing each one's reports to .archives/profiles/<run>/.
+
+    Args:
+        mode: What to profile: "cpu" (cProfile), "mem" (tracemalloc) or "all" (both).
+        collapsed: Also sample call stacks, for flame graphs.
+    """
+
+    def __init__(self, mode: str = "all", collapsed: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode} (use one of {', '.join(MODES)})")
+        self.cpu = mode in ("cpu", "all")
+        self.mem = mode in ("mem", "all")
+        self.collapsed = collapsed
+        run = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%S")
+        self.directory = state.ARCHIVES_DIR / PROFILES_DIRNAME / run
+        self._handlers: list[HandlerProfiler] = []
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start tracing allocations (if profiling memory)."""
+        if self.mem and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracing = True
+
+    def for_handler(self, name: str) -> HandlerProfiler:
+        """Get a profiler for one handler's (or the sweep's own) phases."""
+        profiler = HandlerProfiler(name, self.cpu, self.mem, self.collapsed)
+        self._handlers.append(profiler)
+        return profiler
+
+    def finish(self) -> list[Path]:
+        """Stop tracing and write every handler's reports.
+
+        Returns:
+            The paths written.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return [path for profiler in self._handlers for path in profiler.write(self.directory)]
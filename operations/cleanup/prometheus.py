@@ -0,0 +1,112 @@
+"""Prometheus textfile export of memory-store & sweep metrics (`sweep --metrics-out <path>`).
+
+After each sweep, metrics are written (atomically, so node_exporter's textfile collector never
+reads a partial file) in the Prometheus text exposition format:
+
+- memory stores: each backend's items & on-disk bytes after its last complete cleanup (from
+  its scan, see CleanupHandler._footprint()) and when its cleanup last succeeded
+- the sweep: items each backend found expired & trashed, time spent in each phase (see
+  metrics.py), trash purged, and the trash's size by backend
+
+Store sizes & success times come from state.json, so backends a sweep didn't run (e.g. with
+-s) keep reporting their last known values.
+"""
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from .state import State, load_state
+from .trash import trash_sizes
+
+PREFIX = "bureau"
+
+_Sample = tuple[dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    # (whole numbers in full, rather than in exponent notation)
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_samples(name: str, help_text: str, samples: list[_Sample]) -> list[str]:
+    """Format a gauge family (HELP & TYPE lines, then one line per sample)."""
+    lines = [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} gauge"]
+    for labels, value in samples:
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        lines.append(f"{PREFIX}_{name}{{{label_text}}} {_format_value(value)}" if label_text
+                     else f"{PREFIX}_{name} {_format_value(value)}")
+    return lines
+
+
+def _timestamp(iso: str) -> float | None:
+    try:
+        return datetime.fromisoformat(iso).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def render_metrics(result: dict[str, Any], state: State, trash: dict[str, int]) -> str:
+    """Render a sweep's metrics (plus the stores' last known sizes) in the text exposition format.
+
+    Args:
+        result: The sweep's run_cleanup() result.
+        state: state.json as updated by the sweep.
+        trash: Trash size in bytes by backend (see trash.trash_sizes()).
+    """
+    footprints = state.get("footprints") or {}
+    last_success = state.get("last_success") or {}
+    backend_results = [r for r in result.get("results", []) if r.get("storage")]
+
+    families: list[tuple[str, str, list[_Sample]]] = [
+        ("memory_items", "Items held by each memory store after its last complete cleanup.",
+         [({"backend": b}, f["items"]) for b, f in sorted(footprints.items()) if "items" in f]),
+        ("memory_bytes", "On-disk bytes of each memory store after its last complete cleanup.",
+         [({"backend": b}, f["bytes"]) for b, f in sorted(footprints.items()) if "bytes" in f]),
+        ("memory_last_success_timestamp_seconds", "When a cleanup of each memory store last succeeded.",
+         [({"backend": b}, ts) for b, iso in sorted(last_success.items()) if (ts := _timestamp(iso)) is not None]),
+        ("sweep_expired_items", "Stale items each backend's cleanup found in the last sweep.",
+         [({"backend": r["storage"]}, r.get("metrics", {}).get("scan", {}).get("items", 0))
+          for r in backend_results if "metrics" in r]),
+        ("sweep_trashed_items", "Items each backend's cleanup moved to the trash in the last sweep.",
+         [({"backend": r["storage"]}, r.get("deleted", 0)) for r in backend_results if "error" not in r]),
+        ("sweep_errors", "Whether each backend's cleanup failed in the last sweep.",
+         [({"backend": r["storage"]}, 1 if r.get("error") else 0) for r in backend_results]),
+        ("sweep_phase_seconds", "Seconds each backend's cleanup spent in each phase in the last sweep.",
+         [({"backend": r["storage"], "phase": phase}, m["seconds"])
+          for r in backend_results for phase, m in (r.get("metrics") or {}).items()]),
+        ("sweep_duration_seconds", "Seconds the last sweep took.",
+         [({}, result.get("metrics", {}).get("seconds", 0))]),
+        ("sweep_trash_purged_items", "Trashed files purged (expired or evicted) by the last sweep.",
+         [({}, result.get("trash_emptied", 0) + result.get("trash_evicted", 0))]),
+        ("sweep_trash_purged_bytes", "Bytes freed by purging the trash in the last sweep.",
+         [({}, result.get("trash_bytes_freed", 0))]),
+        ("trash_bytes", "Bytes held in each backend's trash.",
+         [({"backend": b}, size) for b, size in sorted(trash.items())]),
+    ]
+    if (last_run := _timestamp(state.get("last_cleanup_run", ""))) is not None:
+        families.append(("sweep_last_run_timestamp_seconds", "When the last full sweep ran.", [({}, last_run)]))
+
+    lines = []
+    for name, help_text, samples in families:
+        if samples:
+            lines.extend(_format_samples(name, help_text, samples))
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: Path, text: str) -> None:
+    """Atomically replace `path` with `text` (via a hidden temporary file in the same directory)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def export_metrics(path: Path, result: dict[str, Any]) -> None:
+    """Write a sweep's metrics to the Prometheus textfile at `path`."""
+    write_textfile(path, render_metrics(result, load_state(), trash_sizes()))
@@ -0,0 +1,120 @@
+"""File deletion for trash purges, built on os.scandir().
+
+Each helper counts what it deletes as it goes (a single traversal, with no separate
+counting pass), and returns (files removed, bytes freed):
+
+- directory entries' types come from scandir itself (no stat() per entry), and sizes from
+  one lstat() per file
+- files whose size is already known (i.e. recorded in their manifest entry) are deleted
+  with a lone unlink()
+
+run_parallel() fans purges of independent directories (e.g. one per backend) out across
+a thread pool, as deletion is bound by file system latency rather than CPU.
+"""
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# threads used to purge directories concurrently
+PURGE_WORKERS = 8
+
+
+def _scan(root: str) -> Iterator[os.DirEntry]:
+    """Yield every entry under root, each directory *after* its contents (so it can then be removed)."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path)
+            yield entry
+
+
+def remove_tree(path: Path | str) -> tuple[int, int]:
+    """Delete a directory and everything in it in one traversal.
+
+    Returns:
+        (files removed, bytes freed); (0, 0) if the directory doesn't exist.
+    """
+    files = freed = 0
+    try:
+        for entry in _scan(str(path)):
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    os.rmdir(entry.path)
+                    continue
+                size = entry.stat(follow_symlinks=False).st_size
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            files += 1
+            freed += size
+        os.rmdir(path)
+    except FileNotFoundError:
+        pass
+    return files, freed
+
+
+def remove_path(path: Path | str, size: int | None = None) -> tuple[int, int]:
+    """Delete a file (or a whole directory tree).
+
+    Args:
+        size: The file's size if already known, sparing a stat() (it's then a single unlink()).
+
+    Returns:
+        (files removed, bytes freed); (0, 0) if nothing was there.
+    """
+    try:
+        if size is None:
+            st = os.lstat(path)
+            if stat.S_ISDIR(st.st_mode):
+                return remove_tree(path)
+            size = st.st_size
+        os.unlink(path)
+    except FileNotFoundError:
+        return 0, 0
+    except (IsADirectoryError, PermissionError):
+        # unlink() of a directory (EISDIR on Linux, EPERM on macOS)
+        if not os.path.isdir(path):
+            raise
+        return remove_tree(path)
+    return 1, size
+
+
+def remove_files_older_than(root: Path | str, mtime: float, keep: Iterable[str] = ()) -> tuple[int, int]:
+    """Delete every file under root last modified before `mtime` (except those named in `keep`),
+    in one traversal; directories are left in place.
+
+    Returns:
+        (files removed, bytes freed).
+    """
+    keep = set(keep)
+    files = freed = 0
+    try:
+        for entry in _scan(str(root)):
+            if entry.name in keep or entry.is_dir(follow_symlinks=False):
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+                if st.st_mtime >= mtime:
+                    continue
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            files += 1
+            freed += st.st_size
+    except FileNotFoundError:
+        pass
+    return files, freed
+
+
+def run_parallel(func: Callable[[T], R], args: Iterable[T]) -> list[R]:
+    """Call func on each argument concurrently (in a thread pool), returning results in order."""
+    args = list(args)
+    if len(args) <= 1:
+        return [func(arg) for arg in args]
+    with ThreadPoolExecutor(max_workers=min(PURGE_WORKERS, len(args))) as pool:
+        return list(pool.map(func, args))
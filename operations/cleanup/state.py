@@ -1,7 +1,8 @@
 """State management for Bureau cleanup."""
 import json
 from datetime import datetime, timezone, timedelta
-from typing import TypedDict
+from pathlib import Path
+from typing import Any, Callable, TypedDict
 
 from ..config_loader import get_archives_dir, get_state_path
 
@@ -9,19 +10,43 @@ from ..config_loader import get_archives_dir, get_state_path
 class State(TypedDict, total=False):
     last_cleanup_run: str
     last_trash_empty: str
+    interrupted_backends: list[str]  # backends whose last cleanup ran out of budget, resumed by the next sweep
+    watermarks: dict[str, dict[str, Any]]  # per backend: how far its last complete scan got (see CleanupHandler.watermark)
+    footprints: dict[str, dict[str, int]]  # per backend: items & bytes held after its last complete cleanup
+    last_success: dict[str, str]  # per backend: when a cleanup of it last succeeded
 
 
-ARCHIVES_DIR = get_archives_dir()
-STATE_PATH = get_state_path()
+# .archives & state.json paths, resolved on first use (see __getattr__()) rather than on import
+ARCHIVES_DIR: Path
+STATE_PATH: Path
+
+_LAZY_PATHS: dict[str, Callable[[], Path]] = {
+    "ARCHIVES_DIR": get_archives_dir,
+    "STATE_PATH": get_state_path,
+}
+
+
+def __getattr__(name: str) -> Path:
+    """Resolve ARCHIVES_DIR/STATE_PATH the first time they're accessed, keeping the result."""
+    if name not in _LAZY_PATHS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    path = globals()[name] = _LAZY_PATHS[name]()
+    return path
+
+
+def _path(name: str) -> Path:
+    # (module globals don't go through __getattr__(), so this module's own code reads them here)
+    return globals()[name] if name in globals() else __getattr__(name)
 
 
 def load_state() -> State:
     """Load state from .archives/state.json."""
-    if not STATE_PATH.exists():
+    state_path = _path("STATE_PATH")
+    if not state_path.exists():
         return {}
 
     try:
-        with open(STATE_PATH) as f:
+        with open(state_path) as f:
             return json.load(f)
     except (json.JSONDecodeError, IOError):
         return {}
@@ -29,12 +54,12 @@ def load_state() -> State:
 
 def save_state(updates: State) -> None:
     """Update state file with latest values."""
-    ARCHIVES_DIR.mkdir(parents=True, exist_ok=True)
+    _path("ARCHIVES_DIR").mkdir(parents=True, exist_ok=True)
 
     current = load_state()
     current.update(updates)
 
-    with open(STATE_PATH, "w") as f:
+    with open(_path("STATE_PATH"), "w") as f:
         json.dump(current, f, indent=2)
 
 
@@ -0,0 +1,88 @@
+"""Per-backend storage statistics (`sweep --stats`): item counts, age distribution & bytes on disk.
+
+Each handler gathers its statistics from the cheapest source its storage offers (see
+CleanupHandler._stats()), rather than scanning & decoding every item like a cleanup does, so
+the report takes well under a second and can be run often (e.g. to tune retention periods).
+
+Ages are bucketed by week: bucket k holds items created k weeks ago (i.e. between 7k and 7(k+1)
+days before now), up to HISTOGRAM_WEEKS weeks, with anything older in a final "<N>w+" bucket.
+Items without a usable timestamp are counted as "undated".
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+# weeks of age bucketed individually (older items share one bucket)
+HISTOGRAM_WEEKS = 52
+# width of the longest bar printed by format_stats()
+BAR_WIDTH = 40
+
+_WEEK = timedelta(weeks=1)
+
+
+class AgeHistogram:
+    """Item counts bucketed by age in weeks, relative to `now`."""
+
+    def __init__(self, now: datetime | None = None):
+        self.now = now or datetime.now(timezone.utc)
+        # (the last bucket holds everything older than HISTOGRAM_WEEKS weeks)
+        self.counts = [0] * (HISTOGRAM_WEEKS + 1)
+        self.undated = 0
+
+    def add(self, created_at: datetime | None, count: int = 1) -> None:
+        """Count `count` items created at `created_at` (None for undated items)."""
+        if created_at is None:
+            self.undated += count
+            return
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        # (items timestamped in the future are counted as brand new)
+        self.add_to_week(max(0, (self.now - created_at) // _WEEK), count)
+
+    def add_to_week(self, week: int, count: int) -> None:
+        """Count `count` items created `week` weeks ago (see week_bounds())."""
+        self.counts[min(week, HISTOGRAM_WEEKS)] += count
+
+    def week_bounds(self, week: int) -> tuple[datetime | None, datetime | None]:
+        """Get the (start, end] creation times of a bucket, e.g. for storage that can count
+        items in a time range: start is None for the last bucket, and end None for the first
+        (which includes anything timestamped in the future)."""
+        end = self.now - week * _WEEK
+        start = None if week >= HISTOGRAM_WEEKS else end - _WEEK
+        return start, None if week == 0 else end
+
+    def total(self) -> int:
+        return sum(self.counts) + self.undated
+
+    def as_dict(self) -> dict[str, int]:
+        """Get the non-empty buckets' counts, youngest first, keyed by label (e.g. "0w", "52w+")."""
+        return {_label(week): count for week, count in enumerate(self.counts) if count}
+
+
+def _label(week: int) -> str:
+    return f"{week}w+" if week >= HISTOGRAM_WEEKS else f"{week}w"
+
+
+def format_stats(result: dict[str, Any]) -> str:
+    """Format storage_stats() results as a plain-text report (with a bar per week of age),
+    leaving out storage whose statistics couldn't be had."""
+    lines = []
+    for r in result["results"]:
+        if r.get("error"):
+            continue
+
+        summary = f"{r['storage']}: {r['items']} items"
+        if "bytes" in r:
+            summary += f", {r['bytes']} bytes"
+        if r.get("free_bytes"):
+            summary += f" ({r['free_bytes']} reclaimable)"
+        lines.append(summary)
+
+        histogram = dict(r.get("age_histogram") or {})
+        if r.get("undated"):
+            histogram["undated"] = r["undated"]
+        widest = max(histogram.values(), default=0)
+        for label, count in histogram.items():
+            bar = "#" * max(1, round(count / widest * BAR_WIDTH))
+            lines.append(f"  {label:>7} {bar} {count}")
+    lines.append(f"({result['seconds']:.3f}s)")
+    return "\n".join(lines)
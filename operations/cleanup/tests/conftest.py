@@ -299,6 +299,16 @@ def archives_dir(tmp_path: Path) -> Path:
     return archives
 
 
+@pytest.fixture(autouse=True)
+def isolated_archives_dir(tmp_path: Path, monkeypatch) -> Path:
+    """Point .archives at the test's temporary one (as archives_dir() creates it), even in tests
+    that don't apply_mock_patches(), so indexes handlers keep there (e.g. Serena's directory
+    index) never land in the real one."""
+    archives = tmp_path / ".archives"
+    monkeypatch.setattr("operations.cleanup.state.ARCHIVES_DIR", archives)
+    return archives
+
+
 @pytest.fixture
 def trash_dir(archives_dir: Path) -> Path:
     """Create trash subdirectory."""
@@ -354,6 +364,7 @@ def apply_mock_patches(
     - get_path() to return test paths
     - get_qdrant_url() to return test URL
     - get_qdrant_collection() to return test collection
+    - get_storage() to return test storage paths
     - get_config() to return mock_config
     - get_archives_dir() to return test archives dir
     - get_trash_dir() to return test trash dir
@@ -396,6 +407,10 @@ def apply_mock_patches(
         "operations.cleanup.handlers.qdrant.get_qdrant_collection",
         lambda: qdrant_collection
     )
+    monkeypatch.setattr(
+        "operations.cleanup.handlers.qdrant.get_storage",
+        mock_get_storage
+    )
 
     # patch state module
     monkeypatch.setattr(
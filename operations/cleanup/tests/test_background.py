@@ -0,0 +1,134 @@
+"""Tests for the sweep lock, status file & background sweeps (sweep --background/--status)."""
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup import state
+from operations.cleanup.background import (
+    LOG_FILENAME,
+    StatusRecorder,
+    is_sweep_running,
+    read_status,
+    start_background,
+    sweep_lock,
+)
+from operations.cleanup.core import main, run_cleanup
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+
+
+@pytest.fixture
+def claude_mem_only(apply_mock_patches, with_sqlite_data: Path, monkeypatch) -> Path:
+    """Sweep only claude-mem (whose rows are all stale relative to 30d)."""
+    monkeypatch.setattr("operations.cleanup.core.HANDLERS", (ClaudeMemHandler,))
+    monkeypatch.setattr("operations.validate_config.full_validate", lambda config: [])
+    monkeypatch.setattr("operations.cleanup.core.get_retention", lambda name: "30d")
+    return with_sqlite_data
+
+
+class TestSweepLock:
+    """Tests for sweep_lock()."""
+
+    def test_second_sweep_gives_way(self, apply_mock_patches):
+        """Only one holder at a time; others see a sweep running."""
+        assert not is_sweep_running()
+
+        with sweep_lock() as first:
+            with sweep_lock() as second:
+                assert first and not second
+            assert is_sweep_running()
+
+        assert not is_sweep_running()
+
+    def test_concurrent_run_cleanup_coalesces(self, claude_mem_only: Path):
+        """A sweep started while another holds the lock is skipped without touching storage."""
+        with sweep_lock():
+            result = run_cleanup(force=True)
+
+        assert result["skipped"] and "Another sweep is running" in result["reason"]
+        conn = sqlite3.connect(str(claude_mem_only))
+        assert conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0] == 2
+        conn.close()
+
+
+    def test_timed_out_handler_keeps_lock(self, claude_mem_only: Path, monkeypatch):
+        """A sweep doesn't wait for its timed-out handler to stop, but the handler's thread holds
+        the lock until it does, so the next sweep can't overlap it."""
+        cancelled, release = threading.Event(), threading.Event()
+
+        def hang(handler, cutoff, batch_size=None):
+            handler._cancelled.wait(5)
+            cancelled.set()
+            release.wait(5)
+            yield from ()
+
+        monkeypatch.setattr(ClaudeMemHandler, "iter_stale_batches", hang)
+        monkeypatch.setattr("operations.cleanup.core.get_cleanup_handler_timeout", lambda: 0.1)
+        first: dict = {}
+        sweep = threading.Thread(target=lambda: first.update(run_cleanup(force=True)))
+        sweep.start()
+
+        assert cancelled.wait(5)
+        sweep.join(5)
+        second = run_cleanup(force=True)
+        release.set()
+
+        assert first["results"] == [{"storage": "claude-mem", "error": "timed out after 0.1s", "still_running": True}]
+        assert second["skipped"] and "Another sweep is running" in second["reason"]
+        deadline = time.monotonic() + 5
+        while is_sweep_running() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not is_sweep_running()
+
+
+class TestStatus:
+    """Tests for the sweep status file."""
+
+    def test_progress_then_result(self, apply_mock_patches):
+        """A running sweep's finished backends show as progress, then its result becomes the last run."""
+        recorder = StatusRecorder()
+        recorder.start()
+        recorder.backend_done("qdrant", {"storage": "qdrant", "deleted": 3})
+
+        current = read_status()["current"]
+        assert current["pid"] == os.getpid()
+        assert current["done"] == {"qdrant": {"storage": "qdrant", "deleted": 3}}
+
+        recorder.finish({"results": [{"storage": "qdrant", "deleted": 3}], "errors": []})
+        status = read_status()
+        assert status["current"] is None
+        assert status["last"]["result"]["results"][0]["deleted"] == 3
+
+    def test_run_cleanup_records_last_run(self, claude_mem_only: Path, trash_dir: Path, capsys, monkeypatch):
+        """A sweep's result is recorded, and reported by --status."""
+        run_cleanup(force=True)
+
+        assert read_status()["last"]["result"]["results"][0]["deleted"] == 4
+
+        monkeypatch.setattr("sys.argv", ["sweep", "--status"])
+        assert main() == 0
+        assert "4 items trashed" in capsys.readouterr().out
+
+
+class TestStartBackground:
+    """Tests for start_background()."""
+
+    def test_worker_runs_detached(self, apply_mock_patches, tmp_path: Path):
+        """The worker runs in its own session, with stderr going to the background log."""
+        marker = tmp_path / "worker"
+
+        def work() -> int:
+            marker.write_text(str(os.getsid(0)))
+            print("worker error", file=sys.stderr)
+            return 3
+
+        pid = start_background(work)
+        _, wait_status = os.waitpid(pid, 0)
+
+        assert os.WEXITSTATUS(wait_status) == 3
+        assert int(marker.read_text()) == pid  # (session leader)
+        assert "worker error" in (state.ARCHIVES_DIR / LOG_FILENAME).read_text()
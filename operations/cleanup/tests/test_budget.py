@@ -0,0 +1,125 @@
+"""Tests for time- & item-budgeted sweeps (--max-seconds/--max-items)."""
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup.budget import SweepBudget
+from operations.cleanup.core import run_cleanup
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.state import load_state
+from operations.config_loader import get_cleanup_max_items
+from operations.validate_config import validate_numbers
+
+
+def _count(db_path: Path, table: str) -> int:
+    conn = sqlite3.connect(str(db_path))
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return count
+
+
+@pytest.fixture
+def backlog(apply_mock_patches, with_sqlite_data: Path, monkeypatch) -> Path:
+    """A claude-mem database with 9 rows, all stale (cleaned 2 at a time), as the only backend."""
+    conn = sqlite3.connect(str(with_sqlite_data))
+    conn.executemany(
+        "INSERT INTO observations (id, created_at, content) VALUES (?, ?, ?)",
+        [(f"obs_{i}", "2020-01-01T00:00:00.000Z", f"Observation {i}") for i in range(5)],
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr("operations.cleanup.core.HANDLERS", (ClaudeMemHandler,))
+    monkeypatch.setattr("operations.validate_config.full_validate", lambda config: [])
+    monkeypatch.setattr("operations.cleanup.core.get_retention", lambda name: "30d")
+    monkeypatch.setattr("operations.cleanup.handlers.claude_mem.get_cleanup_batch_size", lambda: 2)
+    return with_sqlite_data
+
+
+class TestSweepBudget:
+    """Tests for SweepBudget."""
+
+    def test_take_grants_what_is_left(self):
+        """Claims are granted in full until the item budget runs out, then partially, then not at all."""
+        budget = SweepBudget(max_items=5)
+
+        assert [budget.take(2), budget.take(2), budget.take(2), budget.take(2)] == [2, 2, 1, 0]
+        assert budget.exhausted_reason() == "item budget of 5 spent"
+
+    def test_zero_means_no_limit(self):
+        """A budget of 0 (the config default) imposes no limit."""
+        budget = SweepBudget(max_seconds=0, max_items=0)
+
+        assert budget.take(10_000) == 10_000
+        assert budget.exhausted_reason() is None
+
+    def test_invalid_budgets_named_by_key(self, monkeypatch):
+        """Non-numeric (or negative) budgets are config errors naming their key, as are
+        attempts to read one."""
+        config = {"cleanup": {"max_items": "lots", "max_seconds": -1, "max_workers": True, "batch_size": 100}}
+        monkeypatch.setattr("operations.config_loader.get_config", lambda: config)
+
+        assert validate_numbers(config) == [
+            "cleanup.max_workers: Invalid value: True. Use an integer",
+            "cleanup.max_items: Invalid value: 'lots'. Use an integer",
+            "cleanup.max_seconds: Invalid value: -1. Use a number of at least 0",
+        ]
+        with pytest.raises(ValueError, match="cleanup.max_items"):
+            get_cleanup_max_items()
+
+
+class TestBudgetedCleanup:
+    """Tests for budgets enforced by run_cleanup() & CleanupHandler.cleanup()."""
+
+    def test_item_budget_stops_between_batches(self, backlog: Path, trash_dir: Path):
+        """No more items than the budget allows are trashed, and the backend is marked for resumption."""
+        result = run_cleanup(force=True, max_items=3)
+
+        [cleaned] = result["results"]
+        assert cleaned["deleted"] == 3 and cleaned["stopped_early"] == "item budget of 3 spent"
+        assert result["stopped_early"] == ["claude-mem"]
+        assert _count(backlog, "observations") + _count(backlog, "session_summaries") == 6
+        assert load_state()["interrupted_backends"] == ["claude-mem"]
+
+    @pytest.mark.parametrize("memory_backends", [None, ["claude-mem"]])
+    def test_next_run_resumes_within_interval(self, backlog: Path, trash_dir: Path,
+                                              memory_backends: list[str] | None):
+        """An interrupted backend is finished off by the next run selecting it, despite
+        cleanup.min_interval."""
+        run_cleanup(force=True, max_items=3)
+        first_run = load_state()["last_cleanup_run"]
+        assert run_cleanup(memory_backends=["serena"], max_items=0)["skipped"]
+
+        result = run_cleanup(memory_backends=memory_backends, max_items=0)
+
+        assert not result.get("skipped")
+        assert result["results"][0]["deleted"] == 6
+        assert result["stopped_early"] == []
+        state = load_state()
+        assert state["interrupted_backends"] == []
+        # a resumed run doesn't restart the interval
+        assert state["last_cleanup_run"] == first_run
+        assert run_cleanup()["skipped"]
+
+    def test_time_budget_stops_between_batches(self, backlog: Path, trash_dir: Path):
+        """Once the time budget is spent, the batch in flight finishes and no further one is trashed."""
+        handler = ClaudeMemHandler()
+        delete = handler.delete_items_from_storage
+
+        def slow_delete(items):
+            time.sleep(0.1)
+            return delete(items)
+
+        handler.delete_items_from_storage = slow_delete  # type: ignore[method-assign]
+        result = handler.cleanup("30d", budget=SweepBudget(max_seconds=0.05))
+
+        assert result["deleted"] == 2 and result["batches"] == 1
+        assert result["stopped_early"].startswith("time budget")
+
+    def test_dry_run_ignores_budget(self, backlog: Path):
+        """Dry runs count every stale item whatever the budget."""
+        result = run_cleanup(force=True, dry_run=True, max_items=1)
+
+        assert result["results"][0]["would_delete"] == 9
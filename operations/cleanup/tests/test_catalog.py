@@ -0,0 +1,364 @@
+"""Tests for the SQLite trash catalog."""
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from operations.cleanup import trash
+from operations.cleanup.catalog import CATALOG_FILENAME, SCHEMA_VERSION, TrashCatalog
+from operations.cleanup.compression import open_reader
+from operations.cleanup.content_store import CAS_DIRNAME, ContentStore
+from operations.cleanup.core import restore_memory_backends
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.handlers.memory_mcp import MemoryMcpHandler
+from operations.cleanup.handlers.serena import SerenaHandler
+from operations.cleanup.trash import (
+    _open_catalog,
+    empty_all_trash,
+    empty_expired_trash,
+    enforce_trash_quota,
+    find_trashed_items,
+    read_manifest,
+    trash_sizes,
+    write_export,
+    write_manifest,
+)
+
+
+def _write_entries(storage_dir: Path, entries: list[dict]) -> None:
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    with open(storage_dir / ".manifest.jsonl", "a") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def _read_span(item: dict) -> bytes:
+    with open_reader(Path(item["file"])) as f:
+        f.seek(item["offset"])
+        return f.read(item["length"])
+
+
+class TestWriteExport:
+    """Tests for write_export()."""
+
+    def test_spans_address_each_record(self, tmp_path: Path):
+        """The export is valid JSON and each returned span holds exactly one record."""
+        path = tmp_path / "export.json"
+        records = [{"id": 1, "text": "ünïcode"}, {"id": 2, "text": "b"}]
+
+        spans = write_export(path, {"exported_at": "now"}, {"points": records, "empty": []})
+
+        data = json.loads(path.read_bytes())
+        assert data == {"exported_at": "now", "points": records, "empty": []}
+
+        raw = path.read_bytes()
+        assert [json.loads(raw[span.offset:span.offset + span.length]) for span in spans["points"]] == records
+        assert spans["empty"] == []
+
+
+class TestCatalogRecording:
+    """Tests for batches & items recorded as they're trashed."""
+
+    def test_write_manifest_records_batch(self, trash_dir: Path, monkeypatch):
+        """write_manifest() returns the batch id stored in the manifest entry."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        storage_dir = trash_dir / "qdrant"
+        storage_dir.mkdir()
+
+        batch_id = write_manifest(storage_dir, "qdrant", 2, "30d", "7d")
+
+        assert read_manifest(storage_dir)[0]["id"] == batch_id
+        assert (trash_dir / CATALOG_FILENAME).exists()
+
+    def test_claude_mem_items_point_query(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+    ):
+        """A trashed observation is found by id, and its span holds its record."""
+        ClaudeMemHandler().cleanup("30d")
+
+        [item] = find_trashed_items("claude-mem", ["obs_stale"])
+
+        assert item["kind"] == "observation"
+        assert json.loads(_read_span(item))["content"] == "Stale observation"
+        assert find_trashed_items("claude-mem", ["obs_unknown"]) == []
+
+    def test_finds_more_ids_than_query_parameters(self, trash_dir: Path):
+        """Looking up more ids than one query can bind still finds them all, oldest first."""
+        with TrashCatalog(trash_dir / CATALOG_FILENAME) as catalog:
+            for batch_id, trashed_at in (("b2", "2024-02-01"), ("b1", "2024-01-01")):
+                catalog.add_batch({"id": batch_id, "backend": "qdrant", "trashed_at": trashed_at,
+                                   "purge_after": "9999", "item_count": 1000, "size": 0, "files": []})
+                catalog.add_items(batch_id, (
+                    {"kind": "point", "native_id": f"{batch_id}-{i}", "created_at": None,
+                     "file": "export.json", "offset": None, "length": None}
+                    for i in range(1000)
+                ))
+
+            ids = [f"b{batch}-{i}" for i in range(1000) for batch in (2, 1)]
+            found = catalog.find_items("qdrant", ids, trashed_since=datetime(2023, 1, 1))
+
+        assert [item["native_id"] for item in found] == [f"b{batch}-{i}" for batch in (1, 2) for i in range(1000)]
+
+    def test_memory_mcp_items_point_query(
+        self,
+        apply_mock_patches,
+        jsonl_file: Path,
+    ):
+        """Each line moved to the trash by the rewrite is recorded with its byte span."""
+        jsonl_file.write_text(
+            json.dumps({"name": "old", "created_at": "2020-01-01T00:00:00Z"}) + "\n"
+            + json.dumps({"type": "relation", "from": "old", "to": "new"}) + "\n"
+            + json.dumps({"name": "new", "created_at": "2999-01-01T00:00:00Z"}) + "\n"
+        )
+
+        MemoryMcpHandler().cleanup("30d")
+
+        [entity] = find_trashed_items("memory-mcp", ["old"])
+        [relation] = find_trashed_items("memory-mcp", ["old->new"])
+        assert entity["created_at"] == "2020-01-01T00:00:00Z"
+        assert relation["kind"] == "relation"
+        assert json.loads(_read_span(entity))["name"] == "old"
+        assert json.loads(_read_span(relation))["to"] == "new"
+
+    def test_serena_items_keep_original_path(
+        self,
+        apply_mock_patches,
+        serena_memories_root: Path,
+    ):
+        """Trashed Serena files are recorded under their original path."""
+        original = serena_memories_root / "project_0" / ".serena" / "memories" / "memory_0.md"
+
+        SerenaHandler().cleanup("0h")
+
+        [item] = find_trashed_items("serena", [str(original)])
+        assert Path(item["file"]).read_text() == "# Memory 0\n\nProject 0 memory content."
+        assert item["offset"] is None
+
+
+class TestCatalogRebuild:
+    """Tests for catalogs rebuilt from the manifests & item sidecars."""
+
+    def test_restore_after_catalog_deleted(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        trash_dir: Path,
+    ):
+        """A deleted catalog gets its items back from the sidecars, less those already restored."""
+        ClaudeMemHandler().cleanup("30d")
+        trashed = {item["native_id"] for item in find_trashed_items("claude-mem")}
+        restore_memory_backends(["claude-mem"], native_ids=["obs_stale"])
+        (trash_dir / CATALOG_FILENAME).unlink()
+
+        assert {item["native_id"] for item in find_trashed_items("claude-mem")} == trashed - {"obs_stale"}
+
+        result = restore_memory_backends(["claude-mem"], native_ids=["session_stale"])
+        assert result["results"][0]["restored"] == 1
+        assert "session_stale" not in {item["native_id"] for item in find_trashed_items("claude-mem")}
+
+    def test_rebuilds_catalog_of_other_version(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        trash_dir: Path,
+    ):
+        """A catalog of another schema version is dropped and rebuilt from the manifests & sidecars."""
+        ClaudeMemHandler().cleanup("30d")
+        trashed = find_trashed_items("claude-mem")
+        conn = sqlite3.connect(trash_dir / CATALOG_FILENAME)
+        conn.executescript("DROP TABLE items; CREATE TABLE items (batch_id TEXT); PRAGMA user_version = 0;")
+        conn.close()
+
+        assert find_trashed_items("claude-mem") == trashed
+        with TrashCatalog(trash_dir / CATALOG_FILENAME) as catalog:
+            assert catalog.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+
+class TestCatalogPurge:
+    """Tests for empty_expired_trash() via the catalog."""
+
+    def test_uses_recorded_purge_after(self, trash_dir: Path, monkeypatch):
+        """Batches expire at the auto_purge_after they were trashed with, not the current grace period."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        storage_dir = trash_dir / "qdrant"
+        old_file = storage_dir / "old.json"
+        kept_file = storage_dir / "kept.json"
+        storage_dir.mkdir()
+        old_file.write_text("{}")
+        kept_file.write_text("{}")
+
+        now = datetime.now(timezone.utc)
+        _write_entries(storage_dir, [
+            # trashed recently but with a short grace period: expired
+            {"id": "a", "trashed_at": now.isoformat(), "auto_purge_after": (now - timedelta(seconds=1)).isoformat(),
+             "files": [str(old_file)]},
+            # trashed long ago but with a long grace period: kept
+            {"id": "b", "trashed_at": (now - timedelta(days=90)).isoformat(),
+             "auto_purge_after": (now + timedelta(days=1)).isoformat() + "Z", "files": [str(kept_file)]},
+        ])
+
+        assert empty_expired_trash("30d")["removed"] == 1
+        assert not old_file.exists()
+        assert kept_file.exists()
+        assert [entry["id"] for entry in read_manifest(storage_dir)] == ["b"]
+
+    def test_only_reads_manifests_with_expired_batches(self, trash_dir: Path, monkeypatch):
+        """Once synced, backends without expired batches are never re-read."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        recent = datetime.now(timezone.utc).isoformat()
+        _write_entries(trash_dir / "qdrant", [{"trashed_at": recent, "files": []}])
+        _write_entries(trash_dir / "serena", [{"trashed_at": recent, "files": []}])
+
+        # first run builds the catalog from the manifests
+        assert empty_expired_trash("30d")["removed"] == 0
+
+        reads: list[str] = []
+        original_read_manifest = trash.read_manifest
+
+        def counting_read_manifest(path: Path) -> list[dict]:
+            reads.append(path.name)
+            return original_read_manifest(path)
+
+        monkeypatch.setattr("operations.cleanup.trash.read_manifest", counting_read_manifest)
+
+        assert empty_expired_trash("30d")["removed"] == 0
+        assert reads == []
+
+        # an entry appended behind the catalog's back is picked up on the next sync
+        old_file = trash_dir / "serena" / "old.md"
+        old_file.write_text("x")
+        old = (datetime.now(timezone.utc) - timedelta(days=60)).isoformat()
+        _write_entries(trash_dir / "serena", [{"trashed_at": old, "files": [str(old_file)]}])
+
+        assert empty_expired_trash("30d")["removed"] == 1
+        assert not old_file.exists()
+        assert "qdrant" not in reads
+
+    def test_falls_back_without_catalog(self, trash_dir: Path, monkeypatch):
+        """An unusable catalog doesn't stop expired trash from being purged."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        (trash_dir / CATALOG_FILENAME).write_bytes(b"not a sqlite database" * 100)
+
+        old_file = trash_dir / "qdrant" / "old.json"
+        old = (datetime.now(timezone.utc) - timedelta(days=60)).isoformat()
+        _write_entries(trash_dir / "qdrant", [{"trashed_at": old, "files": [str(old_file)]}])
+        old_file.write_text("{}")
+
+        assert empty_expired_trash("30d")["removed"] == 1
+        assert not old_file.exists()
+
+    def test_empty_all_trash_clears_catalog(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+    ):
+        """Emptying the whole trash forgets every recorded item."""
+        ClaudeMemHandler().cleanup("30d")
+        assert find_trashed_items("claude-mem")
+
+        empty_all_trash()
+
+        assert find_trashed_items("claude-mem") == []
+
+
+class TestSizeCaps:
+    """Tests for enforce_trash_quota()."""
+
+    @staticmethod
+    def _trash_batches(trash_dir: Path, backend: str, specs: list[tuple[str, int, int]]) -> dict[str, Path]:
+        """Write batches of (id, days ago trashed, size in bytes), expiring 30 days after trashing."""
+        storage_dir = trash_dir / backend
+        storage_dir.mkdir(parents=True, exist_ok=True)
+        now = datetime.now(timezone.utc)
+        files, entries = {}, []
+        for batch_id, days_ago, size in specs:
+            files[batch_id] = storage_dir / f"{batch_id}.json"
+            files[batch_id].write_bytes(b"x" * size)
+            trashed = now - timedelta(days=days_ago)
+            entries.append({"id": batch_id, "trashed_at": trashed.isoformat(),
+                            "auto_purge_after": (trashed + timedelta(days=30)).isoformat(),
+                            "files": [str(files[batch_id])]})
+        _write_entries(storage_dir, entries)
+        return files
+
+    def test_sizes_recorded_when_trashed(
+        self,
+        apply_mock_patches,
+        jsonl_file: Path,
+        trash_dir: Path,
+    ):
+        """Sizes are recorded with each batch, including memory-mcp's once its reserved file is filled."""
+        jsonl_file.write_text(json.dumps({"name": "old", "created_at": "2020-01-01T00:00:00Z"}) + "\n")
+
+        MemoryMcpHandler().cleanup("30d")
+
+        [entry] = read_manifest(trash_dir / "memory-mcp")
+        with _open_catalog(trash_dir) as catalog:
+            assert catalog.sizes_by_backend() == {"memory-mcp": Path(entry["files"][0]).stat().st_size}
+
+    def test_evicts_closest_to_expiry_first(self, trash_dir: Path, monkeypatch):
+        """The oldest batches go first until under the cap, but never ones younger than min_age."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        files = self._trash_batches(trash_dir, "qdrant", [("a", 20, 100), ("b", 10, 100), ("c", 5, 100)])
+        files |= self._trash_batches(trash_dir, "serena", [("d", 15, 100), ("new", 0, 500)])
+
+        result = enforce_trash_quota(700, min_age="1d")
+
+        assert result == {"evicted": 2, "removed": 2, "bytes_freed": 200}
+        assert {name for name, path in files.items() if path.exists()} == {"b", "c", "new"}
+        assert [entry["id"] for entry in read_manifest(trash_dir / "qdrant")] == ["b", "c"]
+
+        # what's left can only get under the cap by evicting the batch that's too young
+        assert enforce_trash_quota(100, min_age="1d")["evicted"] == 2
+        assert files["new"].exists()
+
+    def test_per_backend_cap(self, trash_dir: Path, monkeypatch):
+        """A backend over its own cap is evicted from, even with the trash under max_size."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        self._trash_batches(trash_dir, "qdrant", [("a", 20, 100), ("b", 10, 100)])
+        serena = self._trash_batches(trash_dir, "serena", [("c", 30, 100)])
+
+        result = enforce_trash_quota(None, {"qdrant": 150})
+
+        assert result["bytes_freed"] == 100
+        assert [entry["id"] for entry in read_manifest(trash_dir / "qdrant")] == ["b"]
+        assert serena["c"].exists()
+
+    def test_shared_records_counted_once(self, trash_dir: Path, monkeypatch):
+        """A content store record shared by batches counts once toward the caps, and evicting a
+        batch only frees the records no remaining batch references."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        store = ContentStore(trash_dir / CAS_DIRNAME)
+        shared, own = store.put(b"x" * 100), store.put(b"y" * 50)
+        storage_dir = trash_dir / "qdrant"
+        storage_dir.mkdir()
+        write_manifest(storage_dir, "qdrant", 1, "30d", "1d", blobs=[shared])
+        write_manifest(storage_dir, "qdrant", 2, "30d", "30d", blobs=[shared, own])
+
+        assert trash_sizes() == {"qdrant": 150}
+        assert enforce_trash_quota(150, min_age="0h")["evicted"] == 0
+
+        # the first batch frees nothing (the second still references its record), so both go
+        assert enforce_trash_quota(100, min_age="0h") == {"evicted": 2, "removed": 2, "bytes_freed": 150}
+        assert trash_sizes() == {}
+
+    def test_catalog_without_record_sizes_rebuilt(self, trash_dir: Path, monkeypatch):
+        """A catalog whose references predate record sizes is rebuilt with each record sized once."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        store = ContentStore(trash_dir / CAS_DIRNAME)
+        shared = store.put(b"x" * 100)
+        storage_dir = trash_dir / "qdrant"
+        storage_dir.mkdir()
+        write_manifest(storage_dir, "qdrant", 1, "30d", "30d", blobs=[shared])
+        write_manifest(storage_dir, "qdrant", 1, "30d", "30d", blobs=[shared])
+        conn = sqlite3.connect(trash_dir / CATALOG_FILENAME)
+        conn.executescript(
+            "DROP TABLE blob_refs;"
+            "CREATE TABLE blob_refs (batch_id TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (batch_id, hash));"
+            "PRAGMA user_version = 3;"
+        )
+        conn.close()
+
+        assert trash_sizes() == {"qdrant": 100}
@@ -0,0 +1,77 @@
+"""Tests for compressed trash exports."""
+import json
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup import compression
+from operations.cleanup.compression import compressed_path, get_codec, open_reader
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.trash import find_trashed_items, load_trashed_items, write_export
+
+CODECS = ["gzip", "lzma", "none"] + (["zstd"] if compression.zstd is not None else [])
+
+
+def _use_codec(monkeypatch, codec: str, level: int | None = None) -> None:
+    monkeypatch.setattr("operations.cleanup.compression.get_trash_compression", lambda: codec)
+    monkeypatch.setattr("operations.cleanup.compression.get_trash_compression_level", lambda: level)
+
+
+class TestCodecSelection:
+    """Tests for picking the configured codec."""
+
+    def test_zstd_falls_back_to_gzip(self, monkeypatch):
+        """zstd is used when the interpreter provides it, gzip otherwise."""
+        _use_codec(monkeypatch, "zstd")
+        monkeypatch.setattr("operations.cleanup.compression.zstd", None)
+
+        assert get_codec() == "gzip"
+        assert compressed_path(Path("a.json")).name == "a.json.gz"
+
+    def test_unknown_codec_uses_gzip(self, monkeypatch):
+        _use_codec(monkeypatch, "brotli")
+        assert get_codec() == "gzip"
+
+
+class TestCompressedExports:
+    """Tests for writing & reading compressed exports."""
+
+    @pytest.mark.parametrize("codec", CODECS)
+    def test_round_trip_with_spans(self, tmp_path: Path, monkeypatch, codec: str):
+        """Spans index the uncompressed export, and records read back through the codec."""
+        _use_codec(monkeypatch, codec, level=99)  # out-of-range levels are clamped
+        path = compressed_path(tmp_path / "export.json")
+        records = [{"id": i, "text": "x" * 50} for i in range(200)]
+
+        spans = write_export(path, {"exported_at": "now"}, {"points": records})
+
+        if codec != "none":
+            assert path.read_bytes()[:1] != b"{"
+            assert path.stat().st_size < sum(span.length for span in spans["points"])
+        with open_reader(path) as f:
+            assert json.loads(f.read())["points"] == records
+            f.seek(spans["points"][150].offset)
+            assert json.loads(f.read(spans["points"][150].length)) == records[150]
+
+    def test_uncompressed_files_still_readable(self, tmp_path: Path):
+        """Exports written before compression (or with it off) are read as-is."""
+        path = tmp_path / "old.json"
+        path.write_text('{"points": []}')
+
+        with open_reader(path) as f:
+            assert json.loads(f.read()) == {"points": []}
+
+    def test_handler_exports_load_via_catalog(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        monkeypatch,
+    ):
+        """claude-mem exports are compressed, and trashed rows still load by byte span."""
+        _use_codec(monkeypatch, "lzma")
+
+        ClaudeMemHandler().cleanup("30d")
+
+        [item] = load_trashed_items(find_trashed_items("claude-mem", ["obs_stale"]))
+        assert item["file"].endswith(".json.xz")
+        assert item["data"]["content"] == "Stale observation"
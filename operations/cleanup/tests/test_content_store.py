@@ -0,0 +1,103 @@
+"""Tests for the content-addressed trash store (trash.dedup)."""
+import json
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup.catalog import CATALOG_FILENAME
+from operations.cleanup.compression import open_reader
+from operations.cleanup.content_store import CAS_DIRNAME, ContentStore
+from operations.cleanup.core import restore_memory_backends
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.handlers.memory_mcp import MemoryMcpHandler
+from operations.cleanup.trash import (
+    empty_all_trash,
+    empty_expired_trash,
+    find_trashed_items,
+    load_trashed_items,
+    read_manifest,
+    write_manifest,
+)
+
+
+@pytest.fixture
+def dedup(monkeypatch):
+    """Enable trash.dedup."""
+    monkeypatch.setattr("operations.cleanup.trash.is_trash_dedup_enabled", lambda: True)
+    monkeypatch.setattr("operations.cleanup.handlers.memory_mcp.is_trash_dedup_enabled", lambda: True)
+
+
+def _stored(trash_dir: Path) -> set[str]:
+    return {path.name for path in (trash_dir / CAS_DIRNAME).rglob("*") if path.is_file()}
+
+
+class TestDedupedExports:
+    """Tests for handlers' exports with trash.dedup set."""
+
+    def test_repeated_wipes_store_records_once(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        trash_dir: Path,
+        dedup,
+    ):
+        """Wiping, restoring & wiping again references the same records instead of copying them."""
+        ClaudeMemHandler().wipe(backup=True)
+        stored = _stored(trash_dir)
+        assert len(stored) == 4
+
+        restore_memory_backends(["claude-mem"])
+        ClaudeMemHandler().wipe(backup=True)
+
+        assert _stored(trash_dir) == stored
+        first, second = read_manifest(trash_dir / "claude-mem")
+        assert set(first["blobs"]) == set(second["blobs"]) == stored
+
+        # the export references records by hash, and items still load from the store
+        with open_reader(Path(second["files"][0])) as f:
+            export = json.loads(f.read())
+        assert {ref["$blob"] for ref in export["sessions"] + export["observations"]} == stored
+        [item] = load_trashed_items(find_trashed_items("claude-mem", ["obs_stale"]))
+        assert item["data"]["content"] == "Stale observation"
+
+    def test_memory_mcp_lines_go_to_store(
+        self,
+        apply_mock_patches,
+        jsonl_file: Path,
+        trash_dir: Path,
+        dedup,
+    ):
+        """Dropped lines are stored by hash and recorded in a manifest entry written after the rewrite."""
+        line = json.dumps({"name": "old", "created_at": "2020-01-01T00:00:00Z"}) + "\n"
+        jsonl_file.write_text(line)
+
+        MemoryMcpHandler().cleanup("30d")
+
+        [entry] = read_manifest(trash_dir / "memory-mcp")
+        assert entry["files"] == [] and entry["size"] == len(line)
+        [item] = load_trashed_items(find_trashed_items("memory-mcp", ["old"]))
+        assert item["raw"] == line.encode()
+
+
+class TestReferenceCounting:
+    """Tests for purging content store records."""
+
+    @pytest.mark.parametrize("catalog", [True, False])
+    def test_record_kept_until_last_reference_purged(self, trash_dir: Path, monkeypatch, catalog: bool):
+        """A record is only deleted with the last batch referencing it, with or without the catalog."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        if not catalog:
+            (trash_dir / CATALOG_FILENAME).write_bytes(b"not a sqlite database" * 100)
+        store = ContentStore(trash_dir / CAS_DIRNAME)
+        only_old, shared = store.put(b'{"id": 1}'), store.put(b'{"id": 2}')
+        storage_dir = trash_dir / "qdrant"
+        storage_dir.mkdir()
+
+        write_manifest(storage_dir, "qdrant", 2, "30d", "0h", blobs=[only_old, shared])
+        write_manifest(storage_dir, "qdrant", 1, "30d", "30d", blobs=[shared])
+
+        assert empty_expired_trash("30d")["removed"] == 1
+        assert _stored(trash_dir) == {shared}
+
+        empty_all_trash()
+        assert not (trash_dir / CAS_DIRNAME).exists()
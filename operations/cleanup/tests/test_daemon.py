@@ -0,0 +1,118 @@
+"""Tests for the resident sweep scheduler (sweep --daemon)."""
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from operations.cleanup.daemon import SweepDaemon
+from operations.cleanup.state import now_as_iso, save_state
+
+
+@pytest.fixture
+def daemon_env(apply_mock_patches, monkeypatch):
+    """Daily sweeps without jitter or storage pressure."""
+    monkeypatch.setattr("operations.cleanup.daemon.get_cleanup_interval", lambda: "24h")
+    monkeypatch.setattr("operations.cleanup.daemon.get_cleanup_pressure_size", lambda: None)
+    monkeypatch.setattr("operations.cleanup.daemon.JITTER", 0)
+    monkeypatch.setattr("operations.cleanup.daemon.random.uniform", lambda a, b: 0.0)
+
+
+class _Recorder:
+    """Sweep stand-in recording whether each sweep was forced (stopping the daemon after `stop_after`)."""
+
+    def __init__(self, stop_after: int = 1):
+        self.forced: list[bool] = []
+        self.stop_after = stop_after
+        self.daemon: SweepDaemon | None = None
+
+    def __call__(self, force: bool) -> dict:
+        self.forced.append(force)
+        save_state({"last_cleanup_run": now_as_iso(), "interrupted_backends": []})
+        if len(self.forced) >= self.stop_after and self.daemon:
+            self.daemon.stop()
+        return {"errors": []}
+
+
+def _daemon(recorder: _Recorder, poll_seconds: float = 0.01) -> SweepDaemon:
+    recorder.daemon = SweepDaemon(recorder, poll_seconds=poll_seconds)
+    return recorder.daemon
+
+
+class TestSchedule:
+    """Tests for when the daemon sweeps."""
+
+    def test_due_one_interval_after_last_run(self, daemon_env):
+        """The next sweep is due an interval after the last one (immediately if there's none)."""
+        daemon = _daemon(_Recorder())
+        assert daemon.next_due() <= datetime.now(timezone.utc)
+
+        last_run = datetime.now(timezone.utc) - timedelta(hours=1)
+        save_state({"last_cleanup_run": last_run.isoformat()})
+
+        assert daemon.next_due() == last_run + timedelta(hours=24)
+
+    def test_sweeps_when_due(self, daemon_env):
+        """With no previous run, the daemon sweeps (forced) straight away."""
+        recorder = _Recorder()
+
+        _daemon(recorder).run_forever()
+
+        assert recorder.forced == [True]
+
+    def test_resumes_interrupted_backends_unforced(self, daemon_env):
+        """Backends a budget stopped are resumed without waiting for the interval (or forcing a full run)."""
+        save_state({"last_cleanup_run": now_as_iso(), "interrupted_backends": ["qdrant"]})
+        recorder = _Recorder()
+
+        _daemon(recorder).run_forever()
+
+        assert recorder.forced == [False]
+
+    def test_ignores_interrupted_backends_not_selected(self, daemon_env):
+        """A daemon restricted to some backends (-s) doesn't try to resume any others."""
+        save_state({"last_cleanup_run": now_as_iso(), "interrupted_backends": ["qdrant"]})
+
+        assert _daemon(_Recorder())._due_reason() == "resume"
+        assert SweepDaemon(_Recorder(), storages=["claude-mem", "serena"])._due_reason() is None
+        assert SweepDaemon(_Recorder(), storages=["qdrant"])._due_reason() == "resume"
+
+    def test_wake_sweeps_early(self, daemon_env):
+        """A wake-up (SIGUSR1) sweeps even though the interval hasn't passed."""
+        save_state({"last_cleanup_run": now_as_iso()})
+        recorder = _Recorder()
+        daemon = _daemon(recorder, poll_seconds=10)
+        thread = threading.Thread(target=daemon.run_forever)
+        thread.start()
+
+        daemon.wake()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert recorder.forced == [True]
+
+    def test_pressure_only_triggers_on_crossing(self, daemon_env, monkeypatch):
+        """Storage growing past the threshold sweeps once, not on every check while it stays over."""
+        monkeypatch.setattr("operations.cleanup.daemon.get_cleanup_pressure_size", lambda: 1000)
+        sizes = iter([500, 1500, 1600, 800, 1200])
+        monkeypatch.setattr("operations.cleanup.daemon.storage_footprint", lambda: next(sizes))
+        daemon = _daemon(_Recorder())
+
+        assert [daemon._pressure_crossed() for _ in range(5)] == [False, True, False, False, True]
+
+
+class TestConfigReload:
+    """Tests for reloading config without restarting."""
+
+    def test_reloads_when_config_file_changes(self, daemon_env, monkeypatch):
+        """A changed config file clears the cached config (once)."""
+        cleared = []
+        monkeypatch.setattr("operations.cleanup.daemon.clear_config_cache", lambda: cleared.append(True))
+        daemon = _daemon(_Recorder())
+
+        daemon._reload_config_if_changed()
+        assert cleared == []
+
+        daemon._config_mtimes = {}
+        daemon._reload_config_if_changed()
+        daemon._reload_config_if_changed()
+        assert cleared == [True]
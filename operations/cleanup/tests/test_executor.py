@@ -0,0 +1,84 @@
+"""Tests for running backends' cleanups concurrently."""
+import threading
+import time
+
+from operations.cleanup.executor import run_handlers
+from operations.cleanup.handlers.base import CleanupHandler
+
+
+class _Handler(CleanupHandler):
+    """Handler whose cleanup() sleeps, then returns (or raises) a canned result."""
+
+    def __init__(self, name: str, delay: float = 0, error: Exception | None = None):
+        super().__init__()
+        self.name = name
+        self.delay = delay
+        self.error = error
+
+    def cleanup(self, retention=None, dry_run=False):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"storage": self.name, "deleted": 1}
+
+    def get_stale_items(self, cutoff):
+        return []
+
+    def export_items_to_trash(self, items, retention):
+        return ""
+
+    def delete_items_from_storage(self, items):
+        return 0
+
+    def _wipe(self, backup):
+        return {}
+
+    def _restore(self, items):
+        return {}
+
+
+def _run(handler: CleanupHandler) -> dict:
+    return handler.cleanup()
+
+
+class TestRunHandlers:
+    """Tests for run_handlers()."""
+
+    def test_results_in_handler_order_and_concurrent(self):
+        """Results come back in handler order, not completion order, and handlers overlap."""
+        handlers = [_Handler("slow", 0.3), _Handler("medium", 0.2), _Handler("fast", 0)]
+
+        start = time.monotonic()
+        results = run_handlers(handlers, _run, max_workers=3)
+
+        assert [r["storage"] for r in results] == ["slow", "medium", "fast"]
+        assert time.monotonic() - start < 0.45
+
+    def test_exception_reported_as_error(self):
+        """An exception escaping a handler becomes its error result without affecting the others."""
+        handlers = [_Handler("broken", error=RuntimeError("boom")), _Handler("fine")]
+
+        results = run_handlers(handlers, _run, max_workers=2)
+
+        assert results == [{"storage": "broken", "error": "boom"}, {"storage": "fine", "deleted": 1}]
+
+    def test_timed_out_handler_is_cancelled_not_waited_for(self):
+        """A handler over its timeout is cancelled & reported straight away, and not waited for:
+        one still running once the others are done is marked as such."""
+        hung = _Handler("hung")
+        release = threading.Event()
+        hung.cleanup = lambda retention=None, dry_run=False: release.wait(5) and {}  # type: ignore[method-assign]
+        reported = {}
+
+        start = time.monotonic()
+        results = run_handlers([hung, _Handler("fine")], _run, max_workers=2, timeout=0.2,
+                               on_done=lambda handler, result: reported.setdefault(handler.name, time.monotonic()))
+        release.set()
+
+        assert reported["hung"] - start < 0.4
+        assert time.monotonic() - start < 1
+        assert results == [
+            {"storage": "hung", "error": "timed out after 0.2s", "still_running": True},
+            {"storage": "fine", "deleted": 1},
+        ]
+        assert hung._cancelled.is_set()
@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.trash import read_manifest
 
 
 class TestClaudeMemGetExpiredItems:
@@ -163,6 +164,119 @@ class TestClaudeMemDeleteItems:
         assert deleted == 0
 
 
+class TestClaudeMemStreaming:
+    """Tests for cleaning up claude-mem in batches (cleanup.batch_size)."""
+
+    def _add_stale_observations(self, db_path: Path, count: int) -> None:
+        conn = sqlite3.connect(str(db_path))
+        conn.executemany(
+            "INSERT INTO observations (id, created_at, content) VALUES (?, ?, ?)",
+            [(f"obs_{i}", "2020-01-01T00:00:00.000Z", f"Observation {i}") for i in range(count)],
+        )
+        conn.commit()
+        conn.close()
+
+    def test_batches_are_bounded_and_cover_every_stale_row(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        cutoff_datetime: datetime,
+    ):
+        """Stale rows come back batch_size at a time, each once."""
+        self._add_stale_observations(with_sqlite_data, 5)
+
+        batches = list(ClaudeMemHandler().iter_stale_batches(cutoff_datetime, batch_size=2))
+
+        assert [len(batch) for batch in batches] == [1, 2, 2, 2]
+        ids = [item["data"]["id"] for batch in batches for item in batch]
+        assert sorted(ids) == sorted(["session_stale", "obs_stale"] + [f"obs_{i}" for i in range(5)])
+
+    def test_cleanup_trashes_each_batch_before_fetching_next(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        cutoff_datetime: datetime,
+        trash_dir: Path,
+        monkeypatch,
+    ):
+        """Each batch is exported & deleted (as its own trash batch) before the next query."""
+        self._add_stale_observations(with_sqlite_data, 5)
+        monkeypatch.setattr("operations.cleanup.handlers.claude_mem.get_cleanup_batch_size", lambda: 2)
+        handler = ClaudeMemHandler()
+        handler.get_cutoff = lambda retention: cutoff_datetime  # type: ignore[method-assign]
+        fetched = handler.iter_stale_batches
+        remaining_when_fetched = []
+
+        def iter_stale_batches(cutoff):
+            for batch in fetched(cutoff):
+                conn = sqlite3.connect(str(with_sqlite_data))
+                remaining_when_fetched.append(conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0])
+                conn.close()
+                yield batch
+
+        handler.iter_stale_batches = iter_stale_batches  # type: ignore[method-assign, assignment]
+        result = handler.cleanup("30d")
+
+        assert result["deleted"] == 7 and result["batches"] == 4
+        assert remaining_when_fetched == [7, 7, 5, 3]  # (the first batch holds the stale session)
+        assert len(read_manifest(trash_dir / "claude-mem")) == 4
+
+
+class TestClaudeMemWatermarks:
+    """Tests for claude-mem's incremental scans (from the watermark of the last complete cleanup)."""
+
+    CUTOFF = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+    def _watermark(self, max_rowid: int) -> dict:
+        # as left by a cleanup with its cutoff between the fixture's stale (Jan 1) & valid (Feb 1) rows
+        return {
+            "cutoff": "2024-01-15T00:00:00+00:00",
+            "full_scan_at": datetime.now(timezone.utc).isoformat(),
+            "max_rowid": {"session_summaries": max_rowid, "observations": max_rowid},
+        }
+
+    def _stale_ids(self, handler: ClaudeMemHandler) -> set[str]:
+        return {item["data"]["id"] for item in handler.get_stale_items(self.CUTOFF)}
+
+    def test_only_newly_stale_or_inserted_rows_scanned(self, apply_mock_patches, with_sqlite_data: Path):
+        """Rows already older than the last cutoff are skipped, unless inserted since (e.g. restored)."""
+        conn = sqlite3.connect(str(with_sqlite_data))
+        conn.execute(
+            "INSERT INTO observations (id, created_at, content) VALUES (?, ?, ?)",
+            ("obs_restored", "2023-06-01T00:00:00.000Z", "Restored observation"),
+        )
+        conn.commit()
+        conn.close()
+        handler = ClaudeMemHandler()
+        handler.watermark = self._watermark(max_rowid=2)
+
+        assert self._stale_ids(handler) == {"session_valid", "obs_valid", "obs_restored"}
+        assert self._stale_ids(ClaudeMemHandler()) == {
+            "session_stale", "session_valid", "obs_stale", "obs_valid", "obs_restored",
+        }
+
+    def test_rowids_going_backwards_forces_full_scan(self, apply_mock_patches, with_sqlite_data: Path):
+        """A table whose rowids are below the watermark's (e.g. after a wipe) is scanned in full."""
+        handler = ClaudeMemHandler()
+        handler.watermark = self._watermark(max_rowid=100)
+
+        assert self._stale_ids(handler) == {"session_stale", "session_valid", "obs_stale", "obs_valid"}
+
+    def test_cleanup_records_watermark(self, apply_mock_patches, with_sqlite_data: Path, trash_dir: Path):
+        """A complete cleanup records its cutoff & the rowids checked, keeping the last full scan's time."""
+        handler = ClaudeMemHandler()
+        handler.watermark = previous = self._watermark(max_rowid=2)
+        handler.get_cutoff = lambda retention: self.CUTOFF  # type: ignore[method-assign]
+
+        watermark = handler.cleanup("30d")["watermark"]
+
+        assert watermark == {
+            "cutoff": self.CUTOFF.isoformat(),
+            "full_scan_at": previous["full_scan_at"],
+            "max_rowid": {"session_summaries": 2, "observations": 2},
+        }
+
+
 class TestClaudeMemWipe:
     """Tests for ClaudeMemHandler.wipe()."""
 
@@ -205,3 +319,14 @@ class TestClaudeMemWipe:
 
         assert result["wiped"] == 0
         assert "database does not exist" in result["message"]
+
+
+class TestClaudeMemCompact:
+    """Tests for ClaudeMemHandler.compact()."""
+
+    def test_compact_not_supported(self, apply_mock_patches):
+        """Handlers without a compaction mode return an error dict instead of raising."""
+        result = ClaudeMemHandler().compact()
+
+        assert result["storage"] == "claude-mem"
+        assert "not supported" in result["error"]
@@ -1,10 +1,22 @@
 """Tests for MemoryMcpHandler (Memory MCP uses JSONL storage model)."""
+import fcntl
 import json
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 
+import pytest
 
+from operations.cleanup.compression import open_reader
+from operations.cleanup.handlers import CleanupError
 from operations.cleanup.handlers.memory_mcp import MemoryMcpHandler
+from operations.cleanup.trash import read_manifest
+
+
+def _read_trash(path: Path) -> bytes:
+    """Read a (possibly compressed) trash file's contents."""
+    with open_reader(path) as f:
+        return f.read()
 
 
 class TestMemoryMcpGetExpiredItems:
@@ -301,3 +313,467 @@ class TestMemoryMcpWipe:
 
         assert result["wiped"] == 0
         assert "no entities found" in result["message"]
+
+
+class TestMemoryMcpStreamingRewrite:
+    """Tests for the single-pass streaming rewrite used by cleanup and wipe."""
+
+    def test_surviving_lines_copied_byte_for_byte(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Surviving lines keep their exact original bytes (no re-serialization)."""
+        # non-default formatting & key order that json.dumps() would not reproduce
+        kept = b'{ "created_at":"2024-03-01T00:00:00Z",  "name" : "kept", "note": "caf\xc3\xa9" }\n'
+        stale = json.dumps({"name": "stale", "created_at": "2024-01-01T00:00:00Z"}).encode() + b"\n"
+        jsonl_file.write_bytes(stale + kept)
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+        assert handler.delete_items_from_storage(stale_items) == 1
+
+        assert jsonl_file.read_bytes() == kept
+
+    def test_expired_lines_appended_to_trash(
+        self,
+        with_jsonl_data: Path,
+        cutoff_datetime: datetime,
+        apply_mock_patches: dict,
+    ):
+        """The trash file reserved by export receives the raw expired lines during the rewrite."""
+        original_lines = with_jsonl_data.read_bytes().splitlines(keepends=True)
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(cutoff_datetime)
+        trash_path = Path(handler.export_items_to_trash(stale_items, "30d"))
+
+        # export only reserves the file: nothing is moved until the rewrite
+        assert trash_path.exists()
+        assert trash_path.read_bytes() == b""
+
+        handler.delete_items_from_storage(stale_items)
+
+        trashed = _read_trash(trash_path).splitlines(keepends=True)
+        remaining = with_jsonl_data.read_bytes().splitlines(keepends=True)
+        assert len(trashed) == 4
+        assert sorted(trashed + remaining) == sorted(original_lines)
+
+    def test_failed_rewrite_leaves_original_intact(
+        self,
+        with_jsonl_data: Path,
+        cutoff_datetime: datetime,
+        apply_mock_patches: dict,
+        monkeypatch,
+    ):
+        """A crash before the atomic rename leaves the original file untouched & no temp files behind."""
+        original = with_jsonl_data.read_bytes()
+
+        def failing_replace(src, dst):
+            raise OSError("simulated crash")
+
+        monkeypatch.setattr("operations.cleanup.handlers.memory_mcp.os.replace", failing_replace)
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(cutoff_datetime)
+
+        with pytest.raises(CleanupError):
+            handler.delete_items_from_storage(stale_items)
+
+        assert with_jsonl_data.read_bytes() == original
+        assert [p.name for p in with_jsonl_data.parent.iterdir() if p.name.endswith(".tmp")] == []
+
+    def test_malformed_lines_preserved(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Malformed lines are kept as-is rather than silently dropped by the rewrite."""
+        jsonl_file.write_bytes(
+            json.dumps({"name": "stale", "created_at": "2024-01-01T00:00:00Z"}).encode() + b"\n"
+            + b"not valid json\n"
+        )
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+        handler.delete_items_from_storage(stale_items)
+
+        assert jsonl_file.read_bytes() == b"not valid json\n"
+
+    def test_wipe_backup_contains_all_lines(
+        self,
+        with_jsonl_data: Path,
+        apply_mock_patches: dict,
+    ):
+        """Wipe with backup moves every line into the trash file."""
+        original = with_jsonl_data.read_bytes()
+
+        handler = MemoryMcpHandler()
+        result = handler.wipe(backup=True)
+
+        assert _read_trash(Path(result["backup_path"])) == original
+        assert with_jsonl_data.read_bytes() == b""
+
+
+class TestMemoryMcpRelationCascade:
+    """Tests for cascading deletion of relations that reference expired entities."""
+
+    def _write_graph(self, jsonl_file: Path) -> None:
+        records = [
+            {"type": "entity", "name": "stale", "entityType": "note", "created_at": "2024-01-01T00:00:00Z"},
+            {"type": "entity", "name": "valid", "entityType": "note", "created_at": "2024-03-01T00:00:00Z"},
+            {"type": "entity", "name": "other", "entityType": "note", "created_at": "2024-03-01T00:00:00Z"},
+            {"type": "relation", "from": "stale", "to": "valid", "relationType": "links"},
+            {"type": "relation", "from": "other", "to": "stale", "relationType": "links"},
+            {"type": "relation", "from": "valid", "to": "other", "relationType": "links"},
+            # legacy relation without a "type" field
+            {"from": "stale", "to": "other", "relationType": "links"},
+        ]
+        with open(jsonl_file, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def test_relations_to_expired_entities_removed(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Relations with an expired entity at either endpoint are deleted with it."""
+        self._write_graph(jsonl_file)
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+        deleted = handler.delete_items_from_storage(stale_items)
+
+        # 1 entity + 3 cascaded relations
+        assert deleted == 4
+
+        with open(jsonl_file) as f:
+            remaining = [json.loads(line) for line in f if line.strip()]
+        relations = [r for r in remaining if "from" in r]
+        assert relations == [{"type": "relation", "from": "valid", "to": "other", "relationType": "links"}]
+        assert {r["name"] for r in remaining if "name" in r} == {"valid", "other"}
+
+    def test_cascaded_relations_included_in_trash(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Cascaded relations land in the same trash export as the expired entity."""
+        self._write_graph(jsonl_file)
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+        trash_path = Path(handler.export_items_to_trash(stale_items, "30d"))
+        handler.delete_items_from_storage(stale_items)
+
+        trashed = [json.loads(line) for line in _read_trash(trash_path).splitlines()]
+        assert [r.get("name") for r in trashed if "name" in r] == ["stale"]
+        assert len([r for r in trashed if "from" in r]) == 3
+
+    def test_stale_relations_only_expire_with_an_endpoint(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """A relation's own age never makes it stale, and the batch counts exactly the lines
+        removed (the expired entity plus its cascaded relations)."""
+        self._write_graph(jsonl_file)
+        with open(jsonl_file, "a") as f:
+            f.write(json.dumps({"type": "relation", "from": "valid", "to": "other", "relationType": "old",
+                                "created_at": "2024-01-01T00:00:00Z"}) + "\n")
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+        assert [item["name"] for item in stale_items] == ["stale"]
+
+        trash_path = Path(handler.export_items_to_trash(stale_items, "30d"))
+        assert handler.delete_items_from_storage(stale_items) == 4
+
+        [entry] = read_manifest(trash_path.parent)
+        assert entry["item_count"] == 4
+        assert len(_read_trash(trash_path).splitlines()) == 4
+        assert b'"old"' in jsonl_file.read_bytes()
+
+    def test_relation_not_matched_by_id(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """An expired entity matched by id does not cascade to relations naming the same value."""
+        with open(jsonl_file, "w") as f:
+            f.write(json.dumps({"id": "shared", "created_at": "2024-01-01T00:00:00Z"}) + "\n")
+            f.write(json.dumps({"type": "relation", "from": "shared", "to": "x", "relationType": "r"}) + "\n")
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+        assert handler.delete_items_from_storage(stale_items) == 1
+        with open(jsonl_file) as f:
+            assert json.loads(f.readline())["type"] == "relation"
+
+
+class TestMemoryMcpTimestampPrefilter:
+    """Tests for the raw-bytes created_at prefilter used when scanning for stale entities."""
+
+    def _write_lines(self, jsonl_file: Path, *records: dict) -> None:
+        with open(jsonl_file, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def test_fresh_lines_not_decoded(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+        monkeypatch,
+    ):
+        """Lines the prefilter rules out never reach json.loads()."""
+        self._write_lines(
+            jsonl_file,
+            {"name": "stale", "created_at": "2024-01-01T00:00:00.000Z"},
+            {"name": "fresh", "created_at": "2024-03-01T00:00:00.000Z"},
+            {"name": "fresh_date_only", "created_at": "2024-03-01"},
+            {"type": "relation", "from": "stale", "to": "fresh", "relationType": "r"},
+        )
+
+        decoded: list[bytes] = []
+        real_loads = json.loads
+
+        def counting_loads(s, *args, **kwargs):
+            decoded.append(s)
+            return real_loads(s, *args, **kwargs)
+
+        monkeypatch.setattr("operations.cleanup.handlers.memory_mcp.json.loads", counting_loads)
+
+        handler = MemoryMcpHandler()
+        items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+        assert [item["name"] for item in items] == ["stale"]
+        assert len(decoded) == 1
+
+    def test_non_utc_offset_falls_back_to_full_parse(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Offsets the fast path can't normalize are classified by the full parse."""
+        # 2024-01-31T23:30:00-05:00 == 2024-02-01T04:30:00Z: NOT stale despite the earlier local date
+        # 2024-02-01T02:00:00+05:00 == 2024-01-31T21:00:00Z: stale despite the later local date
+        self._write_lines(
+            jsonl_file,
+            {"name": "behind_utc", "created_at": "2024-01-31T23:30:00-05:00"},
+            {"name": "ahead_of_utc", "created_at": "2024-02-01T02:00:00+05:00"},
+        )
+
+        handler = MemoryMcpHandler()
+        items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+        assert [item["name"] for item in items] == ["ahead_of_utc"]
+
+    def test_nested_created_at_not_mistaken_for_top_level(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Only the top-level created_at decides staleness, even when nested ones also match."""
+        self._write_lines(
+            jsonl_file,
+            {"name": "nested_only", "meta": {"created_at": "2024-01-01T00:00:00Z"}},
+            {"name": "fresh_top", "created_at": "2024-03-01T00:00:00Z", "meta": {"created_at": "2024-01-01T00:00:00Z"}},
+            {"name": "stale_top", "meta": {"created_at": "2024-03-01T00:00:00Z"}, "created_at": "2024-01-01T00:00:00Z"},
+        )
+
+        handler = MemoryMcpHandler()
+        items = handler.get_stale_items(datetime(2024, 2, 1, tzinfo=timezone.utc))
+
+        assert [item["name"] for item in items] == ["stale_top"]
+
+    def test_fractional_seconds_compared_exactly(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Millisecond timestamps are padded so they compare correctly against microsecond cutoffs."""
+        self._write_lines(jsonl_file, {"name": "ms", "created_at": "2024-01-15T12:00:00.123Z"})
+
+        handler = MemoryMcpHandler()
+
+        assert handler.get_stale_items(datetime(2024, 1, 15, 12, 0, 0, 123000, tzinfo=timezone.utc)) == []
+        assert len(handler.get_stale_items(datetime(2024, 1, 15, 12, 0, 0, 123001, tzinfo=timezone.utc))) == 1
+
+
+class TestMemoryMcpConcurrentAppends:
+    """Tests for rewrites racing with the MCP server appending to the JSONL file."""
+
+    def test_lines_appended_during_rewrite_preserved(
+        self,
+        with_jsonl_data: Path,
+        cutoff_datetime: datetime,
+        apply_mock_patches: dict,
+        monkeypatch,
+    ):
+        """Lines appended while the prefix is being rewritten are carried over, unfiltered."""
+        appended = json.dumps({"name": "stale_id_and_name", "created_at": "2099-01-01T00:00:00Z"}).encode() + b"\n"
+
+        handler = MemoryMcpHandler()
+        stale_items = handler.get_stale_items(cutoff_datetime)
+
+        # simulate the MCP appending a line (named like an expired entity) mid-pass
+        real_fsync = os.fsync
+        appended_once: list[bool] = []
+
+        def appending_fsync(fd):
+            if not appended_once:
+                appended_once.append(True)
+                with open(with_jsonl_data, "ab") as f:
+                    f.write(appended)
+            real_fsync(fd)
+
+        monkeypatch.setattr("operations.cleanup.handlers.memory_mcp.os.fsync", appending_fsync)
+        trash_path = Path(handler.export_items_to_trash(stale_items, "30d"))
+        deleted = handler.delete_items_from_storage(stale_items)
+
+        assert deleted == 4
+        assert with_jsonl_data.read_bytes().endswith(appended)
+        assert appended not in _read_trash(trash_path)
+
+    def test_partial_trailing_line_kept_verbatim(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """A final line still being written (no newline) is never dropped, even by a wipe."""
+        complete = json.dumps({"name": "done", "created_at": "2024-01-01T00:00:00Z"}).encode() + b"\n"
+        partial = b'{"name": "in_progr'
+        jsonl_file.write_bytes(complete + partial)
+
+        handler = MemoryMcpHandler()
+        handler.wipe(backup=False)
+
+        assert jsonl_file.read_bytes() == partial
+
+    def test_final_step_holds_advisory_lock(
+        self,
+        with_jsonl_data: Path,
+        cutoff_datetime: datetime,
+        apply_mock_patches: dict,
+        monkeypatch,
+    ):
+        """The rename happens under an exclusive advisory lock, released straight afterwards."""
+        events: list[str] = []
+        real_flock = fcntl.flock
+        real_replace = os.replace
+
+        def recording_flock(fd, op):
+            events.append("lock" if op == fcntl.LOCK_EX else "unlock")
+            real_flock(fd, op)
+
+        def recording_replace(src, dst):
+            events.append("replace")
+            real_replace(src, dst)
+
+        monkeypatch.setattr("operations.cleanup.handlers.memory_mcp.fcntl.flock", recording_flock)
+        monkeypatch.setattr("operations.cleanup.handlers.memory_mcp.os.replace", recording_replace)
+
+        handler = MemoryMcpHandler()
+        handler.delete_items_from_storage(handler.get_stale_items(cutoff_datetime))
+
+        assert events == ["lock", "replace", "unlock"]
+
+
+class TestMemoryMcpCompact:
+    """Tests for MemoryMcpHandler.compact()."""
+
+    def _write_lines(self, jsonl_file: Path, *records: dict) -> None:
+        with open(jsonl_file, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def _read_lines(self, jsonl_file: Path) -> list[dict]:
+        with open(jsonl_file) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_merges_duplicate_entities(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Duplicate entity lines merge into one, at the first one's position, with de-duplicated observations."""
+        self._write_lines(
+            jsonl_file,
+            {"type": "entity", "name": "a", "entityType": "note", "observations": ["x", "y"],
+             "created_at": "2024-01-01T00:00:00Z"},
+            {"type": "entity", "name": "b", "entityType": "note", "observations": ["z"]},
+            {"type": "entity", "name": "a", "entityType": "other", "observations": ["y", "w"],
+             "created_at": "2024-03-01T00:00:00Z"},
+        )
+
+        result = MemoryMcpHandler().compact()
+
+        assert result["lines_before"] == 3
+        assert result["lines_after"] == 2
+        assert result["merged_entities"] == 1
+        assert result["bytes_saved"] == result["bytes_before"] - result["bytes_after"] > 0
+
+        remaining = self._read_lines(jsonl_file)
+        assert [r["name"] for r in remaining] == ["a", "b"]
+
+        # first-seen fields win, observations unioned in order, newest created_at kept
+        assert remaining[0]["entityType"] == "note"
+        assert remaining[0]["observations"] == ["x", "y", "w"]
+        assert remaining[0]["created_at"] == "2024-03-01T00:00:00Z"
+
+    def test_drops_exact_duplicate_relations_only(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Exact-duplicate relations are dropped; relations differing in any field are kept."""
+        relation = {"type": "relation", "from": "a", "to": "b", "relationType": "links"}
+        self._write_lines(
+            jsonl_file,
+            relation,
+            {"relationType": "links", "to": "b", "from": "a", "type": "relation"},  # same, reordered keys
+            {**relation, "relationType": "depends_on"},
+        )
+
+        result = MemoryMcpHandler().compact()
+
+        assert result["dropped_relations"] == 1
+        assert self._read_lines(jsonl_file) == [relation, {**relation, "relationType": "depends_on"}]
+
+    def test_unique_lines_kept_byte_for_byte(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+    ):
+        """Lines without duplicates (including malformed & id-only ones) are untouched."""
+        original = (
+            b'{"name": "solo",   "observations": ["caf\xc3\xa9"]}\n'
+            b"not valid json\n"
+            b'{"id": "x", "created_at": "2024-01-01"}\n'
+            b'{"id": "x", "created_at": "2024-01-01"}\n'
+        )
+        jsonl_file.write_bytes(original)
+
+        result = MemoryMcpHandler().compact()
+
+        assert result["lines_after"] == 4
+        assert jsonl_file.read_bytes() == original
+        assert [p for p in jsonl_file.parent.iterdir() if p.name.endswith(".compact.db")] == []
+
+    def test_missing_file(
+        self,
+        apply_mock_patches: dict,
+        monkeypatch,
+        tmp_path: Path,
+    ):
+        """Compacting a non-existent file reports that nothing was done."""
+        monkeypatch.setattr(
+            "operations.cleanup.handlers.memory_mcp.get_storage",
+            lambda name: tmp_path / "missing.jsonl"
+        )
+
+        result = MemoryMcpHandler().compact()
+
+        assert result["compacted"] is False
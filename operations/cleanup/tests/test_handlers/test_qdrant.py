@@ -1,13 +1,15 @@
 """Tests for QdrantHandler (REST API cleanup)."""
 import json
 import pytest
-from datetime import datetime
+from datetime import datetime, timezone
+from pathlib import Path
 from unittest.mock import patch, MagicMock
 from urllib.error import HTTPError, URLError
 
 
+from operations.cleanup.compression import open_reader
 from operations.cleanup.handlers import CleanupError
-from operations.cleanup.handlers.qdrant import QdrantHandler
+from operations.cleanup.handlers.qdrant import RETRIEVE_BATCH_SIZE, QdrantHandler
 from operations.cleanup.tests import NonJsonHttpResponse, create_mock_http_endpoint
 
 
@@ -32,6 +34,70 @@ def _delete_response(status="ok"):
     return {("POST", "/points/delete"): {"status": status}}
 
 
+class _FakeQdrant:
+    """urlopen stand-in serving one collection of {id: (created_at, vector)} points, recording
+    each request's (method, path, body)."""
+
+    def __init__(self, points: dict[int, tuple[str, list[float]]]):
+        self.points = points
+        self.requests: list[tuple[str, str, dict | None]] = []
+        # ids the retrieve endpoint leaves out (e.g. points deleted since they were scrolled through)
+        self.hidden: set[int] = set()
+
+    def _point(self, point_id: int, with_vector: bool) -> dict:
+        created_at, vector = self.points[point_id]
+        point = {"id": point_id, "payload": {"metadata": {"created_at": created_at}}}
+        return {**point, "vector": vector} if with_vector else point
+
+    def _matches(self, point_id: int, point_filter: dict | None) -> bool:
+        # only the metadata.created_at range filters the handler sends (comparing ISO timestamps as strings)
+        created_at = self.points[point_id][0]
+        for condition in (point_filter or {}).get("must", []):
+            created_range = condition["range"]
+            if "gte" in created_range and not created_at >= created_range["gte"]:
+                return False
+            if "lt" in created_range and not created_at < created_range["lt"]:
+                return False
+        return True
+
+    def __call__(self, req, timeout=None):
+        body = json.loads(req.data) if req.data else None
+        path = req.full_url.split("/collections/coding-memory", 1)[1]
+        self.requests.append((req.get_method(), path, body))
+
+        result: dict = {"status": "ok"}
+        if path == "/points/scroll":
+            ids = [point_id for point_id in sorted(self.points) if self._matches(point_id, body.get("filter"))]
+            start = ids.index(body["offset"]) if body.get("offset") else 0
+            page = ids[start:start + body["limit"]]
+            result["result"] = {
+                "points": [self._point(point_id, body["with_vector"]) for point_id in page],
+                "next_page_offset": ids[start + body["limit"]] if start + body["limit"] < len(ids) else None,
+            }
+        elif path == "/points" and req.get_method() == "POST":
+            result["result"] = [self._point(point_id, True) for point_id in body["ids"]
+                                if point_id in self.points and point_id not in self.hidden]
+        elif path == "/points/count":
+            result["result"] = {"count": sum(self._matches(point_id, body.get("filter")) for point_id in self.points)}
+        elif path == "/points/delete":
+            for point_id in body["points"]:
+                self.points.pop(point_id, None)
+
+        resp = MagicMock()
+        resp.read.return_value = json.dumps(result).encode()
+        resp.__enter__ = MagicMock(return_value=resp)
+        resp.__exit__ = MagicMock(return_value=False)
+        return resp
+
+    def calls(self, method: str, path: str) -> list[dict]:
+        return [body or {} for m, p, body in self.requests if (m, p) == (method, path)]
+
+
+def _exported_points(trash_path: str) -> dict:
+    with open_reader(Path(trash_path)) as f:
+        return {point["id"]: point for point in json.loads(f.read())["points"]}
+
+
 class TestQdrantGetExpiredItems:
     """Tests for QdrantHandler.get_stale_items()."""
 
@@ -462,3 +528,87 @@ class TestQdrantWipe:
 
         assert result["wiped"] == 2
         assert "backup_path" not in result  # no backup was created
+
+
+class TestQdrantExport:
+    """Tests for QdrantHandler.export_items_to_trash()."""
+
+    def test_stale_points_vectors_retrieved_in_batches(self, apply_mock_patches: dict, trash_dir: Path):
+        """Stale points are scrolled through without vectors, which are then fetched
+        RETRIEVE_BATCH_SIZE ids per request; a point gone by then is exported as scrolled."""
+        count = RETRIEVE_BATCH_SIZE * 2 + 10
+        qdrant = _FakeQdrant({i: ("2020-01-01T00:00:00Z", [float(i)]) for i in range(1, count + 1)})
+        qdrant.hidden = {5}
+
+        with patch("operations.cleanup.handlers.qdrant.urlopen", side_effect=qdrant):
+            handler = QdrantHandler()
+            items = handler.get_stale_items(datetime(2024, 1, 1).astimezone())
+            exported = _exported_points(handler.export_items_to_trash(items, "30d"))
+
+        assert all(not body["with_vector"] for body in qdrant.calls("POST", "/points/scroll"))
+        retrieves = qdrant.calls("POST", "/points")
+        assert [len(body["ids"]) for body in retrieves] == [RETRIEVE_BATCH_SIZE, RETRIEVE_BATCH_SIZE, 10]
+        assert [i for body in retrieves for i in body["ids"]] == list(range(1, count + 1))
+        assert exported[1]["vector"] == [1.0] and exported[count]["vector"] == [float(count)]
+        assert "vector" not in exported[5]
+
+    def test_wipe_backup_keeps_scrolled_vectors(self, apply_mock_patches: dict, trash_dir: Path):
+        """A wipe scrolls through the vectors itself, so its backup fetches nothing again."""
+        qdrant = _FakeQdrant({1: ("2020-01-01T00:00:00Z", [0.1]), 2: ("2999-01-01T00:00:00Z", [0.2])})
+
+        with patch("operations.cleanup.handlers.qdrant.urlopen", side_effect=qdrant):
+            result = QdrantHandler().wipe(backup=True)
+
+        assert result["wiped"] == 2
+        assert qdrant.calls("POST", "/points") == []
+        exported = _exported_points(result["backup_path"])
+        assert {i: point["vector"] for i, point in exported.items()} == {1: [0.1], 2: [0.2]}
+
+
+class TestQdrantWatermarks:
+    """Tests for Qdrant's incremental scans (from the watermark of the last complete cleanup)."""
+
+    CUTOFF = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    # as left by a cleanup with its cutoff between the old (Jan 1) & newly stale (Feb 1) points
+    WATERMARK = {"cutoff": "2024-01-15T00:00:00+00:00", "full_scan_at": "2024-01-15T00:00:00+00:00"}
+
+    def _qdrant(self) -> _FakeQdrant:
+        return _FakeQdrant({
+            1: ("2024-01-01T00:00:00+00:00", [0.1]),
+            2: ("2024-02-01T00:00:00+00:00", [0.2]),
+            3: ("2024-04-01T00:00:00+00:00", [0.3]),
+        })
+
+    def test_only_points_created_since_last_cutoff_scrolled(self, apply_mock_patches: dict):
+        """Points already older than the last cutoff are filtered out of the scroll, unless a full scan is due."""
+        qdrant = self._qdrant()
+
+        with patch("operations.cleanup.handlers.qdrant.urlopen", side_effect=qdrant):
+            handler = QdrantHandler()
+            handler.watermark = dict(self.WATERMARK)
+            incremental = [item["id"] for item in handler.get_stale_items(self.CUTOFF)]
+            full = [item["id"] for item in QdrantHandler().get_stale_items(self.CUTOFF)]
+
+        assert incremental == [2]
+        assert full == [1, 2]
+        scrolls = qdrant.calls("POST", "/points/scroll")
+        assert scrolls[0]["filter"] == {"must": [{
+            "key": "metadata.created_at",
+            "range": {"gte": self.WATERMARK["cutoff"], "lt": self.CUTOFF.isoformat()},
+        }]}
+        assert "filter" not in scrolls[-1]
+
+    def test_cleanup_records_watermark(self, apply_mock_patches: dict, trash_dir: Path):
+        """A complete cleanup records its cutoff, keeping the last full scan's time, and counts the
+        collection's points for its footprint (as the scan didn't scroll through them all)."""
+        qdrant = self._qdrant()
+
+        with patch("operations.cleanup.handlers.qdrant.urlopen", side_effect=qdrant):
+            handler = QdrantHandler()
+            handler.watermark = dict(self.WATERMARK)
+            handler.get_cutoff = lambda retention: self.CUTOFF  # type: ignore[method-assign]
+            result = handler.cleanup("30d")
+
+        assert result["deleted"] == 1
+        assert result["watermark"] == {"cutoff": self.CUTOFF.isoformat(), "full_scan_at": self.WATERMARK["full_scan_at"]}
+        assert result["footprint"]["items"] == 2
@@ -4,7 +4,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 
+from operations.cleanup.core import restore_memory_backends
 from operations.cleanup.handlers.serena import SerenaHandler
+from operations.cleanup.trash import empty_expired_trash, find_trashed_items, read_manifest
 
 
 class TestSerenaFindSerenaDirs:
@@ -324,3 +326,58 @@ class TestSerenaWipe:
 
         assert result["wiped"] == 0
         assert "no memory files found" in result["message"]
+
+
+class TestSerenaPacking:
+    """Tests for packing trashed files into a tar archive (trash.pack_serena)."""
+
+    def test_packs_batch_into_one_archive(
+        self,
+        apply_mock_patches,
+        serena_memories_root: Path,
+        trash_dir: Path,
+        monkeypatch,
+    ):
+        """A batch's files become one indexed archive: restore extracts a member, purge is one unlink."""
+        monkeypatch.setattr("operations.cleanup.handlers.serena.is_serena_trash_packing_enabled", lambda: True)
+        monkeypatch.setattr("operations.cleanup.handlers.serena.get_trash_grace_period", lambda: "0h")
+        memory = serena_memories_root / "project_1" / ".serena" / "memories" / "memory_0.md"
+        old_time = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+        os.utime(memory, (old_time, old_time))
+
+        SerenaHandler().cleanup("0h")
+
+        [entry] = read_manifest(trash_dir / "serena")
+        [archive] = entry["files"]
+        assert archive.endswith(".tar")
+        assert sorted(path.name for path in (trash_dir / "serena").iterdir()) == [".items", ".manifest.jsonl",
+                                                                                  Path(archive).name]
+        assert not memory.exists()
+        assert len(find_trashed_items("serena")) == 4
+
+        restore_memory_backends(["serena"], native_ids=[str(memory)])
+
+        assert memory.read_text() == "# Memory 0\n\nProject 1 memory content."
+        assert memory.stat().st_mtime == old_time
+
+        assert empty_expired_trash("30d")["removed"] == 1
+        assert not Path(archive).exists()
+
+    def test_restores_non_utf8_member(
+        self,
+        apply_mock_patches,
+        serena_memories_root: Path,
+        trash_dir: Path,
+        monkeypatch,
+    ):
+        """A packed file's bytes are restored as-is, even if they aren't valid UTF-8."""
+        monkeypatch.setattr("operations.cleanup.handlers.serena.is_serena_trash_packing_enabled", lambda: True)
+        memory = serena_memories_root / "project_1" / ".serena" / "memories" / "memory_0.md"
+        memory.write_bytes(b"# Memory \xff\xfe\n")
+        old_time = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+        os.utime(memory, (old_time, old_time))
+
+        SerenaHandler().cleanup("30d")
+        restore_memory_backends(["serena"], native_ids=[str(memory)])
+
+        assert memory.read_bytes() == b"# Memory \xff\xfe\n"
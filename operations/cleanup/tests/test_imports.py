@@ -0,0 +1,78 @@
+"""Tests for the cleanup package's startup cost: importing it loads & resolves nothing it doesn't need."""
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+# modules only some commands need, which `import operations.cleanup.core` mustn't load
+DEFERRED_MODULES = (
+    "operations.validate_config",
+    "operations.cleanup.background",
+    "operations.cleanup.catalog",
+    "operations.cleanup.compression",
+    "operations.cleanup.content_store",
+    "operations.cleanup.daemon",
+    "operations.cleanup.executor",
+    "operations.cleanup.handlers.base",
+    "operations.cleanup.metrics",
+    "operations.cleanup.profiling",
+    "operations.cleanup.prometheus",
+    "operations.cleanup.purge",
+    "operations.cleanup.stats",
+    "operations.cleanup.trash",
+    "concurrent.futures",
+    "sqlite3",
+)
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    # (in a fresh interpreter, as this one has imported everything already)
+    return subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+
+class TestStartup:
+    """Tests for what importing the sweep CLI costs."""
+
+    def test_import_is_side_effect_free(self):
+        """No config is read (nor git forked), no .archives path resolved, and no handler module
+        (nor YAML parser) loaded until first used."""
+        script = "\n".join([
+            "import subprocess, sys",
+            "forked = []",
+            "subprocess.Popen.__init__ = lambda self, *a, **k: forked.append(a)",
+            "from operations import config_loader",
+            "from operations.cleanup import core, state, trash",
+            "loaded = sorted(m for m in sys.modules if m == 'yaml' or m.startswith('operations.cleanup.handlers.'))",
+            "print(forked, config_loader.get_config.cache_info().currsize, loaded,",
+            "      sorted({'ARCHIVES_DIR', 'STATE_PATH'} & set(vars(state))), 'BASE_TRASH_DIR' in vars(trash))",
+        ])
+
+        out = _run_python("-c", script).stdout.strip()
+
+        assert out == "[] 0 [] [] False"
+
+    def test_handlers_load_on_first_use(self):
+        """The registry imports every backend's handler the first time it's iterated."""
+        script = "\n".join([
+            "import sys",
+            "from operations.cleanup.handlers import HANDLERS",
+            "print(len(HANDLERS), 'operations.cleanup.handlers.qdrant' in sys.modules)",
+            "print([h.name for h in HANDLERS], 'operations.cleanup.handlers.qdrant' in sys.modules)",
+        ])
+
+        out = _run_python("-c", script).stdout.splitlines()
+
+        assert out == ["4 False", "['claude-mem', 'serena', 'qdrant', 'memory-mcp'] True"]
+
+    def test_import_defers_command_modules(self):
+        """Importing the CLI loads none of DEFERRED_MODULES (they're imported by the commands using them)."""
+        script = "\n".join([
+            "import sys",
+            "import operations.cleanup.core",
+            f"print(sorted(set(sys.modules) & set({DEFERRED_MODULES!r})))",
+        ])
+
+        out = _run_python("-c", script).stdout.strip()
+
+        assert out == "[]"
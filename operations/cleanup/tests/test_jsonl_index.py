@@ -0,0 +1,191 @@
+"""Tests for the JSONL byte-offset sidecar index."""
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup.handlers.memory_mcp import MemoryMcpHandler, _line_created_at
+from operations.cleanup.jsonl_index import JsonlOffsetIndex
+
+
+def _line(name: str, created_at: str | None) -> bytes:
+    record: dict = {"name": name}
+    if created_at:
+        record["created_at"] = created_at
+    return json.dumps(record).encode() + b"\n"
+
+
+@pytest.fixture
+def index_paths(tmp_path: Path) -> tuple[Path, Path]:
+    """JSONL file with 2 stale, 1 valid & 1 untimestamped line, plus the index path to use."""
+    jsonl_path = tmp_path / "memory.jsonl"
+    jsonl_path.write_bytes(
+        _line("stale_1", "2024-01-01T00:00:00Z")
+        + _line("valid", "2024-03-01T00:00:00Z")
+        + _line("no_timestamp", None)
+        + _line("stale_2", "2024-01-10T00:00:00+05:00")
+    )
+    return jsonl_path, tmp_path / ".archives" / "memory-mcp.idx"
+
+
+def _stale_names(index: JsonlOffsetIndex, cutoff: datetime) -> list[str]:
+    return [json.loads(line)["name"] for line in index.read_lines(index.iter_older_than(cutoff))]
+
+
+class TestJsonlOffsetIndex:
+    """Tests for JsonlOffsetIndex."""
+
+    CUTOFF = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+    def test_build_and_seek(self, index_paths: tuple[Path, Path]):
+        """Builds the index on first use and seeks straight to stale lines."""
+        jsonl_path, index_path = index_paths
+        index = JsonlOffsetIndex(jsonl_path, index_path, _line_created_at)
+
+        assert index.refresh() == "rebuilt"
+        assert index_path.exists()
+
+        # untimestamped lines are not indexed
+        assert len(index) == 3
+        assert _stale_names(index, self.CUTOFF) == ["stale_1", "stale_2"]
+
+    def test_unchanged_file_reuses_index(self, index_paths: tuple[Path, Path]):
+        """A second refresh against an unchanged file loads the persisted index as-is."""
+        jsonl_path, index_path = index_paths
+        JsonlOffsetIndex(jsonl_path, index_path, _line_created_at).refresh()
+
+        index = JsonlOffsetIndex(jsonl_path, index_path, _line_created_at)
+        assert index.refresh() == "current"
+        assert _stale_names(index, self.CUTOFF) == ["stale_1", "stale_2"]
+
+    def test_append_extends_incrementally(self, index_paths: tuple[Path, Path]):
+        """Appended lines are indexed from the last indexed offset, without re-reading the prefix."""
+        jsonl_path, index_path = index_paths
+        JsonlOffsetIndex(jsonl_path, index_path, _line_created_at).refresh()
+
+        with open(jsonl_path, "ab") as f:
+            f.write(_line("stale_3", "2023-12-01"))
+
+        seen: list[bytes] = []
+
+        def recording_reader(line: bytes):
+            seen.append(line)
+            return _line_created_at(line)
+
+        index = JsonlOffsetIndex(jsonl_path, index_path, recording_reader)
+        assert index.refresh() == "extended"
+        assert seen == [_line("stale_3", "2023-12-01")]
+        assert _stale_names(index, self.CUTOFF) == ["stale_1", "stale_2", "stale_3"]
+
+    def test_rewrite_triggers_rebuild(self, index_paths: tuple[Path, Path]):
+        """A rewritten (not just appended) file invalidates the index."""
+        jsonl_path, index_path = index_paths
+        JsonlOffsetIndex(jsonl_path, index_path, _line_created_at).refresh()
+
+        jsonl_path.write_bytes(_line("valid", "2024-03-01T00:00:00Z") + _line("stale_9", "2024-01-01"))
+
+        index = JsonlOffsetIndex(jsonl_path, index_path, _line_created_at)
+        assert index.refresh() == "rebuilt"
+        assert _stale_names(index, self.CUTOFF) == ["stale_9"]
+
+    def test_partial_trailing_line_deferred(self, index_paths: tuple[Path, Path]):
+        """A line still being written (no trailing newline) is picked up on a later refresh."""
+        jsonl_path, index_path = index_paths
+        partial = _line("stale_3", "2023-12-01")
+        with open(jsonl_path, "ab") as f:
+            f.write(partial[:10])
+
+        index = JsonlOffsetIndex(jsonl_path, index_path, _line_created_at)
+        index.refresh()
+        assert len(index) == 3
+
+        with open(jsonl_path, "ab") as f:
+            f.write(partial[10:])
+
+        index = JsonlOffsetIndex(jsonl_path, index_path, _line_created_at)
+        assert index.refresh() == "extended"
+        assert _stale_names(index, self.CUTOFF)[-1] == "stale_3"
+
+    def test_corrupt_index_rebuilt(self, index_paths: tuple[Path, Path]):
+        """An unreadable index file is rebuilt rather than trusted."""
+        jsonl_path, index_path = index_paths
+        index_path.parent.mkdir(parents=True)
+        index_path.write_bytes(b"garbage")
+
+        index = JsonlOffsetIndex(jsonl_path, index_path, _line_created_at)
+        assert index.refresh() == "rebuilt"
+        assert len(index) == 3
+
+
+class TestMemoryMcpWithIndex:
+    """Tests for MemoryMcpHandler with the sidecar index enabled."""
+
+    @pytest.fixture
+    def index_enabled(self, monkeypatch):
+        monkeypatch.setattr(
+            "operations.cleanup.handlers.memory_mcp.is_memory_mcp_index_enabled",
+            lambda: True
+        )
+
+    def test_matches_full_scan(
+        self,
+        with_jsonl_data: Path,
+        cutoff_datetime: datetime,
+        apply_mock_patches: dict,
+        archives_dir: Path,
+        monkeypatch,
+    ):
+        """Stale items found via the index match those found by scanning the whole file."""
+        handler = MemoryMcpHandler()
+        full_scan = handler.get_stale_items(cutoff_datetime)
+
+        monkeypatch.setattr(
+            "operations.cleanup.handlers.memory_mcp.is_memory_mcp_index_enabled",
+            lambda: True
+        )
+        via_index = handler.get_stale_items(cutoff_datetime)
+
+        assert via_index == full_scan
+        assert (archives_dir / "memory-mcp.idx").exists()
+
+    def test_rewrite_rebuilds_index(
+        self,
+        jsonl_file: Path,
+        apply_mock_patches: dict,
+        archives_dir: Path,
+        index_enabled,
+    ):
+        """A cleanup's rewrite leaves a current index of the new file behind (built as it wrote it),
+        which later appends only extend."""
+        jsonl_file.write_bytes(
+            _line("old", "2020-01-01T00:00:00Z") + _line("no_timestamp", None)
+            + _line("new_1", "2999-01-01T00:00:00Z") + _line("new_2", "2999-02-01T00:00:00Z")
+        )
+        index_path = archives_dir / "memory-mcp.idx"
+        future = datetime(3000, 1, 1, tzinfo=timezone.utc)
+
+        MemoryMcpHandler().cleanup("30d")
+
+        index = JsonlOffsetIndex(jsonl_file, index_path, _line_created_at)
+        assert index.refresh() == "current"
+        assert _stale_names(index, future) == ["new_1", "new_2"]
+
+        with open(jsonl_file, "ab") as f:
+            f.write(_line("appended", "2020-01-01T00:00:00Z"))
+        index = JsonlOffsetIndex(jsonl_file, index_path, _line_created_at)
+        assert index.refresh() == "extended"
+        assert _stale_names(index, future) == ["new_1", "new_2", "appended"]
+
+    def test_rewrite_without_index_removes_it(
+        self,
+        with_jsonl_data: Path,
+        apply_mock_patches: dict,
+        archives_dir: Path,
+    ):
+        """A rewrite with the index disabled removes any index left from when it was enabled."""
+        (archives_dir / "memory-mcp.idx").write_bytes(b"outdated")
+
+        MemoryMcpHandler().cleanup("30d")
+
+        assert not (archives_dir / "memory-mcp.idx").exists()
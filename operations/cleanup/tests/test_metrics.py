@@ -0,0 +1,108 @@
+"""Tests for per-phase cleanup instrumentation & the sweep metrics log."""
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup.core import run_cleanup
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup import state
+from operations.cleanup.metrics import (
+    METRICS_LOG_FILENAME,
+    PhaseMetrics,
+    append_metrics_log,
+    read_metrics_log,
+)
+
+
+@pytest.fixture
+def claude_mem_only(apply_mock_patches, with_sqlite_data: Path, monkeypatch) -> Path:
+    """Sweep only claude-mem (whose 4 rows are all stale relative to 30d), 2 rows at a time."""
+    monkeypatch.setattr("operations.cleanup.core.HANDLERS", (ClaudeMemHandler,))
+    monkeypatch.setattr("operations.validate_config.full_validate", lambda config: [])
+    monkeypatch.setattr("operations.cleanup.core.get_retention", lambda name: "30d")
+    monkeypatch.setattr("operations.cleanup.handlers.claude_mem.get_cleanup_batch_size", lambda: 2)
+    return with_sqlite_data
+
+
+class TestPhaseMetrics:
+    """Tests for PhaseMetrics."""
+
+    def test_stretches_of_a_phase_add_up(self):
+        """Re-entering a phase accumulates its time & items, from which throughput is derived."""
+        metrics = PhaseMetrics()
+        for _ in range(2):
+            with metrics.phase("export", 5):
+                time.sleep(0.01)
+        with metrics.phase("trash") as counts:
+            counts["items"] = 3
+
+        phases = metrics.as_dict()
+        assert phases["export"]["items"] == 10
+        assert phases["export"]["seconds"] >= 0.02
+        assert phases["export"]["items_per_sec"] == pytest.approx(10 / phases["export"]["seconds"], rel=0.01)
+        assert phases["trash"]["items"] == 3
+        assert phases["trash"]["process_peak_rss_bytes"] > 0
+
+    def test_iter_phase_counts_batch_items(self):
+        """Producing batches is measured as the phase, counting their items."""
+        metrics = PhaseMetrics()
+
+        assert list(metrics.iter_phase("scan", iter([[1, 2], [3]]))) == [[1, 2], [3]]
+        assert metrics.as_dict()["scan"]["items"] == 3
+
+    @pytest.mark.skipif(not os.path.exists("/proc/thread-self/io"), reason="needs per-thread I/O counters")
+    def test_io_bytes(self, tmp_path: Path):
+        """Bytes written within a phase are attributed to it."""
+        metrics = PhaseMetrics()
+        with metrics.phase("export"):
+            with open(tmp_path / "out", "wb") as f:
+                f.write(b"x" * 100_000)
+
+        assert metrics.as_dict()["export"]["bytes_written"] >= 100_000
+
+
+class TestCleanupMetrics:
+    """Tests for the metrics recorded by cleanups & sweeps."""
+
+    def test_handler_result_has_phases(self, claude_mem_only: Path, trash_dir: Path):
+        """A cleanup reports each phase it went through, with the items it handled."""
+        result = ClaudeMemHandler().cleanup("30d")
+
+        phases = result["metrics"]
+        assert set(phases) == {"scan", "export", "delete", "finalize"}
+        assert phases["scan"]["items"] == phases["export"]["items"] == phases["delete"]["items"] == 4
+
+    def test_skipped_cleanup_has_no_metrics(self, claude_mem_only: Path):
+        """A backend kept forever isn't scanned, so has nothing to report."""
+        assert "metrics" not in ClaudeMemHandler().cleanup("always")
+
+    def test_each_sweep_is_logged(self, claude_mem_only: Path, trash_dir: Path):
+        """Every sweep (dry or not) appends its per-backend phases & totals to the metrics log."""
+        run_cleanup(force=True, dry_run=True)
+        result = run_cleanup(force=True)
+
+        assert result["metrics"]["seconds"] > 0
+        dry, real = read_metrics_log()
+        assert dry["dry_run"] and dry["backends"]["claude-mem"]["would_delete"] == 4
+        assert set(dry["backends"]["claude-mem"]["phases"]) == {"scan"}
+        assert not real["dry_run"] and real["backends"]["claude-mem"]["deleted"] == 4
+        assert real["backends"]["claude-mem"]["phases"]["delete"]["items"] == 4
+        assert "trash" in real
+
+    def test_log_keeps_last_records(self, apply_mock_patches):
+        """Appending past max_records drops the oldest records."""
+        for i in range(5):
+            append_metrics_log({"run": i}, max_records=3)
+
+        assert read_metrics_log() == [{"run": 2}, {"run": 3}, {"run": 4}]
+
+    def test_unwritable_log_only_warns(self, claude_mem_only: Path, trash_dir: Path, caplog):
+        """A sweep whose metrics log can't be written still completes (with a warning)."""
+        (state.ARCHIVES_DIR / METRICS_LOG_FILENAME).mkdir(parents=True)
+
+        result = run_cleanup(force=True)
+
+        assert result["results"][0]["deleted"] == 4
+        assert "Couldn't write the metrics log" in caplog.text
@@ -0,0 +1,58 @@
+"""Tests for built-in sweep profiling (sweep --profile)."""
+import pstats
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup.core import main, run_cleanup
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.profiling import SweepProfiler
+
+
+@pytest.fixture
+def claude_mem_only(apply_mock_patches, with_sqlite_data: Path, monkeypatch) -> Path:
+    """Sweep only claude-mem (whose rows are all stale relative to 30d)."""
+    monkeypatch.setattr("operations.cleanup.core.HANDLERS", (ClaudeMemHandler,))
+    monkeypatch.setattr("operations.validate_config.full_validate", lambda config: [])
+    monkeypatch.setattr("operations.cleanup.core.get_retention", lambda name: "30d")
+    return with_sqlite_data
+
+
+class TestSweepProfiler:
+    """Tests for profiled sweeps."""
+
+    def test_cpu_profile_per_handler(self, claude_mem_only: Path, trash_dir: Path):
+        """Each handler (and the sweep's own trash phase) gets cProfile stats, plus collapsed stacks rooted at phases."""
+        profiler = SweepProfiler("cpu", collapsed=True)
+
+        result = run_cleanup(force=True, profiler=profiler)
+
+        written = {Path(path).name for path in result["profiles"]}
+        assert {"claude-mem.pstats", "sweep.pstats"} <= written
+        assert not any(name.endswith(".alloc.txt") for name in written)
+        stats = pstats.Stats(str(profiler.directory / "claude-mem.pstats"))
+        assert any(func[2] == "delete_items_from_storage" for func in stats.stats)  # type: ignore[attr-defined]
+
+        collapsed = profiler.directory / "claude-mem.collapsed"
+        if collapsed.exists():  # (a fast phase may finish before the first sample)
+            for line in collapsed.read_text().splitlines():
+                stack, count = line.rsplit(" ", 1)
+                assert stack.split(";")[0] in {"scan", "export", "delete", "finalize"} and int(count) > 0
+
+    def test_mem_profile_reports_allocations(self, claude_mem_only: Path):
+        """--profile=mem reports each phase's peak & top allocation sites, then stops tracing."""
+        profiler = SweepProfiler("mem")
+
+        result = run_cleanup(force=True, dry_run=True, profiler=profiler)
+
+        assert [Path(path).name for path in result["profiles"]] == ["claude-mem.alloc.txt"]
+        assert (profiler.directory / "claude-mem.alloc.txt").read_text().startswith("== scan: peak traced memory")
+        assert not tracemalloc.is_tracing()
+
+    def test_collapsed_requires_profile(self, monkeypatch):
+        """--profile-collapsed on its own is rejected."""
+        monkeypatch.setattr("sys.argv", ["sweep", "--profile-collapsed"])
+
+        with pytest.raises(SystemExit):
+            main()
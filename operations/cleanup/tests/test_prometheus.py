@@ -0,0 +1,120 @@
+"""Tests for the Prometheus textfile export (sweep --metrics-out) & the storage footprints it reports."""
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from operations.cleanup.core import main, run_cleanup
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.handlers.memory_mcp import MemoryMcpHandler
+from operations.cleanup.handlers.serena import SerenaHandler
+from operations.cleanup.prometheus import render_metrics
+
+
+def _samples(text: str) -> dict[str, float]:
+    """Parse the samples of a textfile (keyed by metric name & labels)."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+@pytest.fixture
+def claude_mem_only(apply_mock_patches, with_sqlite_data: Path, monkeypatch) -> Path:
+    """Sweep only claude-mem (whose 4 rows are all stale relative to 30d)."""
+    monkeypatch.setattr("operations.cleanup.core.HANDLERS", (ClaudeMemHandler,))
+    monkeypatch.setattr("operations.validate_config.full_validate", lambda config: [])
+    monkeypatch.setattr("operations.cleanup.core.get_retention", lambda name: "30d")
+    return with_sqlite_data
+
+
+class TestFootprints:
+    """Tests for the items & bytes handlers report from their scans."""
+
+    def test_claude_mem(self, claude_mem_only: Path, trash_dir: Path):
+        """Rows left are counted, and the database sized."""
+        handler = ClaudeMemHandler()
+
+        assert handler.cleanup("30d", dry_run=True)["footprint"] == {"items": 4, "bytes": claude_mem_only.stat().st_size}
+        assert handler.cleanup("30d")["footprint"]["items"] == 0
+
+    def test_memory_mcp(self, apply_mock_patches, with_jsonl_data: Path, trash_dir: Path,
+                        cutoff_datetime: datetime, monkeypatch):
+        """Lines read by the scan, less those dropped, are counted, and the file sized."""
+        handler = MemoryMcpHandler()
+        monkeypatch.setattr(handler, "get_cutoff", lambda retention: cutoff_datetime)
+
+        footprint = handler.cleanup("30d")["footprint"]
+
+        assert footprint == {"items": 5, "bytes": with_jsonl_data.stat().st_size}
+
+    def test_serena(self, apply_mock_patches, serena_memories_root: Path):
+        """Memory files listed by the scan are counted & sized (skipping symlinked projects)."""
+        files = list(serena_memories_root.glob("project_*/.serena/memories/*.md"))
+
+        footprint = SerenaHandler().cleanup("30d")["footprint"]
+
+        assert footprint == {"items": len(files), "bytes": sum(f.stat().st_size for f in files)}
+
+
+class TestRenderMetrics:
+    """Tests for render_metrics()."""
+
+    def test_exposition_format(self):
+        """Each family gets HELP & TYPE lines, values are written in full, and absent data is left out."""
+        result = {
+            "results": [
+                {"storage": "qdrant", "deleted": 3, "metrics": {"scan": {"seconds": 0.5, "items": 3}}},
+                {"storage": "serena", "error": "boom"},
+            ],
+            "trash_emptied": 2, "trash_evicted": 1, "trash_bytes_freed": 10,
+            "metrics": {"seconds": 1.25},
+        }
+        state = {
+            "footprints": {"qdrant": {"items": 123456789}},
+            "last_success": {"qdrant": "2024-01-15T10:30:00+00:00"},
+        }
+
+        text = render_metrics(result, state, {"qdrant": 2048})  # type: ignore[arg-type]
+        samples = _samples(text)
+
+        assert "# TYPE bureau_memory_items gauge" in text
+        assert 'bureau_memory_items{backend="qdrant"} 123456789' in text
+        assert "bureau_memory_bytes" not in text
+        assert samples['bureau_memory_last_success_timestamp_seconds{backend="qdrant"}'] == 1705314600
+        assert samples['bureau_sweep_expired_items{backend="qdrant"}'] == 3
+        assert samples['bureau_sweep_trashed_items{backend="qdrant"}'] == 3
+        assert samples['bureau_sweep_errors{backend="serena"}'] == 1
+        assert samples['bureau_sweep_phase_seconds{backend="qdrant",phase="scan"}'] == 0.5
+        assert samples["bureau_sweep_trash_purged_items"] == 3
+        assert samples['bureau_trash_bytes{backend="qdrant"}'] == 2048
+
+
+class TestMetricsOut:
+    """Tests for sweep --metrics-out."""
+
+    def test_sweep_writes_textfile(self, claude_mem_only: Path, tmp_path: Path, monkeypatch):
+        """A sweep atomically writes its metrics, including the store's size after cleanup & the trash's."""
+        out = tmp_path / "textfile" / "bureau.prom"
+        monkeypatch.setattr("sys.argv", ["sweep", "-f", "-q", "--metrics-out", str(out)])
+
+        assert main() == 0
+
+        samples = _samples(out.read_text())
+        assert samples['bureau_memory_items{backend="claude-mem"}'] == 0
+        assert samples['bureau_sweep_trashed_items{backend="claude-mem"}'] == 4
+        assert samples['bureau_trash_bytes{backend="claude-mem"}'] > 0
+        assert 'bureau_memory_last_success_timestamp_seconds{backend="claude-mem"}' in samples
+        assert [path.name for path in out.parent.iterdir()] == ["bureau.prom"]
+
+    def test_skipped_sweep_leaves_textfile(self, claude_mem_only: Path, tmp_path: Path, monkeypatch):
+        """A sweep skipped as too recent leaves the previous metrics in place."""
+        out = tmp_path / "bureau.prom"
+        run_cleanup(force=True)
+        out.write_text("previous\n")
+        monkeypatch.setattr("sys.argv", ["sweep", "-q", "--metrics-out", str(out)])
+
+        assert main() == 0
+        assert out.read_text() == "previous\n"
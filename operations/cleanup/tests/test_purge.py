@@ -0,0 +1,72 @@
+"""Tests for the scandir-based purge helpers."""
+import os
+from pathlib import Path
+
+from operations.cleanup.purge import remove_files_older_than, remove_path, remove_tree, run_parallel
+from operations.cleanup.trash import empty_expired_trash, write_manifest
+
+
+class TestRemoveTree:
+    """Tests for remove_tree() & remove_path()."""
+
+    def test_counts_and_deletes_nested_tree(self, tmp_path: Path):
+        """Every file is counted (with its size) as the tree is deleted."""
+        root = tmp_path / "serena"
+        for project in range(3):
+            memories = root / f"project_{project}" / "nested"
+            memories.mkdir(parents=True)
+            (memories / "memory.md").write_text("x" * 10)
+        (root / "top.md").write_text("y")
+
+        assert remove_tree(root) == (4, 31)
+        assert not root.exists()
+        assert remove_tree(root) == (0, 0)
+
+    def test_remove_path_uses_known_size(self, tmp_path: Path):
+        """A file of known size is just unlinked; a directory falls back to remove_tree()."""
+        file = tmp_path / "a.json"
+        file.write_text("{}")
+        directory = tmp_path / "dir"
+        directory.mkdir()
+        (directory / "b.json").write_text("{}")
+
+        assert remove_path(file, size=0) == (1, 0)
+        assert remove_path(file) == (0, 0)
+        assert remove_path(directory, size=0) == (1, 2)
+        assert not directory.exists()
+
+
+class TestRemoveFilesOlderThan:
+    """Tests for remove_files_older_than()."""
+
+    def test_keeps_new_and_named_files(self, tmp_path: Path):
+        old, new, manifest = tmp_path / "sub" / "old.md", tmp_path / "new.md", tmp_path / ".manifest.jsonl"
+        old.parent.mkdir()
+        for path in (old, new, manifest):
+            path.write_text("abc")
+        os.utime(old, (1000, 1000))
+        os.utime(manifest, (1000, 1000))
+
+        assert remove_files_older_than(tmp_path, 2000, keep=[".manifest.jsonl"]) == (1, 3)
+        assert not old.exists() and new.exists() and manifest.exists()
+
+
+class TestParallelPurge:
+    """Tests for purging backends concurrently."""
+
+    def test_run_parallel_keeps_order(self):
+        assert run_parallel(lambda n: n * n, range(20)) == [n * n for n in range(20)]
+
+    def test_expired_trash_reports_bytes_freed(self, trash_dir: Path, monkeypatch):
+        """Expired batches across backends are purged, freeing their recorded sizes."""
+        monkeypatch.setattr("operations.cleanup.trash.BASE_TRASH_DIR", trash_dir)
+        for backend in ("qdrant", "claude-mem", "serena"):
+            storage_dir = trash_dir / backend
+            storage_dir.mkdir()
+            files = [storage_dir / f"{i}.json" for i in range(3)]
+            for file in files:
+                file.write_text("12345")
+            write_manifest(storage_dir, backend, 3, "30d", "0h", files=files)
+
+        assert empty_expired_trash("30d") == {"removed": 9, "bytes_freed": 45}
+        assert [path for path in trash_dir.iterdir() if path.is_dir()] == []
@@ -0,0 +1,212 @@
+"""Tests for restoring trashed items (sweep --restore)."""
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from operations.cleanup.core import restore_memory_backends, run_cleanup
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.handlers.memory_mcp import MemoryMcpHandler
+from operations.cleanup.handlers.qdrant import QdrantHandler
+from operations.cleanup.handlers.serena import SerenaHandler
+from operations.cleanup.state import load_state
+from operations.cleanup.trash import find_trashed_items
+
+
+def _row_ids(db_path: Path, table: str) -> set[str]:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return {row[0] for row in conn.execute(f"SELECT id FROM {table}")}
+    finally:
+        conn.close()
+
+
+class TestRestoreClaudeMem:
+    """Tests for restoring claude-mem rows."""
+
+    def test_restores_selected_row(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+    ):
+        """Only the selected row is re-inserted, and it can't be restored twice."""
+        ClaudeMemHandler().cleanup("30d")
+        assert "obs_stale" not in _row_ids(with_sqlite_data, "observations")
+
+        result = restore_memory_backends(["claude-mem"], native_ids=["obs_stale"])
+
+        assert result["results"][0]["restored"] == 1
+        assert "obs_stale" in _row_ids(with_sqlite_data, "observations")
+        assert "session_stale" not in _row_ids(with_sqlite_data, "session_summaries")
+        assert find_trashed_items("claude-mem", ["obs_stale"]) == []
+
+        again = restore_memory_backends(["claude-mem"], native_ids=["obs_stale"])
+        assert again["results"][0]["restored"] == 0
+
+    def test_restores_wipe_backup(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+    ):
+        """Rows backed up by a wipe are all restored to their tables."""
+        ClaudeMemHandler().wipe(backup=True)
+
+        restore_memory_backends(["claude-mem"])
+
+        assert _row_ids(with_sqlite_data, "session_summaries") == {"session_stale", "session_valid"}
+        assert _row_ids(with_sqlite_data, "observations") == {"obs_stale", "obs_valid"}
+
+
+    def test_restored_rows_rechecked_by_next_sweep(
+        self,
+        apply_mock_patches,
+        sqlite_db: Path,
+        stale_datetime: datetime,
+        monkeypatch,
+    ):
+        """Restoring drops the watermark, so rows keeping their INTEGER PRIMARY KEY (i.e. rowid)
+        aren't skipped by the next incremental scan."""
+        monkeypatch.setattr("operations.cleanup.core.HANDLERS", (ClaudeMemHandler,))
+        monkeypatch.setattr("operations.validate_config.full_validate", lambda config: [])
+        monkeypatch.setattr("operations.cleanup.core.get_retention", lambda name: "30d")
+        conn = sqlite3.connect(str(sqlite_db))
+        conn.execute("DROP TABLE observations")
+        conn.execute("CREATE TABLE observations (id INTEGER PRIMARY KEY, created_at TEXT NOT NULL, content TEXT)")
+        stale_ts = stale_datetime.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        conn.executemany("INSERT INTO observations (id, created_at, content) VALUES (?, ?, ?)",
+                         [(1, stale_ts, "First"), (2, stale_ts, "Second")])
+        conn.commit()
+        conn.close()
+
+        run_cleanup(force=True)
+        assert "claude-mem" in load_state()["watermarks"]
+        restore_memory_backends(["claude-mem"], native_ids=["1"])
+        assert _row_ids(sqlite_db, "observations") == {1}
+        assert "claude-mem" not in load_state().get("watermarks", {})
+
+        run_cleanup(force=True)
+        assert _row_ids(sqlite_db, "observations") == set()
+
+
+class TestRestoreMemoryMcp:
+    """Tests for restoring Memory MCP lines."""
+
+    def test_appends_entities_before_relations(
+        self,
+        apply_mock_patches,
+        jsonl_file: Path,
+    ):
+        """Trashed lines are appended back byte-for-byte, entities first."""
+        entity = json.dumps({"name": "old", "created_at": "2020-01-01T00:00:00Z"}) + "\n"
+        relation = json.dumps({"type": "relation", "from": "kept", "to": "old"}) + "\n"
+        kept = json.dumps({"name": "kept", "created_at": "2999-01-01T00:00:00Z"}) + "\n"
+        jsonl_file.write_text(relation + entity + kept)
+
+        MemoryMcpHandler().cleanup("30d")
+        assert jsonl_file.read_text() == kept
+
+        # the MCP appended a line without its newline in the meantime
+        with open(jsonl_file, "a") as f:
+            f.write('{"name": "new"}')
+
+        result = restore_memory_backends(["memory-mcp"])
+
+        assert result["results"][0]["restored"] == 2
+        assert jsonl_file.read_text() == kept + '{"name": "new"}\n' + entity + relation
+
+
+class TestRestoreSerena:
+    """Tests for restoring Serena memory files."""
+
+    def test_moves_files_back_unless_taken(
+        self,
+        apply_mock_patches,
+        serena_memories_root: Path,
+    ):
+        """Files return to their original path; re-created ones are left in the trash."""
+        memories = serena_memories_root / "project_0" / ".serena" / "memories"
+        SerenaHandler().cleanup("0h")
+        (memories / "memory_1.md").write_text("re-created")
+
+        result = restore_memory_backends(["serena"], match="project 0")
+
+        assert result["results"][0]["restored"] == 1
+        assert (memories / "memory_0.md").read_text() == "# Memory 0\n\nProject 0 memory content."
+        assert (memories / "memory_1.md").read_text() == "re-created"
+
+        # the skipped file stays restorable (alongside project_1's unmatched files)
+        remaining = {item["native_id"] for item in find_trashed_items("serena")}
+        assert str(memories / "memory_1.md") in remaining
+        assert str(memories / "memory_0.md") not in remaining
+        assert len(remaining) == 3
+
+
+class TestRestoreQdrant:
+    """Tests for restoring Qdrant points."""
+
+    def test_upserts_points_with_vectors(
+        self,
+        apply_mock_patches,
+        trash_dir: Path,
+    ):
+        """Exported points are upserted back with their vectors (fetched for the stale points only)."""
+        requests = []
+        payload = {"metadata": {"created_at": "2020-01-01"}}
+
+        def qdrant_urlopen(req, timeout=None):
+            body = json.loads(req.data) if req.data else None
+            requests.append((req.get_method(), req.full_url, body))
+            if "/points/scroll" in req.full_url:
+                result = {"status": "ok", "result": {"points": [
+                    {"id": 1, "payload": payload},
+                    {"id": 2, "payload": {"metadata": {"created_at": "2999-01-01"}}},
+                ], "next_page_offset": None}}
+            elif req.full_url.endswith("/points"):
+                result = {"status": "ok", "result": [
+                    {"id": point_id, "vector": [0.1, 0.2], "payload": payload} for point_id in body["ids"]
+                ]}
+            else:
+                result = {"status": "ok"}
+            resp = MagicMock()
+            resp.read.return_value = json.dumps(result).encode()
+            resp.__enter__ = MagicMock(return_value=resp)
+            resp.__exit__ = MagicMock(return_value=False)
+            return resp
+
+        with patch("operations.cleanup.handlers.qdrant.urlopen", side_effect=qdrant_urlopen):
+            QdrantHandler().cleanup("30d")
+            result = restore_memory_backends(["qdrant"])
+
+        assert result["results"][0]["restored"] == 1
+        [scroll] = [body for _, url, body in requests if "/points/scroll" in url]
+        [retrieve] = [body for _, url, body in requests if url.endswith("/points")]
+        assert not scroll["with_vector"]
+        assert retrieve == {"ids": [1], "with_payload": True, "with_vector": True}
+        method, url, body = requests[-1]
+        assert method == "PUT" and "/points?wait=true" in url
+        assert body == {"points": [{"id": 1, "vector": [0.1, 0.2],
+                                    "payload": {"metadata": {"created_at": "2020-01-01"}}}]}
+
+
+class TestRestoreSelectors:
+    """Tests for restore selectors."""
+
+    def test_dry_run_and_time_range(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+    ):
+        """A dry run only reports matches, and the trashed_at range narrows them."""
+        ClaudeMemHandler().cleanup("30d")
+
+        now = datetime.now(timezone.utc)
+        preview = restore_memory_backends(["claude-mem"], trashed_since=now - timedelta(hours=1), dry_run=True)
+        assert preview["results"][0]["would_restore"] == 4
+        assert "obs_stale" not in _row_ids(with_sqlite_data, "observations")
+
+        future = restore_memory_backends(["claude-mem"], trashed_since=now + timedelta(hours=1), dry_run=True)
+        assert future["results"][0]["would_restore"] == 0
+
+        matched = restore_memory_backends(["claude-mem"], match="STALE OBSERVATION", dry_run=True)
+        assert [item["native_id"] for item in matched["results"][0]["items"]] == ["obs_stale"]
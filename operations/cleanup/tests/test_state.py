@@ -4,6 +4,7 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 
+from operations.cleanup.core import _current_watermark, wipe_memory_backends
 from operations.cleanup.state import (
     did_recently_run,
     load_state,
@@ -270,3 +271,32 @@ class TestNowAsIso:
 
         # verify result falls between before and after timestamps
         assert before <= parsed <= after
+
+
+class TestWatermarks:
+    """Tests for the per-backend watermarks kept in state.json."""
+
+    def test_full_scan_due_after_interval(self):
+        """A watermark is only used until its last full scan is older than the full scan interval."""
+        recent = {"full_scan_at": (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()}
+        stale = {"full_scan_at": (datetime.now(timezone.utc) - timedelta(days=8)).isoformat()}
+
+        assert _current_watermark(recent, timedelta(days=7)) == recent
+        assert _current_watermark(stale, timedelta(days=7)) is None
+        assert _current_watermark({"cutoff": "garbage"}, timedelta(days=7)) is None
+        assert _current_watermark(None, timedelta(days=7)) is None
+
+    def test_wipe_forgets_watermark(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        trash_dir: Path,
+        monkeypatch,
+    ):
+        """Wiping a backend drops its watermark (its rowids may start over), leaving the others'."""
+        monkeypatch.setattr("operations.validate_config.full_validate", lambda config: [])
+        save_state({"watermarks": {"claude-mem": {"cutoff": "x"}, "qdrant": {"cutoff": "y"}}})
+
+        wipe_memory_backends(["claude-mem"])
+
+        assert load_state()["watermarks"] == {"qdrant": {"cutoff": "y"}}
@@ -0,0 +1,169 @@
+"""Tests for per-backend storage statistics (sweep --stats)."""
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from operations.cleanup.core import main
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
+from operations.cleanup.handlers.memory_mcp import MemoryMcpHandler
+from operations.cleanup.handlers.qdrant import QdrantHandler
+from operations.cleanup.handlers.serena import SerenaHandler
+from operations.cleanup.stats import HISTOGRAM_WEEKS, AgeHistogram
+
+
+class TestAgeHistogram:
+    """Tests for AgeHistogram."""
+
+    def test_buckets_by_week(self):
+        """Items go in the week of their age (future ones in the first, ancient ones in the last)."""
+        now = datetime(2024, 6, 1, tzinfo=timezone.utc)
+        histogram = AgeHistogram(now)
+
+        histogram.add(now + timedelta(days=1))
+        histogram.add(now - timedelta(days=6))
+        histogram.add(now - timedelta(days=7), count=2)
+        histogram.add(now - timedelta(weeks=HISTOGRAM_WEEKS + 10))
+        histogram.add(None, count=3)
+
+        assert histogram.as_dict() == {"0w": 2, "1w": 2, f"{HISTOGRAM_WEEKS}w+": 1}
+        assert histogram.undated == 3
+        assert histogram.total() == 8
+
+    def test_week_bounds_match_add(self):
+        """A bucket's (start, end] range holds exactly the creation times add() files under it."""
+        histogram = AgeHistogram(datetime(2024, 6, 1, tzinfo=timezone.utc))
+
+        start, end = histogram.week_bounds(3)
+        assert end is not None and start == end - timedelta(weeks=1)
+        histogram.add(end)
+        histogram.add(start + timedelta(microseconds=1))
+        histogram.add(start)
+
+        assert histogram.as_dict() == {"3w": 2, "4w": 1}
+        assert histogram.week_bounds(0)[1] is None
+        assert histogram.week_bounds(HISTOGRAM_WEEKS)[0] is None
+
+
+class TestHandlerStats:
+    """Tests for each handler's statistics."""
+
+    def test_claude_mem(self, apply_mock_patches, with_sqlite_data: Path):
+        """Rows are counted per day of creation, and the database sized from its pages."""
+        conn = sqlite3.connect(with_sqlite_data)
+        now_ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        conn.execute("INSERT INTO observations (id, created_at, content) VALUES ('obs_new', ?, 'New')", (now_ts,))
+        conn.execute("INSERT INTO observations (id, created_at, content) VALUES ('obs_undated', '', 'Undated')")
+        conn.commit()
+        conn.close()
+
+        stats = ClaudeMemHandler().stats()
+
+        assert stats["items"] == 6
+        assert stats["age_histogram"] == {"0w": 1, f"{HISTOGRAM_WEEKS}w+": 4}
+        assert stats["undated"] == 1
+        assert stats["bytes"] == with_sqlite_data.stat().st_size
+        assert stats["free_bytes"] == 0
+
+    @pytest.mark.parametrize("use_index", [False, True])
+    def test_memory_mcp(self, apply_mock_patches, with_jsonl_data: Path, monkeypatch, use_index: bool):
+        """Dated lines are histogrammed from the sidecar index or a line scan alike (only the
+        scan sees the undated line)."""
+        monkeypatch.setattr("operations.cleanup.handlers.memory_mcp.is_memory_mcp_index_enabled", lambda: use_index)
+
+        stats = MemoryMcpHandler().stats()
+
+        assert stats["age_histogram"] == {f"{HISTOGRAM_WEEKS}w+": 8}
+        assert stats["undated"] == (0 if use_index else 1)
+        assert stats["bytes"] == with_jsonl_data.stat().st_size
+
+    def test_serena_lists_indexed_dirs(self, apply_mock_patches, serena_memories_root: Path):
+        """Memory files are histogrammed by mtime, from the directories the last search found
+        (with no index yet, --stats searches itself)."""
+        old_file = serena_memories_root / "project_0" / ".serena" / "memories" / "memory_0.md"
+        three_weeks_ago = (datetime.now(timezone.utc) - timedelta(weeks=3, days=1)).timestamp()
+        os.utime(old_file, (three_weeks_ago, three_weeks_ago))
+        files = list(serena_memories_root.glob("project_*/.serena/memories/*.md"))
+
+        stats = SerenaHandler().stats()
+
+        assert stats["age_histogram"] == {"0w": 3, "3w": 1}
+        assert stats["bytes"] == sum(f.stat().st_size for f in files)
+
+        # a project created since the last search is picked up by the next one
+        new_dir = serena_memories_root / "project_new" / ".serena" / "memories"
+        new_dir.mkdir(parents=True)
+        (new_dir / "memory.md").write_text("# New")
+        assert SerenaHandler().stats()["items"] == 4
+        SerenaHandler().cleanup("30d", dry_run=True)
+        assert SerenaHandler().stats()["items"] == 5
+
+    def test_qdrant_counts_per_week(self, apply_mock_patches):
+        """Points are counted per week of age via count requests, stopping once all are accounted for."""
+        now = datetime.now(timezone.utc)
+        created = [now, now - timedelta(days=1), now - timedelta(weeks=3, days=2), None]
+        count_requests = []
+
+        def fake_urlopen(req, timeout=None):
+            resp = MagicMock()
+            resp.__enter__ = MagicMock(return_value=resp)
+            resp.__exit__ = MagicMock(return_value=False)
+            if req.get_method() == "GET":
+                resp.read.return_value = b'{"status": "ok", "result": {"points_count": 4}}'
+                return resp
+
+            body = json.loads(req.data)
+            count_requests.append(body)
+            count = len(created)
+            if "filter" in body:
+                bounds = body["filter"]["must"][0]["range"]
+                count = sum(
+                    1 for c in created if c is not None
+                    and ("gt" not in bounds or c > datetime.fromisoformat(bounds["gt"]))
+                    and ("lte" not in bounds or c <= datetime.fromisoformat(bounds["lte"]))
+                )
+            resp.read.return_value = json.dumps({"status": "ok", "result": {"count": count}}).encode()
+            return resp
+
+        with patch("operations.cleanup.handlers.qdrant.urlopen", side_effect=fake_urlopen):
+            stats = QdrantHandler().stats()
+
+        assert stats["age_histogram"] == {"0w": 2, "3w": 1}
+        assert stats["undated"] == 1
+        assert stats["items"] == 4
+        # (the total, then one count per bucket: the undated point keeps every bucket in play)
+        assert len(count_requests) == 1 + HISTOGRAM_WEEKS + 1
+
+        created.pop()
+        count_requests.clear()
+        with patch("operations.cleanup.handlers.qdrant.urlopen", side_effect=fake_urlopen):
+            assert QdrantHandler().stats()["undated"] == 0
+        assert len(count_requests) == 1 + 4
+
+
+class TestStatsCli:
+    """Tests for sweep --stats."""
+
+    def test_report(self, apply_mock_patches, with_sqlite_data: Path, monkeypatch, capsys):
+        """The selected storage's counts, size & histogram are printed."""
+        monkeypatch.setattr("sys.argv", ["sweep", "--stats", "-s", "c"])
+
+        assert main() == 0
+
+        out = capsys.readouterr().out
+        assert out.startswith(f"claude-mem: 4 items, {with_sqlite_data.stat().st_size} bytes")
+        assert f"{HISTOGRAM_WEEKS}w+ " + "#" * 40 + " 4" in out
+
+    def test_json(self, apply_mock_patches, with_sqlite_data: Path, monkeypatch, capsys):
+        """With --verbose, results are printed as JSON."""
+        monkeypatch.setattr("sys.argv", ["sweep", "--stats", "-v", "-s", "cm"])
+
+        assert main() == 0
+
+        result = json.loads(capsys.readouterr().out)
+        assert [r["storage"] for r in result["results"]] == ["claude-mem", "memory-mcp"]
+        assert result["seconds"] < 1
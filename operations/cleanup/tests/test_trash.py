@@ -5,12 +5,14 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 
+from operations.cleanup.handlers.claude_mem import ClaudeMemHandler
 from operations.cleanup.trash import (
     empty_expired_trash,
     empty_all_trash,
     generate_trash_filename,
     get_trash_dir,
     move_to_trash,
+    read_manifest,
     write_manifest,
 )
 
@@ -61,7 +63,7 @@ class TestGenerateTrashFilename:
         """Generates timestamped filename with item count."""
         filename = generate_trash_filename(42)
 
-        # format: YYYY-MM-DDTHH-MM-SS_42-items.json
+        # format: YYYY-MM-DDTHH-MM-SS-ffffff_42-items.json
         assert "_42-items.json" in filename
         assert filename.startswith("20")  # year starts with 20xx
 
@@ -70,6 +72,18 @@ class TestGenerateTrashFilename:
         filename = generate_trash_filename(10, extension="jsonl")
         assert filename.endswith("_10-items.jsonl")
 
+    def test_batches_in_one_run_get_their_own_file(
+        self,
+        apply_mock_patches,
+        with_sqlite_data: Path,
+        trash_dir: Path,
+    ):
+        """Batches trashed within the same second don't overwrite each other's exports."""
+        ClaudeMemHandler().cleanup("30d")
+
+        files = [entry["files"][0] for entry in read_manifest(trash_dir / "claude-mem")]
+        assert len(files) == len(set(files)) == 2
+
 
 class TestWriteManifest:
     """Tests for write_manifest()."""
@@ -91,12 +105,11 @@ class TestWriteManifest:
             files=[Path("/fake/file1.db"), Path("/fake/file2.db")],
         )
 
-        # verify manifest was created with expected structure
-        manifest_path = trash_path / ".manifest.json"
+        # verify manifest was created with expected structure (one JSON entry per line)
+        manifest_path = trash_path / ".manifest.jsonl"
         assert manifest_path.exists()
 
-        with open(manifest_path) as f:
-            data = json.load(f)
+        data = read_manifest(trash_path)
 
         assert isinstance(data, list)
         assert len(data) == 1
@@ -117,12 +130,16 @@ class TestWriteManifest:
         # add first entry
         write_manifest(trash_path, "claude_mem", 3, "30d")
 
+        manifest_path = trash_path / ".manifest.jsonl"
+        first_entry_bytes = manifest_path.read_bytes()
+
         # add second entry
         write_manifest(trash_path, "qdrant", 10, "90d")
 
-        manifest_path = trash_path / ".manifest.json"
-        with open(manifest_path) as f:
-            data = json.load(f)
+        # earlier entries are never rewritten
+        assert manifest_path.read_bytes().startswith(first_entry_bytes)
+
+        data = read_manifest(trash_path)
 
         assert len(data) == 2
         assert data[0]["source"] == "claude_mem"
@@ -132,7 +149,7 @@ class TestWriteManifest:
         self,
         tmp_path: Path,
     ):
-        """Converts legacy single-object manifest to list format."""
+        """Migrates legacy single-object manifest to the JSONL format."""
         trash_path = tmp_path / "backend"
         trash_path.mkdir()
 
@@ -150,9 +167,9 @@ class TestWriteManifest:
         # append new entry
         write_manifest(trash_path, "new_backend", 5, "30d")
 
-        with open(manifest_path) as f:
-            data = json.load(f)
+        data = read_manifest(trash_path)
 
+        assert not manifest_path.exists()
         assert isinstance(data, list)
         assert len(data) == 2
         assert data[0]["source"] == "legacy"
@@ -173,13 +190,42 @@ class TestWriteManifest:
         # starts fresh without raising
         write_manifest(trash_path, "backend", 1, "30d")
 
-        with open(manifest_path) as f:
-            data = json.load(f)
+        data = read_manifest(trash_path)
 
         assert len(data) == 1
         assert data[0]["source"] == "backend"
 
 
+    def test_migrates_legacy_array_preserving_order(
+        self,
+        tmp_path: Path,
+    ):
+        """Legacy array entries migrate ahead of newer JSONL entries."""
+        trash_path = tmp_path / "backend"
+        trash_path.mkdir()
+
+        legacy = [{"source": "legacy_1", "files": []}, {"source": "legacy_2", "files": []}]
+        (trash_path / ".manifest.json").write_text(json.dumps(legacy, indent=2))
+
+        write_manifest(trash_path, "new", 1, "30d")
+
+        assert [e["source"] for e in read_manifest(trash_path)] == ["legacy_1", "legacy_2", "new"]
+
+    def test_skips_torn_final_line(
+        self,
+        tmp_path: Path,
+    ):
+        """A partially-written final line (e.g. from a crash mid-append) doesn't hide other entries."""
+        trash_path = tmp_path / "backend"
+        trash_path.mkdir()
+
+        write_manifest(trash_path, "backend", 1, "30d")
+        with open(trash_path / ".manifest.jsonl", "a") as f:
+            f.write('{"trashed_at": "2024-')
+
+        assert len(read_manifest(trash_path)) == 1
+
+
 class TestMoveToTrash:
     """Tests for move_to_trash()."""
 
@@ -262,7 +308,7 @@ class TestEmptyExpiredTrash:
         }]
         (storage_dir / ".manifest.json").write_text(json.dumps(manifest))
 
-        removed = empty_expired_trash("30d")
+        removed = empty_expired_trash("30d")["removed"]
 
         assert removed == 1
         assert not old_file.exists()
@@ -295,11 +341,34 @@ class TestEmptyExpiredTrash:
         }]
         (storage_dir / ".manifest.json").write_text(json.dumps(manifest))
 
-        removed = empty_expired_trash("30d")
+        removed = empty_expired_trash("30d")["removed"]
 
         assert removed == 0
         assert new_file.exists()
 
+    def test_manifest_untouched_when_nothing_expired(
+        self,
+        tmp_path: Path,
+        monkeypatch,
+    ):
+        """The JSONL manifest is only rewritten (compacted) when entries are purged."""
+        trash_base = tmp_path / ".archives" / "trash"
+        storage_dir = trash_base / "backend"
+        storage_dir.mkdir(parents=True)
+        monkeypatch.setattr(
+            "operations.cleanup.trash.BASE_TRASH_DIR",
+            trash_base
+        )
+
+        write_manifest(storage_dir, "backend", 1, "30d", files=[storage_dir / "new.json"])
+        manifest_path = storage_dir / ".manifest.jsonl"
+        before = manifest_path.stat()
+
+        assert empty_expired_trash("30d")["removed"] == 0
+
+        after = manifest_path.stat()
+        assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+
     def test_handles_missing_trash_dir(
         self,
         tmp_path: Path,
@@ -311,7 +380,7 @@ class TestEmptyExpiredTrash:
             tmp_path / "nonexistent"
         )
 
-        removed = empty_expired_trash("30d")
+        removed = empty_expired_trash("30d")["removed"]
         assert removed == 0
 
     def test_skips_corrupt_manifest(
@@ -332,7 +401,7 @@ class TestEmptyExpiredTrash:
         (storage_dir / ".manifest.json").write_text("not json")
         (storage_dir / "file.json").write_text("{}")
 
-        removed = empty_expired_trash("30d")
+        removed = empty_expired_trash("30d")["removed"]
 
         # skips this directory without crashing
         assert removed == 0
@@ -363,7 +432,7 @@ class TestEmptyExpiredTrash:
         (storage_dir / ".manifest.json").write_text(json.dumps(manifest))
 
         # continues without raising
-        removed = empty_expired_trash("30d")
+        removed = empty_expired_trash("30d")["removed"]
         assert removed == 0
 
     def test_mtime_fallback_when_no_files_list(
@@ -397,7 +466,7 @@ class TestEmptyExpiredTrash:
         }]
         (storage_dir / ".manifest.json").write_text(json.dumps(manifest))
 
-        removed = empty_expired_trash("30d")
+        removed = empty_expired_trash("30d")["removed"]
 
         assert removed == 1
         assert not old_file.exists()
@@ -481,10 +550,10 @@ class TestEmptyExpiredTrash:
         assert new_file.exists()
         assert not old_file.exists()
 
-        # manifest should be updated
-        with open(storage_dir / ".manifest.json") as f:
-            remaining = json.load(f)
+        # manifest should be updated (and migrated to JSONL)
+        remaining = read_manifest(storage_dir)
         assert len(remaining) == 1
+        assert not (storage_dir / ".manifest.json").exists()
 
     def test_handles_legacy_single_object_manifest(
         self,
@@ -513,7 +582,7 @@ class TestEmptyExpiredTrash:
         }
         (storage_dir / ".manifest.json").write_text(json.dumps(manifest))
 
-        removed = empty_expired_trash("30d")
+        removed = empty_expired_trash("30d")["removed"]
 
         assert removed == 1
 
@@ -543,6 +612,7 @@ class TestEmptyAllTrash:
         result = empty_all_trash()
 
         assert result["emptied"] == 2  # excludes .manifest.json
+        assert result["bytes_freed"] == 4
         assert not storage_dir.exists()
 
     def test_handles_missing_trash_dir(
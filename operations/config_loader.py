@@ -16,9 +16,10 @@ import re
 from datetime import timedelta
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, TypedDict, cast
+from typing import Any, Callable, NotRequired, TypedDict, TypeVar, cast
 
-import yaml
+# type of a numeric config value (see _to_number())
+N = TypeVar("N", int, float)
 
 
 # TypedDict schemas corresponding to nested YAML config sections
@@ -31,10 +32,25 @@ class RetentionPeriodForConfig(TypedDict):
 
 class TrashConfig(TypedDict):
     grace_period: str
+    compression: NotRequired[str]
+    compression_level: NotRequired[int]
+    max_size: NotRequired[str]
+    max_size_for: NotRequired[dict[str, str]]
+    min_age: NotRequired[str]
+    dedup: NotRequired[bool]
+    pack_serena: NotRequired[bool]
 
 
 class CleanupConfig(TypedDict):
     min_interval: str
+    memory_mcp_index: NotRequired[bool]
+    max_workers: NotRequired[int]
+    handler_timeout: NotRequired[int]
+    batch_size: NotRequired[int]
+    max_seconds: NotRequired[float]
+    max_items: NotRequired[int]
+    full_scan_interval: NotRequired[str]
+    pressure_size: NotRequired[str]
 
 
 class StartupTimeoutForConfig(TypedDict):
@@ -187,6 +203,9 @@ def expand_path(path_str: str) -> Path:
 
 def _load_yaml_file(path: Path) -> dict[str, Any]:
     """Load YAML file if it exists, otherwise return empty dict."""
+    # (imported on first load, as most imports of this module never read the config files)
+    import yaml
+
     if path.exists():
         with open(path) as f:
             return yaml.safe_load(f) or {}
@@ -328,12 +347,109 @@ def get_trash_grace_period() -> str:
     return config.get("trash", {}).get("grace_period", "30d")
 
 
+def get_trash_compression() -> str:
+    """Get the codec used to compress trash exports (zstd, gzip, lzma or none)."""
+    config = get_config()
+    return str(config.get("trash", {}).get("compression", "zstd"))
+
+
+def get_trash_compression_level() -> int | None:
+    """Get the trash compression level (None to use the codec's default)."""
+    config = get_config()
+    level = config.get("trash", {}).get("compression_level")
+    return _to_number(level, "trash.compression_level", int) if level is not None else None
+
+
+def get_trash_max_size() -> int | None:
+    """Get the cap on the trash's total size in bytes (None if uncapped)."""
+    config = get_config()
+    max_size = config.get("trash", {}).get("max_size")
+    return parse_size(str(max_size)) if max_size is not None else None
+
+
+def get_trash_max_size_for() -> dict[str, int]:
+    """Get the per-backend trash size caps in bytes, keyed by backend name (e.g. "claude-mem")."""
+    config = get_config()
+    quotas = config.get("trash", {}).get("max_size_for") or {}
+    return {key.replace("_", "-"): parse_size(str(size)) for key, size in quotas.items()}
+
+
+def get_trash_min_age() -> str:
+    """Get the minimum age of trash batches before they can be evicted to enforce size caps."""
+    config = get_config()
+    return str(config.get("trash", {}).get("min_age", "1d"))
+
+
+def is_trash_dedup_enabled() -> bool:
+    """Check whether trashed records are deduplicated via the content-addressed store (off by default)."""
+    config = get_config()
+    return bool(config.get("trash", {}).get("dedup", False))
+
+
+def is_serena_trash_packing_enabled() -> bool:
+    """Check whether each batch of trashed Serena files is packed into one tar archive (off by default)."""
+    config = get_config()
+    return bool(config.get("trash", {}).get("pack_serena", False))
+
+
 def get_cleanup_interval() -> str:
     """Get minimum cleanup interval."""
     config = get_config()
     return config.get("cleanup", {}).get("min_interval", "24h")
 
 
+def get_cleanup_max_workers() -> int:
+    """Get how many memory backends are cleaned up concurrently."""
+    config = get_config()
+    return max(1, _to_number(config.get("cleanup", {}).get("max_workers", 4), "cleanup.max_workers", int))
+
+
+def get_cleanup_handler_timeout() -> float | None:
+    """Get the seconds each backend's cleanup may run before it's abandoned (None for no limit)."""
+    config = get_config()
+    timeout = config.get("cleanup", {}).get("handler_timeout", 600)
+    return _to_number(timeout, "cleanup.handler_timeout", float) if timeout else None
+
+
+def get_cleanup_batch_size() -> int:
+    """Get how many stale items a backend's cleanup trashes & deletes at a time."""
+    config = get_config()
+    return max(1, _to_number(config.get("cleanup", {}).get("batch_size", 1000), "cleanup.batch_size", int))
+
+
+def get_cleanup_max_seconds() -> float | None:
+    """Get the seconds a sweep may spend cleaning up backends before it stops (None for no limit)."""
+    config = get_config()
+    max_seconds = config.get("cleanup", {}).get("max_seconds", 0)
+    return _to_number(max_seconds, "cleanup.max_seconds", float) if max_seconds else None
+
+
+def get_cleanup_max_items() -> int | None:
+    """Get how many stale items a sweep may trash before it stops (None for no limit)."""
+    config = get_config()
+    max_items = config.get("cleanup", {}).get("max_items", 0)
+    return _to_number(max_items, "cleanup.max_items", int) if max_items else None
+
+
+def get_cleanup_full_scan_interval() -> str:
+    """Get how often backends' stale item scans ignore their watermarks and re-check everything."""
+    config = get_config()
+    return config.get("cleanup", {}).get("full_scan_interval", "7d")
+
+
+def get_cleanup_pressure_size() -> int | None:
+    """Get the storage size in bytes past which `sweep --daemon` sweeps early (None if disabled)."""
+    config = get_config()
+    pressure_size = config.get("cleanup", {}).get("pressure_size")
+    return parse_size(str(pressure_size)) if pressure_size is not None else None
+
+
+def is_memory_mcp_index_enabled() -> bool:
+    """Check whether the Memory MCP byte-offset sidecar index is enabled (off by default)."""
+    config = get_config()
+    return bool(config.get("cleanup", {}).get("memory_mcp_index", False))
+
+
 def get_path(path_name: str) -> Path:
     """Get a configured file path, expanded.
 
@@ -436,3 +552,42 @@ def parse_duration(duration_str: str) -> timedelta:
         return timedelta(days=value * 365)  # Approximate year
 
     raise ValueError(f"Unknown duration unit: {unit}")
+
+
+def _to_number(value: Any, key: str, kind: Callable[[Any], N]) -> N:
+    """Convert a numeric config value (e.g. int or float), naming its key if it isn't one.
+
+    Raises:
+        ValueError: If the value isn't a number (see validate_config.validate_numbers()).
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid {key}: {value!r}. Use a number")
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {key}: {value!r}. Use a number") from None
+
+
+_SIZE_UNITS = {"": 1, "b": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(size_str: str) -> int:
+    """Parse size string like '500MB', '2GB', '1.5G', '4096' to bytes (units are powers of 1024).
+
+    Args:
+        size_str: Size string (e.g., "2GB", "500M", "4096").
+
+    Returns:
+        Size in bytes.
+
+    Raises:
+        ValueError: If format is invalid.
+    """
+    match = re.match(r"^(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?$", size_str.strip().lower())
+    if not match:
+        raise ValueError(
+            f"Invalid size format: {size_str}. "
+            "Use format like '4096', '500MB', '2GB'"
+        )
+
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
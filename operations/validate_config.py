@@ -149,6 +149,23 @@ def validate_duration_format(duration: str) -> str | None:
     return None
 
 
+def validate_size_format(size: str) -> str | None:
+    """Validate a size string format.
+
+    Args:
+        size: Size string to validate.
+
+    Returns:
+        Error message if invalid, None if valid.
+    """
+    import re
+
+    if not re.match(r"^\d+(\.\d+)?\s*[kmgt]?(i?b)?$", size.strip().lower()):
+        return f"Invalid size format: '{size}'. Use format like '4096', '500MB', '2GB'"
+
+    return None
+
+
 def _check_durations(section: Mapping[str, Any], section_name: str, *keys: str) -> list[str]:
     """Check duration format for specified keys in a config section.
 
@@ -185,16 +202,91 @@ def validate_durations(config: Mapping[str, Any]) -> list[str]:
     ))
     errors.extend(_check_durations(
         config.get("cleanup", {}), "cleanup",
-        "min_interval"
+        "min_interval", "full_scan_interval"
     ))
     errors.extend(_check_durations(
         config.get("trash", {}), "trash",
-        "grace_period"
+        "grace_period", "min_age"
     ))
 
     return errors
 
 
+def validate_sizes(config: Mapping[str, Any]) -> list[str]:
+    """Validate all size strings in config have correct format.
+
+    Args:
+        config: Configuration dictionary.
+
+    Returns:
+        List of error messages for invalid sizes.
+    """
+    errors = []
+    trash = config.get("trash", {})
+
+    if "pressure_size" in config.get("cleanup", {}):
+        if err := validate_size_format(str(config["cleanup"]["pressure_size"])):
+            errors.append(f"cleanup.pressure_size: {err}")
+    if "max_size" in trash:
+        if err := validate_size_format(str(trash["max_size"])):
+            errors.append(f"trash.max_size: {err}")
+    for key, size in (trash.get("max_size_for") or {}).items():
+        if err := validate_size_format(str(size)):
+            errors.append(f"trash.max_size_for.{key}: {err}")
+
+    return errors
+
+
+# numeric keys checked by validate_numbers(): (section, key) -> (integers only, minimum, may be null)
+NUMERIC_KEYS: dict[tuple[str, str], tuple[bool, int | None, bool]] = {
+    ("cleanup", "max_workers"): (True, 1, False),
+    ("cleanup", "batch_size"): (True, 1, False),
+    ("cleanup", "max_items"): (True, 0, True),
+    ("cleanup", "handler_timeout"): (False, 0, True),
+    ("cleanup", "max_seconds"): (False, 0, True),
+    ("trash", "compression_level"): (True, None, True),
+}
+
+
+def validate_number(value: Any, integer: bool, minimum: int | None = None) -> str | None:
+    """Validate a numeric config value.
+
+    Args:
+        value: Value to validate.
+        integer: Whether only whole numbers are allowed.
+        minimum: Smallest allowed value (None for no minimum).
+
+    Returns:
+        Error message if invalid, None if valid.
+    """
+    kind = "an integer" if integer else "a number"
+    # (YAML booleans are ints to Python, but never meant as counts)
+    if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+        return f"Invalid value: {value!r}. Use {kind}"
+    if minimum is not None and value < minimum:
+        return f"Invalid value: {value!r}. Use {kind} of at least {minimum}"
+    return None
+
+
+def validate_numbers(config: Mapping[str, Any]) -> list[str]:
+    """Validate all numeric values in config have the right type & range.
+
+    Args:
+        config: Configuration dictionary.
+
+    Returns:
+        List of error messages for invalid numbers.
+    """
+    errors = []
+    for (section_name, key), (integer, minimum, nullable) in NUMERIC_KEYS.items():
+        section = config.get(section_name) or {}
+        if key not in section or (nullable and section[key] is None):
+            continue
+        if err := validate_number(section[key], integer, minimum):
+            errors.append(f"{section_name}.{key}: {err}")
+    return errors
+
+
 def full_validate(config: Mapping[str, Any]) -> list[str]:
     """Perform full validation including structure and format checks.
 
@@ -206,9 +298,11 @@ def full_validate(config: Mapping[str, Any]) -> list[str]:
     """
     errors = validate_config(config)
 
-    # Only check duration formats if structure is valid
+    # Only check duration, size & number formats if structure is valid
     if not errors:
         errors.extend(validate_durations(config))
+        errors.extend(validate_sizes(config))
+        errors.extend(validate_numbers(config))
 
     return errors
 